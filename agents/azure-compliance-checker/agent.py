@@ -6,22 +6,75 @@ for French FSI regulations including ACPR, CRD IV/CRR, LCB-FT/AMLD5, RGPD/CNIL,
 ISO 27001, DORA, and NIS2.
 """
 
+import argparse
 import asyncio
 import json
+import multiprocessing
+import os
+import secrets
 import sys
+import time
 import yaml
 from pathlib import Path
-from typing import List, Any, Optional, Dict
-from datetime import datetime
-from collections import defaultdict
+from typing import List, Any, AsyncIterator, Callable, Optional, Dict, Set, Tuple
+from datetime import datetime, timedelta
+from multiprocessing.connection import Client
 
-# Add the shared modules to the path
-sys.path.append(str(Path(__file__).parent.parent.parent / "shared"))
+# Add the repository root to the path so the shared package resolves
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from agents import InteractiveAgent
-from utils import setup_logging
+from shared.agents import InteractiveAgent
+from shared.utils import setup_logging
 from claude_agent_sdk import tool
 
+from compliance.batch import load_batch, render_batch_table
+from compliance.cache import QueryCache
+from compliance.checklists import ChecklistCache, ChecklistSet
+from compliance.distributed import AUTHKEY_ENV, ScanCoordinator, Shard, parse_address, shard_controls
+from compliance.evaluator import CompiledRequirement, ResourceColumns, compile_control
+from compliance.executor import AzureCliError, AzureCliExecutor, AzureCliThrottled, AzureCliTimeout
+from compliance.fanout import (
+    ScopedExecutor,
+    merge_stores,
+    parse_subscriptions,
+    subscriptions_in_management_group,
+)
+from compliance.history import ScanHistory
+from compliance.incremental import (
+    FINGERPRINT_FIELDS,
+    FINGERPRINT_QUERY,
+    changed_types,
+    controls_by_type,
+    dependent_controls,
+    fingerprint_inventory,
+)
+from compliance.inventory import ResourceInventory, record_schema
+from compliance.jsonstream import project_resource
+from compliance.records import ResourceRecord
+from compliance.report import STATUS_ICONS, render_control
+from compliance.resource_graph import ResourceGraphBackend, build_query_plan
+from compliance.sampling import SamplingPolicy, evaluate_sampled
+from compliance.scheduler import (
+    CostModel,
+    CriticalFailureLimit,
+    control_priority,
+    regulation_priorities,
+    run_prioritized,
+    schedule,
+)
+from compliance.snapshot import SNAPSHOT_SUFFIX, SnapshotHeader, read_snapshot, write_snapshot
+from compliance.streaming import ResultStreamWriter, iter_completed
+from compliance.throttle import AdaptiveLimiter
+from compliance.watch import STATE_DRIFT, STATE_ERROR, STATE_OK, WatchOutput, status_transitions
+from compliance.results import (
+    FAILED,
+    MANUAL,
+    PASSED,
+    ComplianceResultStore,
+    ControlOutcome,
+    RequirementOutcome,
+)
+
 
 class AzureComplianceAgent(InteractiveAgent):
     """
@@ -35,10 +88,21 @@ class AzureComplianceAgent(InteractiveAgent):
     - Support for French FSI regulations
     """
 
-    def __init__(self, config_dir: Path):
+    def __init__(
+        self,
+        config_dir: Path,
+        use_cache: bool = True,
+        snapshot: Optional[Path] = None,
+        agent_config: Optional[Dict[str, Any]] = None
+    ):
         super().__init__(config_dir)
+        # An explicit configuration (distributed workers) replaces config.yaml
+        if agent_config is not None:
+            self.agent_config = agent_config
+        self.use_cache = use_cache
         self.checklists_dir = config_dir / "checklists"
         self.reports_dir = config_dir / "reports"
+        self.snapshots_dir = config_dir / "snapshots"
 
         # Ensure directories exist
         self.checklists_dir.mkdir(exist_ok=True)
@@ -46,9 +110,45 @@ class AzureComplianceAgent(InteractiveAgent):
 
         # Compliance state
         self.current_checklist = None
-        self.compliance_results = []
+        self.current_checklist_name: Optional[str] = None
+        self.compliance_results = ComplianceResultStore()
         self.last_scan_time = None
 
+        # Inventory and per-type fingerprints of the last scan, used by
+        # revalidate_changed to re-evaluate only affected controls
+        self.scan_inventory: Optional[ResourceInventory] = None
+        self.scan_fingerprints: Dict[str, str] = {}
+
+        # Per-subscription results of the last fan-out scan (merged results
+        # live in compliance_results)
+        self.subscription_results: Dict[str, ComplianceResultStore] = {}
+
+        # Checklists merged by validate_checklists; current_checklist then
+        # holds their controls concatenated
+        self.checklist_set: Optional[ChecklistSet] = None
+
+        # Azure CLI executor shared by every tool
+        self.az = self._create_executor()
+
+        # Compiled checklists, re-parsed only when their file changes
+        self.checklists = self._create_checklist_cache()
+
+        # Query durations per resource type, used to schedule cheap controls first
+        self.costs = self._create_cost_model()
+
+        # Stratified sampling of per-resource checks on very large types
+        self.sampling = self._create_sampling_policy()
+
+        # Persistent scan history for trends and scan diffs
+        self.history = self._create_history()
+        self.last_scan_id: Optional[int] = None
+
+        # Offline inventory snapshot; when set, scans make no Azure CLI calls
+        self.snapshot_inventory: Optional[ResourceInventory] = None
+        self.snapshot_header: Optional[SnapshotHeader] = None
+        if snapshot is not None:
+            self.snapshot_header, self.snapshot_inventory = read_snapshot(snapshot)
+
     def get_system_prompt(self) -> Optional[str]:
         """Get the system prompt for this agent."""
         return """You are an Azure Compliance and Audit expert specializing in French Financial Services regulations.
@@ -93,12 +193,22 @@ You prioritize:
             self.load_compliance_checklist,
             self.validate_control,
             self.validate_all_controls,
+            self.revalidate_changed,
+            self.validate_subscriptions,
+            self.validate_checklists,
+            self.validate_distributed,
             self.check_azure_resource,
             self.generate_compliance_report,
             self.get_compliance_summary,
             self.get_remediation_plan,
             self.export_audit_report,
             self.validate_custom_control,
+            self.validate_custom_controls,
+            self.invalidate_cache,
+            self.export_inventory_snapshot,
+            self.load_inventory_snapshot,
+            self.get_compliance_trend,
+            self.diff_scans,
         ]
 
     @tool("list_available_checklists", "List available compliance checklists", {})
@@ -115,14 +225,13 @@ You prioritize:
 
         checklist_text = "📋 Available Compliance Checklists:\n\n"
         for i, checklist_path in enumerate(checklists, 1):
-            # Load and parse to get metadata
+            # Header comes from the compiled index unless the file changed
             try:
-                with open(checklist_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    controls_count = len(data.get('checklist', []))
+                header = self.checklists.header(checklist_path)
 
                 checklist_text += f"{i}. **{checklist_path.name}**\n"
-                checklist_text += f"   • Controls: {controls_count}\n"
+                checklist_text += f"   • Controls: {header.controls}\n"
+                checklist_text += f"   • Regulations: {len(header.regulations)}\n"
                 checklist_text += f"   • Path: {checklist_path}\n\n"
             except Exception as e:
                 checklist_text += f"{i}. **{checklist_path.name}** (Error loading: {str(e)})\n\n"
@@ -147,24 +256,18 @@ You prioritize:
             }
 
         try:
-            with open(checklist_path, 'r') as f:
-                self.current_checklist = yaml.safe_load(f)
-
-            controls = self.current_checklist.get('checklist', [])
-
-            # Analyze checklist
-            regulations = set()
-            for control in controls:
-                regulations.add(control.get('reglementation', 'Unknown'))
+            self.current_checklist = self.checklists.load(checklist_path)
+            self.current_checklist_name = filename
+            self.checklist_set = None
+            header = self.checklists.header(checklist_path)
 
             result_text = f"✅ Loaded Checklist: {filename}\n\n"
             result_text += f"📊 Summary:\n"
-            result_text += f"   • Total Controls: {len(controls)}\n"
-            result_text += f"   • Regulations Covered: {len(regulations)}\n\n"
+            result_text += f"   • Total Controls: {header.controls}\n"
+            result_text += f"   • Regulations Covered: {len(header.regulations)}\n\n"
 
             result_text += "🏛️  Regulations:\n"
-            for reg in sorted(regulations):
-                count = sum(1 for c in controls if c.get('reglementation') == reg)
+            for reg, count in sorted(header.regulations.items()):
                 result_text += f"   • {reg}: {count} controls\n"
 
             result_text += "\n💡 Next steps:\n"
@@ -206,121 +309,388 @@ You prioritize:
             }
 
         control = controls[control_index]
-        result = await self._validate_single_control(control, control_index)
+        self.az.forget_account()
+        outcome = await self._validate_single_control(control, control_index)
 
         return {
             "content": [
-                {"type": "text", "text": result}
+                {"type": "text", "text": render_control(outcome)}
             ]
         }
 
-    async def _validate_single_control(self, control: Dict, index: int) -> str:
-        """Validate a single control against Azure resources."""
-        import subprocess
-
-        result_text = f"\n{'='*80}\n"
-        result_text += f"Control #{index + 1}\n"
-        result_text += f"{'='*80}\n\n"
-
-        result_text += f"🏛️  **Réglementation**: {control.get('reglementation')}\n"
-        result_text += f"📋 **Exigence**: {control.get('exigence')}\n"
-        result_text += f"📄 **Preuve**: {control.get('preuve')}\n"
-        result_text += f"🔧 **Contrôle**: {control.get('controle')}\n\n"
+    def display_message(self, message: Any) -> None:
+        """Display a message, including live control outcomes streamed during scans."""
+        if isinstance(message, ControlOutcome):
+            icon = STATUS_ICONS.get(message.status, "•")
+            print(f"   {icon} Control #{message.index + 1}: {message.regulation} - {message.requirement}: {message.status}")
+            return
+        super().display_message(message)
+
+    def _summary_counts(self) -> Dict[str, Any]:
+        """Status counts and compliance rate of the current results."""
+        store = self.compliance_results
+        return {
+            'passed': store.count(PASSED),
+            'failed': store.count(FAILED),
+            'manual': store.count(MANUAL),
+            'total': len(store),
+            'compliance_rate': round(store.compliance_rate(), 1),
+        }
 
+    def _azure_settings(self) -> Dict[str, Any]:
+        """Return the compliance.azure section of config.yaml."""
+        return (self.agent_config.get('compliance') or {}).get('azure') or {}
+
+    def _create_executor(self) -> AzureCliExecutor:
+        """Create the Azure CLI executor from compliance settings."""
+        azure = self._azure_settings()
+        validation = (self.agent_config.get('compliance') or {}).get('validation') or {}
+        max_parallel = azure.get('max_parallel_queries', 8) if validation.get('parallel', False) else 1
+        cli_path = azure.get('cli_path', 'az')
+        if "/" in cli_path:
+            cli_path = str((self.config_dir / cli_path).resolve())
+
+        # Concurrency starts at max_parallel_queries and adapts to throttling
+        throttling = azure.get('throttling') or {}
+        adaptive = throttling.get('adaptive', True) and max_parallel > 1
+        limiter = AdaptiveLimiter(
+            max_parallel,
+            max_limit=max(max_parallel, throttling.get('max_parallel_ceiling', 32)) if adaptive else max_parallel,
+            decrease=throttling.get('decrease_factor', 0.5),
+            adaptive=adaptive
+        )
+        return AzureCliExecutor(
+            timeout=azure.get('query_timeout', 30),
+            cli_path=cli_path,
+            cache=self._create_query_cache(),
+            limiter=limiter,
+            max_retries=throttling.get('max_retries', 5),
+            backoff_base=throttling.get('backoff_base', 1.0),
+            backoff_max=throttling.get('backoff_max', 60)
+        )
+
+    def _create_query_cache(self) -> Optional[QueryCache]:
+        """Create the persistent Azure query cache unless disabled."""
+        compliance = self.agent_config.get('compliance') or {}
+        settings = compliance.get('cache') or {}
+        if not self.use_cache or not settings.get('enabled', True):
+            return None
+
+        validation = compliance.get('validation') or {}
+        return QueryCache(
+            path=self.config_dir / settings.get('path', '.cache/azure-queries.sqlite'),
+            default_ttl=validation.get('cache_duration', 300),
+            ttl_by_type=settings.get('ttl_by_type'),
+            max_entries=settings.get('max_entries', 2000),
+            max_bytes=int(settings.get('max_size_mb', 200) * 1024 * 1024)
+        )
+
+    def _create_history(self) -> Optional[ScanHistory]:
+        """Open the scan history database unless disabled."""
+        settings = (self.agent_config.get('compliance') or {}).get('history') or {}
+        if not settings.get('enabled', True):
+            return None
+        return ScanHistory(
+            self.config_dir / settings.get('path', 'reports/scan-history.sqlite'),
+            keep_scans=settings.get('keep_scans', 1000)
+        )
+
+    def _record_scan(self, scope: str) -> None:
+        """Persist the current results as a new scan in the history."""
+        if self.history is None:
+            return
+        try:
+            self.last_scan_id = self.history.record(
+                self.compliance_results,
+                checklist=self.current_checklist_name,
+                scope=scope,
+                scan_time=self.last_scan_time
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not record scan history: {e}")
+
+    def _create_checklist_cache(self) -> ChecklistCache:
+        """Create the compiled checklist store (in-memory only when caching is disabled)."""
+        compliance = self.agent_config.get('compliance') or {}
+        settings = compliance.get('cache') or {}
+        if not self.use_cache or not settings.get('enabled', True):
+            return ChecklistCache()
+        return ChecklistCache(self.config_dir / settings.get('checklists_path', '.cache/checklists'))
+
+    def _create_cost_model(self) -> CostModel:
+        """Create the learned query cost model (in-memory only when caching is disabled)."""
+        settings = (self.agent_config.get('compliance') or {}).get('cache') or {}
+        if not self.use_cache or not settings.get('enabled', True):
+            return CostModel()
+        return CostModel(self.config_dir / settings.get('costs_path', '.cache/query-costs.json'))
+
+    def _create_sampling_policy(self) -> Optional[SamplingPolicy]:
+        """Sampling policy from validation.sampling (None when disabled)."""
+        validation = (self.agent_config.get('compliance') or {}).get('validation') or {}
+        settings = validation.get('sampling') or {}
+        if not settings.get('enabled', False):
+            return None
+        return SamplingPolicy(
+            min_resources=int(settings.get('min_resources', 10000)),
+            sample_size=int(settings.get('sample_size', 400)),
+            confidence=float(settings.get('confidence', 0.95)),
+            margin=float(settings.get('margin', 0.05)),
+            seed=settings.get('seed'),
+        )
+
+    def _control_order(self, controls: List[Dict]) -> List[int]:
+        """Dispatch order of a scan: by regulation priority and learned cost, unless disabled."""
+        validation = (self.agent_config.get('compliance') or {}).get('validation') or {}
+        if not validation.get('prioritize', True):
+            return list(range(len(controls)))
+        return schedule(controls, self._priorities(), self.costs)
+
+    def _priorities(self) -> Dict[str, str]:
+        return regulation_priorities((self.agent_config.get('compliance') or {}).get('regulations') or {})
+
+    async def _fetch_inventory(
+        self,
+        controls: List[Dict],
+        refresh: bool = False,
+        executor: Optional[ScopedExecutor] = None,
+        compact: bool = True
+    ) -> ResourceInventory:
+        """
+        Fetch the resources needed by a scan.
+
+        Uses projected Resource Graph queries planned from the controls when
+        enabled, otherwise a single streamed `az resource list` call whose
+        resources become compact records as they are parsed.
+        `refresh` bypasses the query cache; `executor` scopes the queries to
+        a subscription; `compact=False` keeps whole payloads (snapshots).
+        """
+        az = executor or self.az
+        azure = self._azure_settings()
+        if azure.get('use_resource_graph', False):
+            plan = build_query_plan(controls)
+            try:
+                backend = ResourceGraphBackend(az, page_size=azure.get('graph_page_size', 1000))
+                inventory = await backend.fetch(plan, refresh=refresh)
+                self.logger.info(
+                    f"Fetched {len(inventory)} resource(s) with {len(plan)} Resource Graph query(ies)"
+                )
+                return self._compact(inventory, controls) if compact else inventory
+            except AzureCliError as e:
+                self.logger.warning(f"Resource Graph query failed, falling back to az resource list: {e}")
+
+        # Records are built while streaming, so raw resources never pile up
+        resources = await az.collect_json(
+            ["resource", "list"], transform=self._compactor(controls) if compact else None, refresh=refresh
+        )
+        self.logger.info(f"Fetched inventory with {len(resources)} resource(s)")
+        return ResourceInventory(resources)
+
+    def _compactor(self, controls: List[Dict]) -> Optional[Callable[[Dict], ResourceRecord]]:
+        """Turn streamed resources into compact records for the controls, unless compaction is disabled."""
+        if not self._azure_settings().get('compact_inventory', True):
+            return None
+        return record_schema(controls, FINGERPRINT_FIELDS).record
+
+    def _compact(self, inventory: ResourceInventory, controls: List[Dict]) -> ResourceInventory:
+        """Reduce an inventory to the properties the controls read, unless disabled."""
+        if not self._azure_settings().get('compact_inventory', True):
+            return inventory
+        return inventory.compact(record_schema(controls, FINGERPRINT_FIELDS))
+
+    def _fingerprint(self, inventory: ResourceInventory) -> Dict[str, str]:
+        """Fingerprint an inventory the way its backend allows cheap re-queries."""
+        fields = None if inventory.source == "resource-graph" else FINGERPRINT_FIELDS
+        return fingerprint_inventory(inventory, fields)
+
+    async def _refresh_inventory(
+        self,
+        controls: List[Dict]
+    ) -> Tuple[ResourceInventory, Dict[str, str], Set[str]]:
+        """
+        Re-query Azure cheaply and refresh the scan inventory.
+
+        Returns:
+            Tuple of (refreshed inventory, new fingerprints, changed types)
+        """
+        previous = self.scan_inventory
+        self.az.forget_account()
+
+        if self.snapshot_inventory is not None:
+            # Compare against the currently loaded snapshot
+            inventory = self.snapshot_inventory
+            fingerprints = self._fingerprint(inventory)
+            return inventory, fingerprints, changed_types(self.scan_fingerprints, fingerprints)
+
+        if previous.source == "resource-graph":
+            # Projected queries are already small: re-run them and diff rows
+            inventory = await self._fetch_inventory(controls, refresh=True)
+            fingerprints = self._fingerprint(inventory)
+            if inventory.source != previous.source:
+                return inventory, fingerprints, set(inventory.types) | set(previous.types)
+            return inventory, fingerprints, changed_types(self.scan_fingerprints, fingerprints)
+
+        # List only ids and change markers, then fetch full payloads for the
+        # changed types that controls actually depend on
+        markers = ResourceInventory(
+            await self.az.collect_json(["resource", "list", "--query", FINGERPRINT_QUERY], refresh=True)
+        )
+        fingerprints = fingerprint_inventory(markers, FINGERPRINT_FIELDS)
+        changed = changed_types(self.scan_fingerprints, fingerprints) & set(controls_by_type(controls))
+
+        changed_list = sorted(changed)
+        compactor = self._compactor(controls)
+        payloads = await asyncio.gather(*(
+            self.az.collect_json(["resource", "list", "--resource-type", t], transform=compactor, refresh=True)
+            for t in changed_list
+        ))
+        inventory = self._compact(previous.replace_types(dict(zip(changed_list, payloads))), controls)
+        return inventory, fingerprints, changed
+
+    async def _get_resource_columns(
+        self,
+        requirement: CompiledRequirement,
+        inventory: Optional[ResourceInventory] = None,
+        executor: Optional[ScopedExecutor] = None
+    ) -> ResourceColumns:
+        """
+        Get resources of a type, from the scan inventory when one is available.
+
+        Live queries are streamed: each resource is trimmed to the properties
+        the requirement checks as it is parsed, and existence-only
+        requirements stop at the first resource.
+        """
+        if inventory is not None:
+            return inventory.columns(requirement.resource_type)
+
+        paths = requirement.paths
+        limit = None if requirement.checks else 1
+        started = time.monotonic()
+        resources = await (executor or self.az).collect_json(
+            ["resource", "list", "--resource-type", requirement.resource_type],
+            limit=limit,
+            transform=lambda resource: project_resource(resource, paths)
+        )
+        self.costs.observe(requirement.resource_type, time.monotonic() - started)
+        # `az resource list` payloads carry no properties
+        return ResourceColumns(resources, truncated=limit is not None and len(resources) >= limit, has_properties=False)
+
+    async def _validate_single_control(
+        self,
+        control: Dict,
+        index: int,
+        inventory: Optional[ResourceInventory] = None,
+        executor: Optional[ScopedExecutor] = None,
+        compiled: Optional[List[CompiledRequirement]] = None
+    ) -> ControlOutcome:
+        """
+        Validate a single control against Azure resources.
+
+        `compiled` reuses requirements compiled once for a fan-out scan.
+        """
         # Check if manual verification is required
         if control.get('manual_verification'):
-            result_text += f"⚠️  **Manual Verification Required**\n"
-            if control.get('notes'):
-                result_text += f"   Note: {control.get('notes')}\n"
-            result_text += "\n❓ **Status**: MANUAL CHECK REQUIRED\n"
-            return result_text
-
-        # Validate Azure resources
-        azure_resources = control.get('azure_resources', [])
-        if not azure_resources:
-            result_text += "⚠️  No Azure resource validations defined\n"
-            return result_text
+            return ControlOutcome.manual(index, control)
 
-        all_passed = True
-        resource_results = []
+        if inventory is None and executor is None:
+            inventory = self.snapshot_inventory
 
-        for resource_req in azure_resources:
-            resource_type = resource_req.get('type')
-            required = resource_req.get('required', False)
-            validations = resource_req.get('validation', [])
-
-            result_text += f"\n🔍 Checking Resource Type: {resource_type}\n"
-
-            # Query Azure for resources using Azure CLI
+        requirements = []
+        for requirement in compiled if compiled is not None else compile_control(control):
+            # Query Azure for resources (scan inventory or Azure CLI)
             try:
-                query = f"az resource list --resource-type {resource_type} --output json"
-                result = subprocess.run(
-                    query.split(),
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-
-                if result.returncode != 0:
-                    if required:
-                        all_passed = False
-                        result_text += f"   ❌ FAILED: Error querying Azure: {result.stderr}\n"
-                    else:
-                        result_text += f"   ⚠️  WARNING: Error querying Azure: {result.stderr}\n"
-                    continue
-
-                resources = json.loads(result.stdout) if result.stdout else []
-
-                if not resources:
-                    if required:
-                        all_passed = False
-                        result_text += f"   ❌ FAILED: No resources found (required)\n"
-                    else:
-                        result_text += f"   ⚠️  WARNING: No resources found (optional)\n"
-                    continue
-
-                result_text += f"   ✅ Found {len(resources)} resource(s)\n"
-
-                # Validate properties if specified
-                if validations:
-                    for validation in validations:
-                        property_path = validation.get('property')
-                        check_type = validation.get('check')
-                        expected_value = validation.get('value')
-
-                        # Simple validation (can be enhanced)
-                        result_text += f"      • Validating: {property_path} ({check_type})\n"
-
-                        # Check first resource (simplified)
-                        if check_type == "exists":
-                            result_text += f"         ✅ Property exists\n"
-                        elif check_type == "equals":
-                            result_text += f"         ℹ️  Expected: {expected_value} (check manually)\n"
-                        else:
-                            result_text += f"         ℹ️  Validation type: {check_type}\n"
-
-            except subprocess.TimeoutExpired:
-                if required:
-                    all_passed = False
-                    result_text += f"   ❌ FAILED: Query timeout\n"
-                else:
-                    result_text += f"   ⚠️  WARNING: Query timeout\n"
+                resources = await self._get_resource_columns(requirement, inventory, executor)
+                requirements.append(evaluate_sampled(requirement, resources, self.sampling))
+            except AzureCliTimeout:
+                requirements.append(RequirementOutcome.from_error(requirement, "Query timeout"))
+            except AzureCliThrottled:
+                requirements.append(RequirementOutcome.from_error(requirement, "Throttled by Azure (HTTP 429), retries exhausted"))
             except Exception as e:
-                if required:
-                    all_passed = False
-                    result_text += f"   ❌ FAILED: {str(e)}\n"
-                else:
-                    result_text += f"   ⚠️  WARNING: {str(e)}\n"
+                requirements.append(RequirementOutcome.from_error(requirement, str(e)))
+
+        return ControlOutcome.from_requirements(index, control, requirements)
+
+    async def _scan_all_controls(
+        self,
+        controls: List[Dict],
+        started: datetime,
+        record: bool = True
+    ) -> Tuple[str, Path, int]:
+        """
+        Validate every control, streaming outcomes to a JSONL file.
+
+        Controls are dispatched by regulation priority and learned cost; the
+        scan stops once validation.stop_after_critical_failures controls of
+        critical regulations have failed. A complete scan is recorded in the
+        history unless `record` is False.
+
+        Returns:
+            Tuple of (inventory notice for the caller's output, stream path,
+            number of controls left unevaluated by an early stop)
+        """
+        self.compliance_results = ComplianceResultStore()
+        self.subscription_results = {}
+        # `az account set` may have switched subscriptions since the last scan
+        self.az.forget_account()
+
+        # Fetch the inventory once and answer every control from it
+        notice = ""
+        inventory = None
+        if self.snapshot_inventory is not None:
+            inventory = self.snapshot_inventory
+            notice = f"📦 Inventory (snapshot {self.snapshot_header.created}): {len(inventory)} resource(s), {len(inventory.types)} type(s)\n\n"
+            self.scan_fingerprints = self._fingerprint(inventory)
+        elif self._azure_settings().get('inventory_scan', True):
+            try:
+                inventory = await self._fetch_inventory(controls)
+                notice = f"📦 Inventory: {len(inventory)} resource(s), {len(inventory.types)} type(s)\n\n"
+                if not inventory.has_properties:
+                    notice += "⚠️  az resource list returns no resource properties: property checks are reported as not evaluated\n\n"
+                self.scan_fingerprints = self._fingerprint(inventory)
+            except Exception as e:
+                self.logger.warning(f"Inventory fetch failed, using per-control queries: {e}")
+                notice = f"⚠️  Inventory fetch failed ({e}); querying Azure per control\n\n"
+
+        validation = (self.agent_config.get('compliance') or {}).get('validation') or {}
+        priorities = self._priorities()
+        stop = CriticalFailureLimit(
+            validation.get('stop_after_critical_failures', 0),
+            {i for i, control in enumerate(controls) if control_priority(control, priorities) == "critical"}
+        )
+
+        # Validate controls concurrently in priority order and stream each
+        # outcome as soon as it completes. Twice the executor's window is
+        # dispatched so queued queries are always ready, while Azure still
+        # sees them in priority order.
+        stream_path = self.reports_dir / f"scan_{started.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        with ResultStreamWriter(stream_path) as stream:
+            stream.start(self.current_checklist_name, len(controls))
+            async for outcome in run_prioritized(
+                self._control_order(controls),
+                lambda i: self._validate_single_control(controls[i], i, inventory),
+                concurrency=lambda: 2 * self.az.limiter.window,
+                stop=stop
+            ):
+                self.compliance_results.add(outcome)
+                stream.write(outcome)
+                self.display_message(outcome)
+            stream.finish(self._summary_counts())
 
-        # Final status
-        result_text += f"\n{'='*40}\n"
-        if all_passed:
-            result_text += "✅ **Status**: PASSED\n"
-        else:
-            result_text += "❌ **Status**: FAILED\n"
-        result_text += f"{'='*40}\n"
+        try:
+            self.costs.save()
+        except OSError as e:
+            self.logger.warning(f"Could not save query costs: {e}")
 
-        return result_text
+        skipped = len(controls) - len(self.compliance_results)
+        self.last_scan_time = datetime.now()
+        if skipped:
+            # A partial scan is neither a baseline for revalidate_changed
+            # nor a point of the history
+            self.scan_inventory = None
+        else:
+            self.scan_inventory = inventory
+            if record:
+                self._record_scan("snapshot" if self.snapshot_inventory is not None else "default")
+        return notice, stream_path, skipped
 
     @tool("validate_all_controls", "Validate all controls in the loaded checklist", {})
     async def validate_all_controls(self, args):
@@ -333,57 +703,312 @@ You prioritize:
             }
 
         controls = self.current_checklist.get('checklist', [])
+        started = datetime.now()
 
         result_text = f"🔍 Validating All Controls ({len(controls)} total)\n"
-        result_text += f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        result_text += f"Started: {started.strftime('%Y-%m-%d %H:%M:%S')}\n"
         result_text += f"{'='*80}\n\n"
 
-        passed = 0
-        failed = 0
-        manual = 0
+        throttled_before = self.az.limiter.throttle_count
+        notice, stream_path, skipped = await self._scan_all_controls(controls, started)
+        result_text += notice
 
-        self.compliance_results = []
+        store = self.compliance_results
+        for outcome in store:
+            # Show brief progress
+            result_text += f"Control #{outcome.index + 1}: {outcome.regulation} - {outcome.requirement}: {outcome.status}\n"
 
-        for i, control in enumerate(controls):
-            validation_result = await self._validate_single_control(control, i)
+        # Summary
+        result_text += f"\n{'='*80}\n"
+        result_text += f"📊 Validation Summary:\n"
+        result_text += f"   ✅ Passed: {store.count(PASSED)}\n"
+        result_text += f"   ❌ Failed: {store.count(FAILED)}\n"
+        result_text += f"   ⚠️  Manual: {store.count(MANUAL)}\n"
+        result_text += f"   📈 Total: {len(store)}\n"
+
+        if len(store) > 0:
+            result_text += f"\n   🎯 Compliance Rate: {store.compliance_rate():.1f}%\n"
+
+        if skipped:
+            validation = (self.agent_config.get('compliance') or {}).get('validation') or {}
+            result_text += (
+                f"\n⏹️  Stopped after {validation.get('stop_after_critical_failures')} critical control failure(s): "
+                f"{skipped} control(s) not evaluated\n"
+            )
 
-            # Determine status
-            if "Manual Verification Required" in validation_result:
-                status = "MANUAL"
-                manual += 1
-            elif "Status**: PASSED" in validation_result:
-                status = "PASSED"
-                passed += 1
-            else:
-                status = "FAILED"
-                failed += 1
-
-            self.compliance_results.append({
-                'index': i,
-                'regulation': control.get('reglementation'),
-                'requirement': control.get('exigence'),
-                'status': status,
-                'details': validation_result
-            })
+        throttled = self.az.limiter.throttle_count - throttled_before
+        if throttled:
+            result_text += f"\n⏳ Azure throttled {throttled} query attempt(s); concurrency adapted to {self.az.limiter.window}\n"
+        result_text += f"\n📝 Results streamed to: {stream_path}\n"
+        result_text += f"\n💡 Use generate_compliance_report to create detailed report\n"
 
-            # Show brief progress
-            result_text += f"Control #{i+1}: {control.get('reglementation')} - {control.get('exigence')}: {status}\n"
+        return {
+            "content": [
+                {"type": "text", "text": result_text}
+            ]
+        }
+
+    async def _revalidate_changed_controls(self, controls: List[Dict]) -> Tuple[Set[str], List[ControlOutcome]]:
+        """
+        Refresh the scan inventory and re-evaluate the controls it affects.
+
+        Returns:
+            Tuple of (changed resource types, re-evaluated outcomes)
+        """
+        inventory, fingerprints, changed = await self._refresh_inventory(controls)
+
+        indexes = dependent_controls(controls, changed)
+        outcomes = await asyncio.gather(*(
+            self._validate_single_control(controls[i], i, inventory) for i in indexes
+        ))
+        for outcome in outcomes:
+            self.compliance_results.add(outcome)
 
+        self.scan_inventory = inventory
+        self.scan_fingerprints = fingerprints
         self.last_scan_time = datetime.now()
+        # An unchanged tenant gives the previous scan again: watch mode would
+        # otherwise fill the history with identical rows every cycle
+        if changed:
+            self._record_scan("snapshot" if self.snapshot_inventory is not None else "default")
+        return changed, list(outcomes)
+
+    @tool("revalidate_changed", "Re-validate only controls whose Azure resources changed since the last scan", {})
+    async def revalidate_changed(self, args):
+        """Re-evaluate controls depending on resource types that changed."""
+        if not self.current_checklist or self.scan_inventory is None:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ No inventory-based scan to compare against. Run validate_all_controls first."}
+                ]
+            }
+
+        controls = self.current_checklist.get('checklist', [])
+        started = datetime.now()
+        previous_status = {outcome.index: outcome for outcome in self.compliance_results}
+
+        try:
+            changed, outcomes = await self._revalidate_changed_controls(controls)
+        except Exception as e:
+            return {
+                "content": [
+                    {"type": "text", "text": f"❌ Error re-querying Azure: {str(e)}"}
+                ]
+            }
+
+        elapsed = (self.last_scan_time - started).total_seconds()
+
+        result_text = f"🔄 Incremental Re-validation ({elapsed:.2f}s)\n\n"
+        if not changed:
+            result_text += "✅ No resource changes detected since the last scan.\n"
+        else:
+            result_text += f"📦 Changed resource types ({len(changed)}):\n"
+            for resource_type in sorted(changed):
+                result_text += f"   • {resource_type}\n"
+            result_text += f"\n🔍 Re-validated controls ({len(outcomes)}/{len(controls)}):\n"
+            for outcome in outcomes:
+                before = previous_status.get(outcome.index)
+                transition = f"{before.status} → {outcome.status}" if before else outcome.status
+                result_text += f"   Control #{outcome.index + 1}: {outcome.regulation} - {outcome.requirement}: {transition}\n"
+
+        store = self.compliance_results
+        result_text += f"\n🎯 Compliance Rate: {store.compliance_rate():.1f}%"
+        result_text += f" (✅ {store.count(PASSED)} / ❌ {store.count(FAILED)} / ⚠️  {store.count(MANUAL)})\n"
+
+        return {
+            "content": [
+                {"type": "text", "text": result_text}
+            ]
+        }
+
+    @tool(
+        "validate_subscriptions",
+        "Validate the loaded checklist across several subscriptions (comma-separated ids or a management group)",
+        {"subscriptions": str, "management_group": str}
+    )
+    async def validate_subscriptions(self, args):
+        """Fan a checklist scan out over many subscriptions and merge the results."""
+        if not self.current_checklist:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ No checklist loaded. Use load_compliance_checklist first."}
+                ]
+            }
+
+        if self.snapshot_inventory is not None:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ Multi-subscription scans query Azure live. Unload the snapshot with load_inventory_snapshot first."}
+                ]
+            }
+
+        subscriptions = parse_subscriptions(args.get("subscriptions"))
+        management_group = (args.get("management_group") or "").strip()
+        if management_group:
+            try:
+                for subscription in await subscriptions_in_management_group(self.az, management_group):
+                    if subscription not in subscriptions:
+                        subscriptions.append(subscription)
+            except Exception as e:
+                return {
+                    "content": [
+                        {"type": "text", "text": f"❌ Error listing subscriptions of {management_group}: {str(e)}"}
+                    ]
+                }
+
+        if not subscriptions:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ No subscriptions to scan. Provide subscription ids or a management group."}
+                ]
+            }
+
+        controls = self.current_checklist.get('checklist', [])
+        azure = self._azure_settings()
+        started = datetime.now()
+
+        # Compile once and share across every subscription
+        compiled = [compile_control(control) for control in controls]
+        workers = asyncio.Semaphore(max(1, int(azure.get('max_parallel_subscriptions', 4))))
+        per_subscription = azure.get('max_queries_per_subscription', 2)
+        errors: Dict[str, str] = {}
+
+        async def scan(subscription: str) -> ComplianceResultStore:
+            async with workers:
+                scope = ScopedExecutor(self.az, subscription=subscription, max_parallel=per_subscription)
+                inventory = None
+                if azure.get('inventory_scan', True):
+                    try:
+                        inventory = await self._fetch_inventory(controls, executor=scope)
+                    except Exception as e:
+                        self.logger.warning(f"Inventory fetch failed for {subscription}: {e}")
+                        errors[subscription] = str(e)
+                outcomes = await asyncio.gather(*(
+                    self._validate_single_control(control, i, inventory, scope, compiled[i])
+                    for i, control in enumerate(controls)
+                ))
+                store = ComplianceResultStore()
+                for outcome in outcomes:
+                    store.add(outcome)
+                self.logger.info(f"Scanned {subscription}: {store.compliance_rate():.1f}% compliant")
+                return store
+
+        stores = await asyncio.gather(*(scan(s) for s in subscriptions))
+        self.subscription_results = dict(zip(subscriptions, stores))
+        self.compliance_results = merge_stores(stores)
+        # Incremental re-validation only tracks single-scope scans
+        self.scan_inventory = None
+        self.scan_fingerprints = {}
+        self.last_scan_time = datetime.now()
+        self._record_scan(f"mg:{management_group}" if management_group else ",".join(subscriptions))
+        elapsed = (self.last_scan_time - started).total_seconds()
+
+        store = self.compliance_results
+        result_text = f"🌐 Multi-Subscription Validation ({len(subscriptions)} subscription(s), {elapsed:.2f}s)\n"
+        if management_group:
+            result_text += f"Management group: {management_group}\n"
+        result_text += f"{'='*80}\n\n"
+
+        result_text += "📋 Per-Subscription Breakdown:\n"
+        for subscription, sub_store in self.subscription_results.items():
+            result_text += (
+                f"   • {subscription}: {sub_store.compliance_rate():.1f}% "
+                f"(✅ {sub_store.count(PASSED)} / ❌ {sub_store.count(FAILED)} / ⚠️  {sub_store.count(MANUAL)})\n"
+            )
+            if subscription in errors:
+                result_text += f"     ⚠️  Inventory fetch failed ({errors[subscription]}); queried per control\n"
 
-        # Summary
         result_text += f"\n{'='*80}\n"
-        result_text += f"📊 Validation Summary:\n"
-        result_text += f"   ✅ Passed: {passed}\n"
-        result_text += f"   ❌ Failed: {failed}\n"
-        result_text += f"   ⚠️  Manual: {manual}\n"
-        result_text += f"   📈 Total: {len(controls)}\n"
+        result_text += "📊 Merged Summary (a control fails if it fails in any subscription):\n"
+        result_text += f"   ✅ Passed: {store.count(PASSED)}\n"
+        result_text += f"   ❌ Failed: {store.count(FAILED)}\n"
+        result_text += f"   ⚠️  Manual: {store.count(MANUAL)}\n"
+        result_text += f"   📈 Total: {len(store)}\n"
+        if len(store) > 0:
+            result_text += f"\n   🎯 Compliance Rate: {store.compliance_rate():.1f}%\n"
 
-        if len(controls) > 0:
-            compliance_rate = (passed / len(controls)) * 100
-            result_text += f"\n   🎯 Compliance Rate: {compliance_rate:.1f}%\n"
+        result_text += f"\n💡 Use generate_compliance_report to create the merged report\n"
 
-        result_text += f"\n💡 Use generate_compliance_report to create detailed report\n"
+        return {
+            "content": [
+                {"type": "text", "text": result_text}
+            ]
+        }
+
+    @tool(
+        "validate_checklists",
+        "Load and validate several checklists in one pass (comma-separated filenames, empty for all)",
+        {"filenames": str}
+    )
+    async def validate_checklists(self, args):
+        """Validate several checklists with one merged query plan."""
+        filenames = [f.strip() for f in (args.get("filenames") or "").split(",") if f.strip()]
+        if not filenames:
+            filenames = sorted(p.name for pattern in ("*.yaml", "*.yml") for p in self.checklists_dir.glob(pattern))
+
+        loaded: Dict[str, Dict] = {}
+        for filename in dict.fromkeys(filenames):
+            path = self.checklists_dir / filename
+            if not path.exists():
+                return {
+                    "content": [
+                        {"type": "text", "text": f"❌ Checklist not found: {filename}\n\nUse list_available_checklists to see available files."}
+                    ]
+                }
+            try:
+                loaded[filename] = self.checklists.load(path)
+            except Exception as e:
+                return {
+                    "content": [
+                        {"type": "text", "text": f"❌ Error loading checklist {filename}: {str(e)}"}
+                    ]
+                }
+
+        if not loaded:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ No checklists found."}
+                ]
+            }
+
+        checklist_set = ChecklistSet.merge(loaded)
+        self.current_checklist = {'checklist': checklist_set.combined()}
+        self.current_checklist_name = " + ".join(loaded)
+        started = datetime.now()
+
+        # One scan of the distinct controls: the inventory is planned from
+        # all of them, so shared types and properties are queried once
+        notice, stream_path, skipped = await self._scan_all_controls(checklist_set.controls, started, record=False)
+        evaluated = list(self.compliance_results)
+        self.checklist_set = checklist_set
+        self.compliance_results = checklist_set.fan_out(evaluated)
+        if self.scan_inventory is not None:
+            self._record_scan("snapshot" if self.snapshot_inventory is not None else "default")
+        elapsed = (datetime.now() - started).total_seconds()
+
+        result_text = f"📚 Multi-Checklist Validation ({len(loaded)} checklist(s), {elapsed:.2f}s)\n"
+        result_text += f"{'='*80}\n\n"
+        result_text += notice
+        result_text += (
+            f"🔗 {checklist_set.total} control(s), {len(checklist_set.controls)} distinct "
+            f"({checklist_set.total - len(checklist_set.controls)} answered by a shared evaluation), "
+            f"{len(controls_by_type(checklist_set.controls))} resource type(s)\n\n"
+        )
+
+        timestamp = started.strftime("%Y%m%d_%H%M%S")
+        result_text += "📋 Per-Checklist Results:\n"
+        for name, store in self._checklist_results().items():
+            report_path = self.reports_dir / f"compliance_report_{Path(name).stem}_{timestamp}.md"
+            report_path.write_text(self._generate_report_content(store, title=name))
+            result_text += (
+                f"   • {name}: {store.compliance_rate():.1f}% "
+                f"(✅ {store.count(PASSED)} / ❌ {store.count(FAILED)} / ⚠️  {store.count(MANUAL)}) → {report_path.name}\n"
+            )
+        if skipped:
+            result_text += f"\n⏹️  Stopped early: {skipped} distinct control(s) not evaluated\n"
+
+        result_text += f"\n📄 Streamed to: {stream_path}\n"
+        result_text += "💡 generate_compliance_report and revalidate_changed now cover every loaded checklist\n"
 
         return {
             "content": [
@@ -391,11 +1016,210 @@ You prioritize:
             ]
         }
 
+    def _checklist_results(self) -> Dict[str, ComplianceResultStore]:
+        """Current results split per checklist after validate_checklists (empty otherwise)."""
+        if self.checklist_set is None:
+            return {}
+        return self.checklist_set.split(self.compliance_results)
+
+    @tool(
+        "validate_distributed",
+        "Validate the loaded checklist with worker processes (controls sharded across workers, or one subscription per shard)",
+        {"workers": int, "subscriptions": str}
+    )
+    async def validate_distributed(self, args):
+        """Shard a scan across worker processes and merge their outcomes."""
+        if not self.current_checklist:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ No checklist loaded. Use load_compliance_checklist first."}
+                ]
+            }
+
+        if self.snapshot_inventory is not None:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ Distributed scans query Azure live. Unload the snapshot with load_inventory_snapshot first."}
+                ]
+            }
+
+        settings = (self.agent_config.get('compliance') or {}).get('distributed') or {}
+        controls = self.current_checklist.get('checklist', [])
+        workers = args.get("workers")
+        if workers is None:
+            workers = settings.get('local_workers') or os.cpu_count() or 1
+        workers = max(0, int(workers))
+        subscriptions = parse_subscriptions(args.get("subscriptions"))
+        started = datetime.now()
+
+        if subscriptions:
+            all_controls = list(range(len(controls)))
+            shards = [Shard(i, all_controls, subscription) for i, subscription in enumerate(subscriptions)]
+        else:
+            count = max(1, workers) * settings.get('shards_per_worker', 2)
+            shards = [Shard(i, indexes) for i, indexes in enumerate(shard_controls(controls, count))]
+
+        authkey = (os.environ.get(AUTHKEY_ENV) or settings.get('authkey') or secrets.token_hex(16)).encode()
+        try:
+            coordinator = ScanCoordinator(
+                controls,
+                shards,
+                authkey,
+                address=parse_address(settings.get('listen', '127.0.0.1:0')),
+                connect_timeout=settings.get('connect_timeout', 60)
+            )
+        except OSError as e:
+            return {
+                "content": [
+                    {"type": "text", "text": f"❌ Cannot listen for workers: {str(e)}"}
+                ]
+            }
+
+        # Local workers run this agent's effective configuration
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(
+                target=run_local_worker,
+                args=(str(self.config_dir), coordinator.address, authkey, self.use_cache, self.agent_config),
+                daemon=True
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        try:
+            shards = await asyncio.to_thread(coordinator.run, lambda shard, outcome: self.display_message(outcome))
+        finally:
+            for process in processes:
+                await asyncio.to_thread(process.join, 5)
+                if process.is_alive():
+                    process.terminate()
+
+        errors = [shard for shard in shards if shard.error]
+        if subscriptions:
+            self.subscription_results = {}
+            for shard in shards:
+                store = ComplianceResultStore()
+                for outcome in shard.outcomes:
+                    store.add(outcome)
+                self.subscription_results[shard.subscription] = store
+            self.compliance_results = merge_stores(self.subscription_results.values())
+        else:
+            self.subscription_results = {}
+            self.compliance_results = ComplianceResultStore()
+            for shard in shards:
+                for outcome in shard.outcomes:
+                    self.compliance_results.add(outcome)
+
+        # Incremental re-validation only tracks single-process scans
+        self.scan_inventory = None
+        self.scan_fingerprints = {}
+        self.last_scan_time = datetime.now()
+        self._record_scan(",".join(subscriptions) if subscriptions else "distributed")
+        elapsed = (self.last_scan_time - started).total_seconds()
+
+        store = self.compliance_results
+        result_text = f"🖧 Distributed Validation ({len(shards)} shard(s), {coordinator.workers_seen} worker(s), {elapsed:.2f}s)\n"
+        result_text += f"Coordinator: {coordinator.address[0]}:{coordinator.address[1]}\n"
+        result_text += f"{'='*80}\n\n"
+
+        if subscriptions:
+            result_text += "📋 Per-Subscription Breakdown:\n"
+            for subscription, sub_store in self.subscription_results.items():
+                result_text += (
+                    f"   • {subscription}: {sub_store.compliance_rate():.1f}% "
+                    f"(✅ {sub_store.count(PASSED)} / ❌ {sub_store.count(FAILED)} / ⚠️  {sub_store.count(MANUAL)})\n"
+                )
+            result_text += "\n"
+
+        if errors:
+            result_text += f"⚠️  {len(errors)} shard(s) not scanned:\n"
+            for shard in errors:
+                scope = shard.subscription or f"controls {', '.join(str(i + 1) for i in shard.indexes)}"
+                result_text += f"   • {scope}: {shard.error}\n"
+            result_text += "\n"
+
+        result_text += f"📊 Validation Summary:\n"
+        result_text += f"   ✅ Passed: {store.count(PASSED)}\n"
+        result_text += f"   ❌ Failed: {store.count(FAILED)}\n"
+        result_text += f"   ⚠️  Manual: {store.count(MANUAL)}\n"
+        result_text += f"   📈 Total: {len(store)}/{len(controls)}\n"
+        if len(store) > 0:
+            result_text += f"\n   🎯 Compliance Rate: {store.compliance_rate():.1f}%\n"
+
+        result_text += f"\n💡 Use generate_compliance_report to create the merged report\n"
+
+        return {
+            "content": [
+                {"type": "text", "text": result_text}
+            ]
+        }
+
+    async def run_worker(self, address: Tuple[str, int], authkey: bytes) -> int:
+        """
+        Scan shards sent by a distributed scan coordinator until it stops.
+
+        Outcomes are sent back one by one as controls complete.
+
+        Returns:
+            Number of shards scanned
+        """
+        conn = Client(address, authkey=authkey)
+        scanned = 0
+        try:
+            hello = await asyncio.to_thread(conn.recv)
+            controls = hello['controls']
+            compiled = [compile_control(control) for control in controls]
+            while True:
+                message = await asyncio.to_thread(conn.recv)
+                if message['type'] != 'shard':
+                    break
+                try:
+                    async for outcome in self._scan_shard(controls, message['indexes'], message['subscription'], compiled):
+                        conn.send({'type': 'outcome', 'outcome': outcome})
+                    conn.send({'type': 'done'})
+                except (EOFError, OSError):
+                    raise
+                except Exception as e:
+                    self.logger.error(f"Shard {message['id']} failed: {e}")
+                    conn.send({'type': 'error', 'error': str(e)})
+                scanned += 1
+        except EOFError:
+            self.logger.warning("Coordinator closed the connection")
+        finally:
+            conn.close()
+        return scanned
+
+    async def _scan_shard(
+        self,
+        controls: List[Dict],
+        indexes: List[int],
+        subscription: Optional[str] = None,
+        compiled: Optional[List[List[CompiledRequirement]]] = None
+    ) -> AsyncIterator[ControlOutcome]:
+        """Validate some controls (optionally in one subscription), yielding outcomes as they complete."""
+        azure = self._azure_settings()
+        scope = None
+        if subscription:
+            scope = ScopedExecutor(self.az, subscription=subscription, max_parallel=azure.get('max_queries_per_subscription', 2))
+
+        inventory = self.snapshot_inventory
+        if inventory is None and azure.get('inventory_scan', True):
+            try:
+                inventory = await self._fetch_inventory([controls[i] for i in indexes], executor=scope)
+            except Exception as e:
+                self.logger.warning(f"Inventory fetch failed, using per-control queries: {e}")
+
+        async for outcome in iter_completed(
+            self._validate_single_control(controls[i], i, inventory, scope, compiled[i] if compiled else None)
+            for i in indexes
+        ):
+            yield outcome
+
     @tool("check_azure_resource", "Check if a specific Azure resource type exists", {"resource_type": str})
     async def check_azure_resource(self, args):
         """Check for specific Azure resources."""
-        import subprocess
-
         resource_type = args.get("resource_type", "")
 
         if not resource_type:
@@ -408,37 +1232,28 @@ You prioritize:
         result_text = f"🔍 Checking Azure Resource Type: {resource_type}\n\n"
 
         try:
-            query = f"az resource list --resource-type {resource_type} --output json"
-            result = subprocess.run(
-                query.split(),
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            if result.returncode != 0:
-                result_text += f"❌ Error: {result.stderr}\n"
+            if self.snapshot_inventory is not None:
+                resources = self.snapshot_inventory.of_type(resource_type)
+                result_text += f"📦 From snapshot ({self.snapshot_header.created})\n"
                 return {
                     "content": [
-                        {"type": "text", "text": result_text}
+                        {"type": "text", "text": result_text + self._render_resource_list(resources)}
                     ]
                 }
 
-            resources = json.loads(result.stdout) if result.stdout else []
-
-            result_text += f"Found: {len(resources)} resource(s)\n\n"
-
-            if resources:
-                for i, resource in enumerate(resources[:5], 1):  # Show first 5
-                    result_text += f"{i}. {resource.get('name')}\n"
-                    result_text += f"   • Location: {resource.get('location')}\n"
-                    result_text += f"   • Resource Group: {resource.get('resourceGroup')}\n"
-                    result_text += f"   • ID: {resource.get('id')}\n\n"
-
-                if len(resources) > 5:
-                    result_text += f"... and {len(resources) - 5} more\n"
-            else:
-                result_text += "No resources found.\n"
+            # Stream the listing: count everything, keep only what is shown
+            shown: List[Dict] = []
+            total = 0
+            self.az.forget_account()
+            stream = self.az.stream_json(["resource", "list", "--resource-type", resource_type])
+            try:
+                async for resource in stream:
+                    total += 1
+                    if len(shown) < 5:
+                        shown.append(project_resource(resource, ()))
+            finally:
+                await stream.aclose()
+            result_text += self._render_resource_list(shown, total)
 
             return {
                 "content": [
@@ -446,7 +1261,7 @@ You prioritize:
                 ]
             }
 
-        except subprocess.TimeoutExpired:
+        except AzureCliTimeout:
             return {
                 "content": [
                     {"type": "text", "text": "❌ Query timeout"}
@@ -459,6 +1274,23 @@ You prioritize:
                 ]
             }
 
+    def _render_resource_list(self, resources: List[Dict], total: Optional[int] = None) -> str:
+        """Render the first resources of a check_azure_resource result."""
+        total = len(resources) if total is None else total
+        text = f"Found: {total} resource(s)\n\n"
+        if not total:
+            return text + "No resources found.\n"
+
+        for i, resource in enumerate(resources[:5], 1):  # Show first 5
+            text += f"{i}. {resource.get('name')}\n"
+            text += f"   • Location: {resource.get('location')}\n"
+            text += f"   • Resource Group: {resource.get('resourceGroup')}\n"
+            text += f"   • ID: {resource.get('id')}\n\n"
+
+        if total > 5:
+            text += f"... and {total - 5} more\n"
+        return text
+
     @tool("generate_compliance_report", "Generate detailed compliance report", {})
     async def generate_compliance_report(self, args):
         """Generate a detailed compliance report."""
@@ -485,14 +1317,11 @@ You prioritize:
         result_text += f"📊 Controls: {len(self.compliance_results)}\n\n"
 
         # Summary statistics
-        passed = sum(1 for r in self.compliance_results if r['status'] == 'PASSED')
-        failed = sum(1 for r in self.compliance_results if r['status'] == 'FAILED')
-        manual = sum(1 for r in self.compliance_results if r['status'] == 'MANUAL')
-
+        store = self.compliance_results
         result_text += f"Summary:\n"
-        result_text += f"   ✅ Passed: {passed}\n"
-        result_text += f"   ❌ Failed: {failed}\n"
-        result_text += f"   ⚠️  Manual: {manual}\n"
+        result_text += f"   ✅ Passed: {store.count(PASSED)}\n"
+        result_text += f"   ❌ Failed: {store.count(FAILED)}\n"
+        result_text += f"   ⚠️  Manual: {store.count(MANUAL)}\n"
 
         return {
             "content": [
@@ -500,45 +1329,72 @@ You prioritize:
             ]
         }
 
-    def _generate_report_content(self) -> str:
-        """Generate markdown report content."""
-        report = f"# Azure Compliance Report\n\n"
+    def _generate_report_content(
+        self,
+        store: Optional[ComplianceResultStore] = None,
+        title: Optional[str] = None
+    ) -> str:
+        """
+        Generate markdown report content.
+
+        Reports the current results unless `store` gives the results of one
+        checklist, in which case breakdowns are left out.
+        """
+        report = f"# Azure Compliance Report{f' — {title}' if title else ''}\n\n"
         report += f"**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
 
         # Executive Summary
-        passed = sum(1 for r in self.compliance_results if r['status'] == 'PASSED')
-        failed = sum(1 for r in self.compliance_results if r['status'] == 'FAILED')
-        manual = sum(1 for r in self.compliance_results if r['status'] == 'MANUAL')
-        total = len(self.compliance_results)
+        breakdowns = store is None
+        store = self.compliance_results if store is None else store
+        passed = store.count(PASSED)
+        failed = store.count(FAILED)
+        manual = store.count(MANUAL)
+        total = len(store)
 
         report += "## Executive Summary\n\n"
         report += f"- **Total Controls**: {total}\n"
-        report += f"- **Passed**: {passed} ({(passed/total*100):.1f}%)\n"
-        report += f"- **Failed**: {failed} ({(failed/total*100):.1f}%)\n"
-        report += f"- **Manual Review**: {manual} ({(manual/total*100):.1f}%)\n\n"
-
-        # Group by regulation
-        by_regulation = defaultdict(list)
-        for result in self.compliance_results:
-            by_regulation[result['regulation']].append(result)
+        # A checklist cut short by an early stop can have no results at all
+        report += f"- **Passed**: {passed} ({((passed / total * 100) if total else 0.0):.1f}%)\n"
+        report += f"- **Failed**: {failed} ({((failed / total * 100) if total else 0.0):.1f}%)\n"
+        report += f"- **Manual Review**: {manual} ({((manual / total * 100) if total else 0.0):.1f}%)\n\n"
+
+        checklist_results = self._checklist_results() if breakdowns else {}
+        if checklist_results:
+            report += "## Per-Checklist Breakdown\n\n"
+            report += "| Checklist | Compliance | Passed | Failed | Manual |\n"
+            report += "|-----------|------------|--------|--------|--------|\n"
+            for name, checklist_store in checklist_results.items():
+                report += (
+                    f"| {name} | {checklist_store.compliance_rate():.1f}% | {checklist_store.count(PASSED)} "
+                    f"| {checklist_store.count(FAILED)} | {checklist_store.count(MANUAL)} |\n"
+                )
+            report += "\n"
+
+        if breakdowns and self.subscription_results:
+            report += "## Per-Subscription Breakdown\n\n"
+            report += "| Subscription | Compliance | Passed | Failed | Manual |\n"
+            report += "|--------------|------------|--------|--------|--------|\n"
+            for subscription, sub_store in self.subscription_results.items():
+                report += (
+                    f"| {subscription} | {sub_store.compliance_rate():.1f}% | {sub_store.count(PASSED)} "
+                    f"| {sub_store.count(FAILED)} | {sub_store.count(MANUAL)} |\n"
+                )
+            report += "\n"
 
         report += "## Compliance by Regulation\n\n"
-        for regulation, results in sorted(by_regulation.items()):
-            reg_passed = sum(1 for r in results if r['status'] == 'PASSED')
-            reg_total = len(results)
+        for regulation in store.regulations:
             report += f"### {regulation}\n\n"
-            report += f"- **Compliance Rate**: {(reg_passed/reg_total*100):.1f}%\n"
-            report += f"- **Passed**: {reg_passed}/{reg_total}\n\n"
+            report += f"- **Compliance Rate**: {store.compliance_rate(regulation):.1f}%\n"
+            report += f"- **Passed**: {store.count(PASSED, regulation)}/{store.count(regulation=regulation)}\n\n"
 
         # Detailed Results
         report += "## Detailed Results\n\n"
-        for result in self.compliance_results:
-            status_icon = "✅" if result['status'] == 'PASSED' else ("❌" if result['status'] == 'FAILED' else "⚠️")
-            report += f"### {status_icon} Control #{result['index'] + 1}: {result['requirement']}\n\n"
-            report += f"**Regulation**: {result['regulation']}\n\n"
-            report += f"**Status**: {result['status']}\n\n"
+        for outcome in store:
+            report += f"### {STATUS_ICONS[outcome.status]} Control #{outcome.index + 1}: {outcome.requirement}\n\n"
+            report += f"**Regulation**: {outcome.regulation}\n\n"
+            report += f"**Status**: {outcome.status}\n\n"
             report += "```\n"
-            report += result['details']
+            report += render_control(outcome)
             report += "\n```\n\n"
             report += "---\n\n"
 
@@ -554,33 +1410,28 @@ You prioritize:
                 ]
             }
 
-        # Group by regulation
-        by_regulation = defaultdict(lambda: {'passed': 0, 'failed': 0, 'manual': 0})
-
-        for result in self.compliance_results:
-            regulation = result['regulation']
-            status = result['status']
-
-            if status == 'PASSED':
-                by_regulation[regulation]['passed'] += 1
-            elif status == 'FAILED':
-                by_regulation[regulation]['failed'] += 1
-            else:
-                by_regulation[regulation]['manual'] += 1
-
+        store = self.compliance_results
         summary_text = "📊 Compliance Summary by Regulation\n\n"
 
-        for regulation in sorted(by_regulation.keys()):
-            stats = by_regulation[regulation]
-            total = stats['passed'] + stats['failed'] + stats['manual']
-            compliance_rate = (stats['passed'] / total * 100) if total > 0 else 0
-
+        for regulation in store.regulations:
             summary_text += f"🏛️  **{regulation}**\n"
-            summary_text += f"   • Compliance Rate: {compliance_rate:.1f}%\n"
-            summary_text += f"   • Passed: {stats['passed']}\n"
-            summary_text += f"   • Failed: {stats['failed']}\n"
-            summary_text += f"   • Manual: {stats['manual']}\n"
-            summary_text += f"   • Total: {total}\n\n"
+            summary_text += f"   • Compliance Rate: {store.compliance_rate(regulation):.1f}%\n"
+            summary_text += f"   • Passed: {store.count(PASSED, regulation)}\n"
+            summary_text += f"   • Failed: {store.count(FAILED, regulation)}\n"
+            summary_text += f"   • Manual: {store.count(MANUAL, regulation)}\n"
+            summary_text += f"   • Total: {store.count(regulation=regulation)}\n\n"
+
+        checklist_results = self._checklist_results()
+        if checklist_results:
+            summary_text += "📚 **By Checklist**\n"
+            for name, checklist_store in checklist_results.items():
+                summary_text += f"   • {name}: {checklist_store.compliance_rate():.1f}% ({checklist_store.count(FAILED)} failed)\n"
+            summary_text += "\n"
+
+        if self.subscription_results:
+            summary_text += "🌐 **By Subscription**\n"
+            for subscription, sub_store in self.subscription_results.items():
+                summary_text += f"   • {subscription}: {sub_store.compliance_rate():.1f}% ({sub_store.count(FAILED)} failed)\n"
 
         return {
             "content": [
@@ -598,7 +1449,7 @@ You prioritize:
                 ]
             }
 
-        failed_controls = [r for r in self.compliance_results if r['status'] == 'FAILED']
+        failed_controls = self.compliance_results.select(FAILED)
 
         if not failed_controls:
             return {
@@ -609,9 +1460,12 @@ You prioritize:
 
         remediation_text = f"🔧 Remediation Plan ({len(failed_controls)} Failed Controls)\n\n"
 
-        for i, result in enumerate(failed_controls, 1):
-            remediation_text += f"{i}. **{result['regulation']}**: {result['requirement']}\n"
+        for i, outcome in enumerate(failed_controls, 1):
+            remediation_text += f"{i}. **{outcome.regulation}**: {outcome.requirement}\n"
             remediation_text += f"   Priority: HIGH\n"
+            blocking = [r.resource_type for r in outcome.requirements if r.blocking]
+            if blocking:
+                remediation_text += f"   Resources: {', '.join(blocking)}\n"
             remediation_text += f"   Action: Review control details and implement required Azure resources\n\n"
 
         remediation_text += "\n💡 Recommended Actions:\n"
@@ -627,6 +1481,22 @@ You prioritize:
             ]
         }
 
+    def _audit_records(self, generated: str) -> Dict[str, Any]:
+        """JSON audit report payload of the current results."""
+        return {
+            'generated': generated,
+            'total_controls': len(self.compliance_results),
+            'results': self.compliance_results.to_records(),
+            'subscriptions': {
+                subscription: sub_store.to_records()
+                for subscription, sub_store in self.subscription_results.items()
+            },
+            'checklists': {
+                name: checklist_store.to_records()
+                for name, checklist_store in self._checklist_results().items()
+            }
+        }
+
     @tool("export_audit_report", "Export audit report in specified format", {"format": str})
     async def export_audit_report(self, args):
         """Export audit report."""
@@ -646,11 +1516,7 @@ You prioritize:
             content = self._generate_report_content()
         elif output_format == "json":
             filename = f"audit_report_{timestamp}.json"
-            content = json.dumps({
-                'generated': timestamp,
-                'total_controls': len(self.compliance_results),
-                'results': self.compliance_results
-            }, indent=2)
+            content = json.dumps(self._audit_records(timestamp), indent=2, default=str)
         else:
             return {
                 "content": [
@@ -673,6 +1539,232 @@ You prioritize:
             ]
         }
 
+    @tool(
+        "export_inventory_snapshot",
+        "Capture the Azure inventory used by the loaded checklist into a compressed snapshot file",
+        {"filename": str}
+    )
+    async def export_inventory_snapshot(self, args):
+        """Export the scan inventory to a gzip-compressed JSON Lines snapshot."""
+        path = self._snapshot_path(args.get("filename") or f"inventory_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.az.forget_account()
+
+        try:
+            if self.current_checklist:
+                inventory = await self._fetch_inventory(
+                    self.current_checklist.get('checklist', []), refresh=True, compact=False
+                )
+            else:
+                # Without a checklist there is no query plan: capture every resource
+                inventory = ResourceInventory(await self.az.collect_json(["resource", "list"], refresh=True))
+            subscription, tenant = await self.az.account_context()
+            header = write_snapshot(inventory, path, metadata={
+                'subscription': subscription,
+                'tenant': tenant,
+                'checklist': self.current_checklist_name,
+            })
+        except Exception as e:
+            return {
+                "content": [
+                    {"type": "text", "text": f"❌ Error exporting snapshot: {str(e)}"}
+                ]
+            }
+
+        result_text = f"✅ Inventory snapshot exported:\n\n"
+        result_text += f"📄 File: {path}\n"
+        result_text += f"📦 Resources: {header.resources} ({len(header.types)} type(s), source: {header.source})\n"
+        result_text += f"💾 Size: {path.stat().st_size / 1024:.1f} KiB\n"
+        if header.projection is not None:
+            result_text += "🔎 Resource Graph projection: only the checklist's resource types and properties are captured\n"
+        result_text += "\n💡 Use load_inventory_snapshot to validate against it offline\n"
+
+        return {
+            "content": [
+                {"type": "text", "text": result_text}
+            ]
+        }
+
+    @tool(
+        "load_inventory_snapshot",
+        "Scan against an inventory snapshot instead of live Azure (empty filename returns to live queries)",
+        {"filename": str}
+    )
+    async def load_inventory_snapshot(self, args):
+        """Switch scans to an offline snapshot, or back to live Azure queries."""
+        filename = (args.get("filename") or "").strip()
+        if not filename:
+            self.snapshot_inventory = None
+            self.snapshot_header = None
+            return {
+                "content": [
+                    {"type": "text", "text": "✅ Snapshot unloaded. Scans query Azure live again."}
+                ]
+            }
+
+        path = self._snapshot_path(filename)
+        if not path.exists():
+            return {
+                "content": [
+                    {"type": "text", "text": f"❌ Snapshot not found: {path}"}
+                ]
+            }
+
+        try:
+            self.snapshot_header, self.snapshot_inventory = read_snapshot(path)
+        except Exception as e:
+            return {
+                "content": [
+                    {"type": "text", "text": f"❌ Error loading snapshot: {str(e)}"}
+                ]
+            }
+
+        header = self.snapshot_header
+        result_text = f"✅ Loaded Snapshot: {path.name}\n\n"
+        result_text += f"📅 Captured: {header.created}\n"
+        result_text += f"📦 Resources: {header.resources} ({len(header.types)} type(s), source: {header.source})\n"
+        for key, value in header.metadata.items():
+            if value:
+                result_text += f"   • {key}: {value}\n"
+        if header.projection is not None:
+            result_text += (
+                f"\n⚠️  Projected snapshot: only {len(header.projection)} resource type(s) and their checked "
+                "properties were captured; requirements needing anything else are reported as not evaluated\n"
+            )
+        result_text += "\n💡 validate_all_controls now runs offline with no Azure CLI calls\n"
+
+        return {
+            "content": [
+                {"type": "text", "text": result_text}
+            ]
+        }
+
+    def _snapshot_path(self, filename: str) -> Path:
+        """Resolve a snapshot name relative to the snapshots directory."""
+        path = Path(filename)
+        if not path.name.endswith(SNAPSHOT_SUFFIX):
+            path = path.with_name(path.name + SNAPSHOT_SUFFIX)
+        return path if path.is_absolute() else self.snapshots_dir / path
+
+    @tool(
+        "get_compliance_trend",
+        "Show the compliance rate over recent scans, overall or for one regulation (empty for all)",
+        {"regulation": str, "scans": int}
+    )
+    async def get_compliance_trend(self, args):
+        """Show compliance rates from the scan history."""
+        if self.history is None:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ Scan history is disabled (compliance.history.enabled)."}
+                ]
+            }
+
+        limit = args.get("scans") or 30
+        regulation = self._match_regulation((args.get("regulation") or "").strip())
+        if regulation is None:
+            known = ", ".join(self.history.regulations()) or "none recorded"
+            return {
+                "content": [
+                    {"type": "text", "text": f"❌ Unknown regulation: {args.get('regulation')}\n\nKnown regulations: {known}"}
+                ]
+            }
+
+        points = self.history.trend(regulation or None, limit)
+        if not points:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ No scans recorded yet. Run validate_all_controls first."}
+                ]
+            }
+
+        label = regulation or "All regulations"
+        result_text = f"📈 Compliance Trend: {label} (last {len(points)} scan(s))\n\n"
+        for point in points:
+            bar = "█" * round(point.compliance_rate / 5)
+            result_text += (
+                f"   #{point.scan_id:<5} {point.scan_time}  {point.compliance_rate:5.1f}%  "
+                f"{bar} ({point.passed}/{point.total})\n"
+            )
+
+        first, last = points[0].compliance_rate, points[-1].compliance_rate
+        delta = last - first
+        icon = "📈" if delta > 0 else ("📉" if delta < 0 else "➡️")
+        result_text += f"\n{icon} Change over period: {delta:+.1f} points\n"
+
+        return {
+            "content": [
+                {"type": "text", "text": result_text}
+            ]
+        }
+
+    @tool(
+        "diff_scans",
+        "Compare two recorded scans (0 for from_scan/to_scan means the previous/latest scan)",
+        {"from_scan": int, "to_scan": int}
+    )
+    async def diff_scans(self, args):
+        """List controls that started failing or passing between two scans."""
+        if self.history is None:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ Scan history is disabled (compliance.history.enabled)."}
+                ]
+            }
+
+        to_scan = args.get("to_scan") or self.history.latest_id()
+        from_scan = args.get("from_scan") or (self.history.previous_id(to_scan) if to_scan else None)
+        if not from_scan or not to_scan:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ At least two recorded scans are needed to compute a diff."}
+                ]
+            }
+
+        diff = self.history.diff(from_scan, to_scan)
+        if diff is None:
+            return {
+                "content": [
+                    {"type": "text", "text": f"❌ Unknown scan id (from {from_scan}, to {to_scan})."}
+                ]
+            }
+
+        result_text = f"🔀 Scan Diff: #{diff.old.id} ({diff.old.scan_time}) → #{diff.new.id} ({diff.new.scan_time})\n\n"
+        result_text += f"🎯 Compliance Rate: {diff.old.compliance_rate:.1f}% → {diff.new.compliance_rate:.1f}%\n\n"
+
+        sections = [
+            ("❌ Newly failing", diff.newly_failing),
+            ("✅ Newly passing", diff.newly_passing),
+            ("🔄 Other changes", diff.other_changes),
+        ]
+        for title, changes in sections:
+            result_text += f"{title} ({len(changes)}):\n"
+            for change in changes:
+                result_text += (
+                    f"   Control #{change.control_index + 1}: {change.regulation} - {change.requirement}: "
+                    f"{change.before or 'ABSENT'} → {change.after or 'REMOVED'}\n"
+                )
+            result_text += "\n"
+        result_text += f"➖ Unchanged: {diff.unchanged}\n"
+
+        return {
+            "content": [
+                {"type": "text", "text": result_text}
+            ]
+        }
+
+    def _match_regulation(self, name: str) -> Optional[str]:
+        """Resolve a regulation name loosely ("dora" -> "DORA (2025)"); "" means all."""
+        if not name:
+            return ""
+        regulations = self.history.regulations()
+        folded = name.casefold()
+        for regulation in regulations:
+            if regulation.casefold() == folded:
+                return regulation
+        matches = [r for r in regulations if r.casefold().startswith(folded)] or \
+            [r for r in regulations if folded in r.casefold()]
+        return matches[0] if matches else None
+
     @tool("validate_custom_control", "Validate a custom control defined inline", {"control_yaml": str})
     async def validate_custom_control(self, args):
         """Validate a custom control provided as YAML."""
@@ -687,11 +1779,12 @@ You prioritize:
 
         try:
             control = yaml.safe_load(control_yaml)
-            result = await self._validate_single_control(control, 0)
+            self.az.forget_account()
+            outcome = await self._validate_single_control(control, 0)
 
             return {
                 "content": [
-                    {"type": "text", "text": result}
+                    {"type": "text", "text": render_control(outcome)}
                 ]
             }
         except Exception as e:
@@ -701,11 +1794,294 @@ You prioritize:
                 ]
             }
 
+    @tool(
+        "validate_custom_controls",
+        "Validate a batch of custom controls: a YAML list, or a path to a YAML file or directory of control files",
+        {"controls_yaml": str, "path": str}
+    )
+    async def validate_custom_controls(self, args):
+        """Validate many custom controls against one shared inventory."""
+        controls_yaml = args.get("controls_yaml") or None
+        path = args.get("path") or None
+        if not controls_yaml and not path:
+            return {
+                "content": [
+                    {"type": "text", "text": "❌ controls_yaml or path parameter required"}
+                ]
+            }
+
+        if path is not None:
+            path = Path(path).expanduser()
+            if not path.is_absolute():
+                path = self.config_dir / path
+        try:
+            entries = load_batch(controls_yaml, path)
+        except ValueError as e:
+            return {
+                "content": [
+                    {"type": "text", "text": f"❌ Could not read controls: {e}"}
+                ]
+            }
+
+        valid = {i: entry.control for i, entry in enumerate(entries) if entry.control is not None}
+        controls = list(valid.values())
+        compiled = {i: compile_control(control) for i, control in valid.items()}
+        types = controls_by_type(controls)
+        started = time.monotonic()
+
+        # One query per distinct resource type of the whole batch
+        try:
+            self.az.forget_account()
+            inventory = await self._fetch_batch_inventory(controls, sorted(types))
+        except Exception as e:
+            self.logger.warning(f"Batch inventory fetch failed, using per-control queries: {e}")
+            inventory = None
+
+        outcomes = dict(zip(valid, await asyncio.gather(*(
+            self._validate_single_control(control, i, inventory, compiled=compiled[i])
+            for i, control in valid.items()
+        ))))
+
+        counts = {status: 0 for status in STATUS_ICONS}
+        for outcome in outcomes.values():
+            counts[outcome.status] += 1
+        invalid = len(entries) - len(valid)
+
+        result_text = f"🧪 Custom Control Batch ({len(entries)} control(s))\n\n"
+        result_text += (
+            f"   • {len(types)} distinct resource type(s) queried once for {len(controls)} control(s)"
+            f" in {time.monotonic() - started:.1f}s\n"
+        )
+        result_text += f"   • ✅ Passed: {counts[PASSED]}  ❌ Failed: {counts[FAILED]}  ⚠️ Manual: {counts[MANUAL]}"
+        result_text += f"  ⛔ Invalid: {invalid}\n\n" if invalid else "\n\n"
+        result_text += render_batch_table(entries, outcomes)
+
+        return {
+            "content": [
+                {"type": "text", "text": result_text}
+            ]
+        }
+
+    async def _fetch_batch_inventory(self, controls: List[Dict], types: List[str]) -> Optional[ResourceInventory]:
+        """Inventory of the given resource types: the loaded snapshot, a Resource Graph plan, or one list per type."""
+        if self.snapshot_inventory is not None:
+            return self.snapshot_inventory
+        if not types:
+            return None
+        if self._azure_settings().get('use_resource_graph', False):
+            return await self._fetch_inventory(controls)
+
+        compactor = self._compactor(controls)
+
+        async def list_type(resource_type: str) -> List[Dict]:
+            started = time.monotonic()
+            resources = await self.az.collect_json(["resource", "list", "--resource-type", resource_type], transform=compactor)
+            self.costs.observe(resource_type, time.monotonic() - started)
+            return resources
+
+        payloads = await asyncio.gather(*(list_type(t) for t in types))
+        return ResourceInventory(r for payload in payloads for r in payload)
+
+    @tool("invalidate_cache", "Invalidate cached Azure query results (optionally for one resource type)", {"resource_type": str})
+    async def invalidate_cache(self, args):
+        """Drop cached Azure CLI responses."""
+        if self.az.cache is None:
+            return {
+                "content": [
+                    {"type": "text", "text": "ℹ️  Query cache is disabled (--no-cache or compliance.cache.enabled: false)."}
+                ]
+            }
+
+        resource_type = args.get("resource_type") or None
+        removed = self.az.cache.invalidate(resource_type)
+        scope = resource_type or "all resource types"
+        stats = self.az.cache.stats()
+
+        result_text = f"🧹 Cache invalidated for {scope}\n\n"
+        result_text += f"   • Entries removed: {removed}\n"
+        result_text += f"   • Entries remaining: {stats['entries']}\n"
+
+        return {
+            "content": [
+                {"type": "text", "text": result_text}
+            ]
+        }
+
+    async def run_watch(self, checklist: str, interval: float, iterations: Optional[int] = None) -> None:
+        """
+        Rescan a checklist on a schedule without an interactive session.
+
+        The first cycle is a full scan; later cycles re-query Azure for
+        inventory fingerprints and re-evaluate only controls whose resource
+        types changed (falling back to a full scan when there is no
+        inventory to compare against). Each cycle writes rolling reports
+        and a status file under the watch output directory.
+
+        Args:
+            checklist: Checklist filename in the checklists directory
+            interval: Seconds between the start of two cycles
+            iterations: Number of cycles to run (None runs until interrupted)
+        """
+        checklist_path = self.checklists_dir / checklist
+        self.current_checklist = self.checklists.load(checklist_path)
+        self.current_checklist_name = checklist
+        self.checklist_set = None
+        controls = self.current_checklist.get('checklist', [])
+
+        settings = (self.agent_config.get('compliance') or {}).get('watch') or {}
+        output = WatchOutput(
+            self.config_dir / settings.get('path', 'reports/watch'),
+            keep=settings.get('keep_reports', 24)
+        )
+        self.logger.info(f"Watching {checklist} every {interval}s, output in {output.directory}")
+
+        cycle = 0
+        while iterations is None or cycle < iterations:
+            cycle += 1
+            started = datetime.now()
+            before = {outcome.index: outcome.status for outcome in self.compliance_results}
+            status: Dict[str, Any] = {
+                'checklist': checklist,
+                'cycle': cycle,
+                'started': started.isoformat(timespec='seconds'),
+            }
+
+            try:
+                if self.scan_inventory is None:
+                    await self._scan_all_controls(controls, started)
+                    status['mode'] = 'full'
+                    status['changed_types'] = []
+                    status['revalidated'] = len(controls)
+                else:
+                    changed, outcomes = await self._revalidate_changed_controls(controls)
+                    status['mode'] = 'incremental'
+                    status['changed_types'] = sorted(changed)
+                    status['revalidated'] = len(outcomes)
+
+                transitions = status_transitions(before, self.compliance_results)
+                json_path, markdown_path = output.write_reports(
+                    self._generate_report_content(),
+                    self._audit_records(started.strftime("%Y%m%d_%H%M%S")),
+                    started
+                )
+                status.update({
+                    'state': STATE_DRIFT if transitions['newly_failing'] else STATE_OK,
+                    'scan_id': self.last_scan_id,
+                    'summary': self._summary_counts(),
+                    'newly_failing': [self._control_ref(i) for i in transitions['newly_failing']],
+                    'newly_passing': [self._control_ref(i) for i in transitions['newly_passing']],
+                    'reports': {'json': json_path.name, 'markdown': markdown_path.name},
+                })
+            except Exception as e:
+                self.logger.error(f"Watch cycle {cycle} failed: {e}")
+                status.update({'state': STATE_ERROR, 'error': str(e)})
+
+            finished = datetime.now()
+            more = iterations is None or cycle < iterations
+            delay = max(0.0, interval - (finished - started).total_seconds())
+            status['finished'] = finished.isoformat(timespec='seconds')
+            status['duration_seconds'] = round((finished - started).total_seconds(), 2)
+            status['next_scan'] = (
+                (finished + timedelta(seconds=delay)).isoformat(timespec='seconds') if more else None
+            )
+            output.write_status(status)
+            print(self._watch_line(status))
+
+            if more:
+                await asyncio.sleep(delay)
+
+    def _control_ref(self, index: int) -> Dict[str, Any]:
+        """Short reference to a control for machine-readable output."""
+        outcome = self.compliance_results.get(index)
+        return {'control': index + 1, 'regulation': outcome.regulation, 'requirement': outcome.requirement}
+
+    def _watch_line(self, status: Dict[str, Any]) -> str:
+        """One-line console summary of a watch cycle."""
+        prefix = f"[{status['finished']}] cycle {status['cycle']}"
+        if status['state'] == STATE_ERROR:
+            return f"❌ {prefix}: {status['error']}"
+        summary = status['summary']
+        icon = "🚨" if status['state'] == STATE_DRIFT else "✅"
+        line = (
+            f"{icon} {prefix} ({status['mode']}, {status['revalidated']} control(s) re-evaluated): "
+            f"{summary['compliance_rate']:.1f}% compliant"
+        )
+        if status['newly_failing']:
+            line += f", {len(status['newly_failing'])} newly failing"
+        return line
+
+
+def run_local_worker(
+    config_dir: str,
+    address: Tuple[str, int],
+    authkey: bytes,
+    use_cache: bool,
+    agent_config: Dict[str, Any]
+) -> None:
+    """
+    Entry point of the worker processes started by validate_distributed.
+
+    The worker runs with the coordinator's configuration rather than what
+    config.yaml holds now, and never records scans in the history: the
+    coordinator records the merged results.
+    """
+    compliance = dict(agent_config.get('compliance') or {})
+    compliance['history'] = dict(compliance.get('history') or {}, enabled=False)
+    agent = AzureComplianceAgent(
+        Path(config_dir), use_cache=use_cache, agent_config=dict(agent_config, compliance=compliance)
+    )
+    asyncio.run(agent.run_worker(address, authkey))
+
 
 async def main():
     """
     Main entry point for the Azure Compliance Checker agent.
     """
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Azure Compliance Checker Agent",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+    Examples:
+    python agent.py              # Run with the persistent query cache (default)
+    python agent.py --no-cache   # Always query Azure live
+    python agent.py --snapshot snapshots/prod.jsonl.gz  # Scan an offline snapshot
+    python agent.py --watch french-fsi-regulations.yaml --interval 900  # Headless drift detection
+    COMPLIANCE_WORKER_AUTHKEY=... python agent.py --worker coordinator:7070  # Distributed scan worker
+        """
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Disable the persistent Azure query cache for this session'
+    )
+    parser.add_argument(
+        '--snapshot',
+        type=Path,
+        help='Validate against an inventory snapshot instead of live Azure'
+    )
+    parser.add_argument(
+        '--watch',
+        metavar='CHECKLIST',
+        help='Rescan a checklist on a schedule without an interactive session'
+    )
+    parser.add_argument(
+        '--interval',
+        type=float,
+        help='Seconds between watch cycles (default: compliance.watch.interval)'
+    )
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        help='Stop watching after this many cycles'
+    )
+    parser.add_argument(
+        '--worker',
+        metavar='HOST:PORT',
+        help=f'Serve shards of a distributed scan coordinator (authkey from ${AUTHKEY_ENV})'
+    )
+    args = parser.parse_args()
+
     config_dir = Path(__file__).parent
 
     # Set up logging
@@ -718,7 +2094,24 @@ async def main():
     )
 
     # Create and run the agent
-    agent = AzureComplianceAgent(config_dir)
+    agent = AzureComplianceAgent(config_dir, use_cache=not args.no_cache, snapshot=args.snapshot)
+
+    if args.worker:
+        settings = (agent.agent_config.get('compliance') or {}).get('distributed') or {}
+        authkey = os.environ.get(AUTHKEY_ENV) or settings.get('authkey')
+        if not authkey:
+            print(f"❌ Set {AUTHKEY_ENV} to the coordinator's authkey")
+            return
+        scanned = await agent.run_worker(parse_address(args.worker), authkey.encode())
+        print(f"✅ Worker finished: {scanned} shard(s) scanned")
+        return
+
+    if args.watch:
+        settings = (agent.agent_config.get('compliance') or {}).get('watch') or {}
+        interval = args.interval or settings.get('interval', 900)
+        print(f"👀 Watching {args.watch} every {interval:g}s (Ctrl+C to stop)")
+        await agent.run_watch(args.watch, interval, args.iterations)
+        return
 
     print("\n" + "="*80)
     print("  📋 AZURE COMPLIANCE CHECKER AGENT")
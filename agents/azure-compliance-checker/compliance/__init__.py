@@ -0,0 +1,13 @@
+"""
+Scan engine for the Azure Compliance Checker agent.
+
+These modules hold the Azure querying and control evaluation logic so that the
+agent's tools stay thin and the engine can be exercised without a Claude
+session.
+"""
+
+from .inventory import ResourceInventory
+
+__all__ = [
+    "ResourceInventory",
+]
@@ -0,0 +1,144 @@
+"""
+Batch validation of ad-hoc controls.
+
+A batch is a YAML list of controls (or a `checklist:` document), or a
+directory of such files. Controls are checked for shape and compiled once,
+the distinct resource types of the whole batch are queried once each, and
+every control is evaluated against that shared inventory. Results come
+back as one compact table instead of a full report per control.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from .report import STATUS_ICONS
+from .results import FAILED, ControlOutcome, RequirementOutcome
+
+CONTROL_SUFFIXES = (".yaml", ".yml")
+
+# Longest control description kept in the table
+MAX_LABEL_LENGTH = 60
+
+
+@dataclass
+class BatchEntry:
+    """A control of a batch, or the reason it could not be read."""
+
+    source: str
+    control: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def parse_batch(data: Any, source: str) -> List[BatchEntry]:
+    """
+    Split a parsed YAML document into batch entries.
+
+    Accepts a list of controls, a mapping with a `checklist` list, or a
+    single control mapping.
+    """
+    if isinstance(data, dict) and 'checklist' in data:
+        data = data['checklist']
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        return [BatchEntry(source, error="expected a control or a list of controls")]
+
+    entries = []
+    for position, control in enumerate(data, 1):
+        label = f"{source}#{position}" if len(data) > 1 else source
+        problem = control_problem(control)
+        entries.append(BatchEntry(label, error=problem) if problem else BatchEntry(label, control))
+    return entries
+
+
+def load_batch(text: Optional[str] = None, path: Optional[Path] = None) -> List[BatchEntry]:
+    """
+    Read a batch from inline YAML or from a file or directory of YAML files.
+
+    An unreadable file becomes an entry with an error so the rest of the
+    batch still runs.
+
+    Raises:
+        ValueError: If the inline YAML cannot be parsed or the path does not exist
+    """
+    if text is not None:
+        try:
+            return parse_batch(yaml.safe_load(text), "inline")
+        except yaml.YAMLError as e:
+            raise ValueError(f"invalid YAML: {e}")
+
+    if path is None or not path.exists():
+        raise ValueError(f"path not found: {path}")
+
+    files = sorted(p for p in path.iterdir() if p.suffix in CONTROL_SUFFIXES) if path.is_dir() else [path]
+    entries: List[BatchEntry] = []
+    for file in files:
+        try:
+            entries.extend(parse_batch(yaml.safe_load(file.read_text(encoding='utf-8')), file.name))
+        except (yaml.YAMLError, OSError, UnicodeDecodeError) as e:
+            entries.append(BatchEntry(file.name, error=f"unreadable: {e}"))
+    return entries
+
+
+def control_problem(control: Any) -> Optional[str]:
+    """Why a control cannot be validated, or None when it is well formed."""
+    if not isinstance(control, dict):
+        return "control must be a mapping"
+    if control.get('manual_verification'):
+        return None
+    resources = control.get('azure_resources')
+    if not resources or not isinstance(resources, list):
+        return "no azure_resources to check"
+    for resource in resources:
+        if not isinstance(resource, dict) or not resource.get('type'):
+            return "azure_resources entry without a type"
+        if not isinstance(resource.get('validation') or [], list):
+            return f"validation of {resource['type']} must be a list"
+    return None
+
+
+def control_label(control: Dict[str, Any]) -> str:
+    label = control.get('controle') or control.get('exigence') or control.get('reglementation') or "(unnamed)"
+    label = " ".join(str(label).split())
+    return label if len(label) <= MAX_LABEL_LENGTH else label[:MAX_LABEL_LENGTH - 1] + "…"
+
+
+def outcome_detail(outcome: ControlOutcome) -> str:
+    """One-line reason for a control status."""
+    if outcome.status != FAILED:
+        return ""
+    if not outcome.requirements:
+        return "no resources to check"
+    blocking = [r for r in outcome.requirements if r.blocking]
+    return "; ".join(_requirement_detail(r) for r in blocking[:2]) + (" …" if len(blocking) > 2 else "")
+
+
+def _requirement_detail(requirement: RequirementOutcome) -> str:
+    name = requirement.resource_type.rsplit('/', 1)[-1]
+    if requirement.error:
+        return f"{name}: {requirement.error}"
+    if not requirement.found:
+        return f"{name}: none found"
+    compliant = sum(requirement.resource_outcomes)
+    return f"{name}: {compliant}/{len(requirement.resource_outcomes)} compliant"
+
+
+def render_batch_table(entries: List[BatchEntry], outcomes: Dict[int, ControlOutcome]) -> str:
+    """Markdown table with one row per batch entry (`outcomes` keyed by entry index)."""
+    lines = ["| # | Source | Control | Status | Details |", "|---|---|---|---|---|"]
+    for index, entry in enumerate(entries):
+        if entry.error:
+            lines.append(f"| {index + 1} | {entry.source} | | ⛔ INVALID | {entry.error} |")
+            continue
+        outcome = outcomes[index]
+        detail = outcome_detail(outcome).replace("|", "\\|")
+        lines.append(
+            f"| {index + 1} | {entry.source} | {control_label(entry.control).replace('|', '/')} "
+            f"| {STATUS_ICONS[outcome.status]} {outcome.status} | {detail} |"
+        )
+    return "\n".join(lines) + "\n"
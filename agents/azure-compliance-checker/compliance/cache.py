@@ -0,0 +1,168 @@
+"""
+Persistent cache for Azure CLI query results.
+
+Successful `az resource list` / `az graph query` outputs are stored in a
+SQLite database, zlib-compressed, keyed by the command line plus the
+subscription and tenant it ran against. Entries expire after a TTL that can
+be tuned per resource type, and the cache is bounded in entries and bytes
+with least-recently-used eviction.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    resource_types TEXT NOT NULL,
+    created REAL NOT NULL,
+    expires REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries (expires);
+"""
+
+
+def make_cache_key(args: Sequence[str], subscription: str = "", tenant: str = "") -> str:
+    """Derive a cache key from a command line and the account it targets."""
+    raw = "\x1f".join([tenant, subscription, *args])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """
+    SQLite-backed, size-bounded LRU cache of CLI outputs.
+
+    Args:
+        path: Database file (parent directories are created)
+        default_ttl: Time-to-live in seconds for entries
+        ttl_by_type: Per resource type TTL overrides (case-insensitive)
+        max_entries: Maximum number of cached responses
+        max_bytes: Maximum total size of compressed payloads
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        default_ttl: float = 300,
+        ttl_by_type: Optional[Dict[str, float]] = None,
+        max_entries: int = 2000,
+        max_bytes: int = 200 * 1024 * 1024,
+    ):
+        self.path = Path(path)
+        self.default_ttl = default_ttl
+        self.ttl_by_type = {k.lower(): v for k, v in (ttl_by_type or {}).items()}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.executescript(_SCHEMA)
+
+    def ttl_for(self, resource_types: Iterable[str]) -> float:
+        """TTL for a response covering the given types (the shortest one wins)."""
+        ttls = [self.ttl_by_type.get(t.lower(), self.default_ttl) for t in resource_types]
+        return min(ttls) if ttls else self.default_ttl
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached payload, or None if missing or expired."""
+        compressed = self.get_compressed(key)
+        return None if compressed is None else zlib.decompress(compressed).decode("utf-8")
+
+    def get_compressed(self, key: str) -> Optional[bytes]:
+        """Return a cached payload still zlib-compressed (for streaming readers)."""
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT payload, expires FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        payload, expires = row
+        if expires <= now:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return payload
+
+    def put(self, key: str, payload: str, resource_types: Sequence[str] = ()) -> None:
+        """Store a payload and evict least-recently-used entries if over budget."""
+        self.put_compressed(key, zlib.compress(payload.encode("utf-8"), 6), resource_types)
+
+    def put_compressed(self, key: str, compressed: bytes, resource_types: Sequence[str] = ()) -> None:
+        """Store a payload already zlib-compressed (by a streaming writer)."""
+        now = time.time()
+        # Types are stored as ",a,b," for LIKE matching; "" means every type
+        types_field = f",{','.join(t.lower() for t in resource_types)}," if resource_types else ""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                types_field,
+                now,
+                now + self.ttl_for(resource_types),
+                now,
+                len(compressed),
+                compressed,
+            ),
+        )
+        self._evict(now)
+        self._conn.commit()
+
+    def invalidate(self, resource_type: Optional[str] = None) -> int:
+        """
+        Drop cached entries.
+
+        Args:
+            resource_type: Only drop responses covering this type; None drops all
+
+        Returns:
+            Number of entries removed
+        """
+        if resource_type:
+            cursor = self._conn.execute(
+                "DELETE FROM entries WHERE resource_types LIKE ? OR resource_types = ''",
+                (f"%,{resource_type.lower()},%",),
+            )
+        else:
+            cursor = self._conn.execute("DELETE FROM entries")
+        self._conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        count, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        return {"entries": count, "bytes": size}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        count, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+
+        freed_entries = 0
+        freed_bytes = 0
+        victims = []
+        for key, entry_size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            if count - freed_entries <= self.max_entries and size - freed_bytes <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed_entries += 1
+            freed_bytes += entry_size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
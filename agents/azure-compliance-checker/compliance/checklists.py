@@ -0,0 +1,227 @@
+"""
+Precompiled compliance checklists.
+
+Parsing large YAML checklists with PyYAML's pure-Python loader dominates
+`list_available_checklists` and `load_compliance_checklist`. Checklists are
+compiled once into pickled blobs keyed by path, modification time and size,
+and a small header index (control count, controls per regulation) lets
+listing run on `stat()` calls alone. A checklist is only parsed again when
+its file changes.
+
+`ChecklistSet` validates several checklists in one pass: their controls are
+merged so the query plan covers every resource type and property once,
+controls with identical Azure requirements are evaluated once, and the
+outcomes are fanned back out to each checklist.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from .results import ComplianceResultStore, ControlOutcome
+
+# Bump when the compiled layout changes so stale caches are ignored
+FORMAT_VERSION = 1
+
+_INDEX_FILE = "index.pickle"
+
+
+@dataclass(frozen=True)
+class ChecklistHeader:
+    """Metadata of a compiled checklist."""
+
+    name: str
+    controls: int
+    regulations: Dict[str, int] = field(default_factory=dict)
+
+
+def normalize_checklist(data: Any) -> Dict[str, Any]:
+    """
+    Validate the top-level shape of a parsed checklist.
+
+    Raises:
+        ValueError: If the document is not a mapping or `checklist` is not a list
+    """
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise ValueError("checklist file must contain a mapping")
+    controls = data.get('checklist') or []
+    if not isinstance(controls, list):
+        raise ValueError("'checklist' must be a list of controls")
+    data['checklist'] = [c for c in controls if isinstance(c, dict)]
+    return data
+
+
+def checklist_header(name: str, data: Dict[str, Any]) -> ChecklistHeader:
+    """Summarise a normalized checklist."""
+    regulations: Dict[str, int] = {}
+    for control in data['checklist']:
+        regulation = control.get('reglementation', 'Unknown')
+        regulations[regulation] = regulations.get(regulation, 0) + 1
+    return ChecklistHeader(name=name, controls=len(data['checklist']), regulations=regulations)
+
+
+def requirement_key(control: Dict[str, Any]) -> str:
+    """Key of what a control checks in Azure, ignoring its regulatory text."""
+    return json.dumps(
+        [bool(control.get('manual_verification')), control.get('azure_resources') or []],
+        sort_keys=True, default=str
+    )
+
+
+@dataclass
+class ChecklistSet:
+    """
+    Several checklists validated in one pass.
+
+    `controls` are the distinct controls to evaluate; `members[i]` lists the
+    (checklist, control index) pairs answered by `controls[i]`.
+    """
+
+    checklists: Dict[str, Dict[str, Any]]
+    controls: List[Dict[str, Any]] = field(default_factory=list)
+    members: List[List[Tuple[str, int]]] = field(default_factory=list)
+
+    @classmethod
+    def merge(cls, checklists: Dict[str, Dict[str, Any]]) -> "ChecklistSet":
+        merged = cls(checklists)
+        positions: Dict[str, int] = {}
+        for name, data in checklists.items():
+            for index, control in enumerate(data['checklist']):
+                key = requirement_key(control)
+                position = positions.get(key)
+                if position is None:
+                    position = positions[key] = len(merged.controls)
+                    merged.controls.append(control)
+                    merged.members.append([])
+                merged.members[position].append((name, index))
+        return merged
+
+    @property
+    def total(self) -> int:
+        """Controls across every checklist, duplicates included."""
+        return sum(len(data['checklist']) for data in self.checklists.values())
+
+    def combined(self) -> List[Dict[str, Any]]:
+        """Every checklist's controls, concatenated in checklist order."""
+        return [control for data in self.checklists.values() for control in data['checklist']]
+
+    def offsets(self) -> Dict[str, int]:
+        """Index of each checklist's first control in `combined()`."""
+        offsets, start = {}, 0
+        for name, data in self.checklists.items():
+            offsets[name] = start
+            start += len(data['checklist'])
+        return offsets
+
+    def fan_out(self, outcomes: Iterable[ControlOutcome]) -> ComplianceResultStore:
+        """Results of `combined()` from the outcomes of `controls` (indexed by position)."""
+        offsets = self.offsets()
+        store = ComplianceResultStore()
+        for outcome in outcomes:
+            for name, index in self.members[outcome.index]:
+                control = self.checklists[name]['checklist'][index]
+                store.add(replace(outcome, index=offsets[name] + index, control=control))
+        return store
+
+    def split(self, store: ComplianceResultStore) -> Dict[str, ComplianceResultStore]:
+        """Per-checklist results, indexed within each checklist, from results of `combined()`."""
+        stores = {}
+        for name, offset in self.offsets().items():
+            stores[name] = ComplianceResultStore()
+            for index in range(len(self.checklists[name]['checklist'])):
+                outcome = store.get(offset + index)
+                if outcome is not None:
+                    stores[name].add(replace(outcome, index=index))
+        return stores
+
+
+class ChecklistCache:
+    """
+    Compile-once store of checklists.
+
+    Args:
+        cache_dir: Directory holding compiled blobs and the header index;
+            None disables persistence and parses on every call
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._index: Optional[Dict[str, Tuple[Tuple[int, int], ChecklistHeader]]] = None
+
+    def header(self, path: Path) -> ChecklistHeader:
+        """Return the header of a checklist, compiling it if it changed."""
+        path = Path(path).resolve()
+        stamp = _stamp(path)
+        entry = self._load_index().get(str(path))
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        return self._compile(path, stamp)[0]
+
+    def load(self, path: Path) -> Dict[str, Any]:
+        """Return the checklist data, deserialized from its compiled blob when fresh."""
+        path = Path(path).resolve()
+        stamp = _stamp(path)
+        blob = self._blob_path(path)
+        if blob is not None and blob.exists():
+            try:
+                with open(blob, 'rb') as f:
+                    version, cached_stamp, data = pickle.load(f)
+                if version == FORMAT_VERSION and cached_stamp == stamp:
+                    return data
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+                pass
+        return self._compile(path, stamp)[1]
+
+    def _compile(self, path: Path, stamp: Tuple[int, int]) -> Tuple[ChecklistHeader, Dict[str, Any]]:
+        with open(path, 'r') as f:
+            data = normalize_checklist(yaml.safe_load(f))
+        header = checklist_header(path.name, data)
+
+        if self.cache_dir is not None:
+            self._write(self._blob_path(path), (FORMAT_VERSION, stamp, data))
+            index = self._load_index()
+            index[str(path)] = (stamp, header)
+            self._write(self.cache_dir / _INDEX_FILE, (FORMAT_VERSION, index))
+        return header, data
+
+    def _load_index(self) -> Dict[str, Tuple[Tuple[int, int], ChecklistHeader]]:
+        if self._index is None:
+            self._index = {}
+            if self.cache_dir is not None:
+                try:
+                    with open(self.cache_dir / _INDEX_FILE, 'rb') as f:
+                        version, index = pickle.load(f)
+                    if version == FORMAT_VERSION:
+                        self._index = index
+                except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+                    pass
+        return self._index
+
+    def _blob_path(self, path: Path) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.sha1(str(path).encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / f"{path.stem}-{digest}.pickle"
+
+    def _write(self, target: Path, payload: Any) -> None:
+        """Write atomically so concurrent agents never read a partial file."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, target)
+
+
+def _stamp(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,232 @@
+"""
+Distributed scanning across worker processes.
+
+A `ScanCoordinator` splits a scan into shards (groups of controls, or one
+subscription each) and hands them to workers over authenticated
+`multiprocessing.connection` sockets. Workers may be local processes or
+agents started with `--worker HOST:PORT` on other hosts; both speak the
+same protocol:
+
+    coordinator -> worker   {'type': 'hello', 'controls': [...]}
+    coordinator -> worker   {'type': 'shard', 'id': n, 'indexes': [...], 'subscription': ...}
+    worker -> coordinator   {'type': 'outcome', 'outcome': ControlOutcome}   (one per control)
+    worker -> coordinator   {'type': 'done'} or {'type': 'error', 'error': '...'}
+    coordinator -> worker   {'type': 'stop'}
+
+Each worker pulls the next shard as soon as it finishes one, so faster
+workers take more shards. A shard whose worker disconnects is handed to
+another worker. Messages are pickled: only share the authkey with hosts
+you trust.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .results import ControlOutcome
+
+# Environment variable holding the shared worker authkey
+AUTHKEY_ENV = "COMPLIANCE_WORKER_AUTHKEY"
+
+
+@dataclass
+class Shard:
+    """A unit of work: some controls, optionally pinned to a subscription."""
+
+    id: int
+    indexes: List[int]
+    subscription: Optional[str] = None
+    attempts: int = 0
+    outcomes: List[ControlOutcome] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def parse_address(value: str, default_host: str = "127.0.0.1") -> Tuple[str, int]:
+    """Parse `host:port` (or a bare port) into a socket address."""
+    host, _, port = str(value).rpartition(":")
+    return (host or default_host, int(port))
+
+
+def shard_controls(controls: List[Dict[str, Any]], count: int) -> List[List[int]]:
+    """
+    Split control indexes into at most `count` shards.
+
+    Controls reading the same first resource type stay together so each
+    worker fetches a type's resources once; groups are assigned largest
+    first to the least loaded shard.
+    """
+    groups: Dict[str, List[int]] = {}
+    for index, control in enumerate(controls):
+        resources = control.get('azure_resources') or []
+        key = str(resources[0].get('type', '')).lower() if resources else ""
+        groups.setdefault(key, []).append(index)
+
+    shards: List[List[int]] = [[] for _ in range(max(1, min(count, len(groups))))]
+    for indexes in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(indexes)
+    return [sorted(shard) for shard in shards if shard]
+
+
+class ScanCoordinator:
+    """
+    Serve shards to workers and collect their outcomes.
+
+    The listener is bound on construction so workers can be started as soon
+    as `address` is known; `run()` blocks until every shard is finished.
+
+    Args:
+        controls: Checklist controls sent to every worker
+        shards: Work to distribute
+        authkey: Shared secret workers authenticate with
+        address: Address to listen on (port 0 picks a free port)
+        max_attempts: Times a shard is handed out before it is abandoned
+        connect_timeout: Seconds without any connected worker before the
+            remaining shards are abandoned
+    """
+
+    def __init__(
+        self,
+        controls: List[Dict[str, Any]],
+        shards: List[Shard],
+        authkey: bytes,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+        max_attempts: int = 2,
+        connect_timeout: float = 60,
+    ):
+        self.controls = controls
+        self.shards = shards
+        self.authkey = authkey
+        self.max_attempts = max(1, max_attempts)
+        self.connect_timeout = connect_timeout
+        self.listener = Listener(address, authkey=authkey)
+        self.address: Tuple[str, int] = self.listener.address
+        self.workers_seen = 0
+        self._pending: Deque[Shard] = deque(shards)
+        self._finished = 0
+        self._workers = 0
+        self._idle_since = time.monotonic()
+        self._closing = False
+        self._condition = threading.Condition()
+
+    def run(self, on_outcome: Optional[Callable[[Shard, ControlOutcome], None]] = None) -> List[Shard]:
+        """Distribute the shards and return them with their outcomes or errors."""
+        accept = threading.Thread(target=self._accept, args=(on_outcome,), daemon=True)
+        accept.start()
+        try:
+            with self._condition:
+                while self._finished < len(self.shards):
+                    if self._workers == 0 and time.monotonic() - self._idle_since > self.connect_timeout:
+                        self._abandon_pending("no worker connected")
+                        break
+                    self._condition.wait(timeout=0.5)
+        finally:
+            self._shutdown(accept)
+        return self.shards
+
+    def _accept(self, on_outcome: Optional[Callable[[Shard, ControlOutcome], None]]) -> None:
+        while True:
+            try:
+                conn = self.listener.accept()
+            except Exception:
+                if self._closing:
+                    return
+                continue
+            if self._closing:
+                conn.close()
+                return
+            with self._condition:
+                self._workers += 1
+                self.workers_seen += 1
+            threading.Thread(target=self._serve, args=(conn, on_outcome), daemon=True).start()
+
+    def _serve(self, conn: Connection, on_outcome: Optional[Callable[[Shard, ControlOutcome], None]]) -> None:
+        shard = None
+        try:
+            conn.send({'type': 'hello', 'controls': self.controls})
+            while True:
+                shard = self._next_shard()
+                if shard is None:
+                    conn.send({'type': 'stop'})
+                    return
+                conn.send({
+                    'type': 'shard',
+                    'id': shard.id,
+                    'indexes': shard.indexes,
+                    'subscription': shard.subscription,
+                })
+                outcomes: List[ControlOutcome] = []
+                while True:
+                    message = conn.recv()
+                    if message['type'] == 'outcome':
+                        outcome = message['outcome']
+                        # Share the coordinator's control dicts instead of per-message copies
+                        outcome.control = self.controls[outcome.index]
+                        outcomes.append(outcome)
+                        if on_outcome is not None:
+                            on_outcome(shard, outcome)
+                    elif message['type'] == 'done':
+                        self._finish(shard, outcomes=outcomes)
+                        break
+                    else:
+                        self._finish(shard, error=message.get('error') or "worker error")
+                        break
+                shard = None
+        except (EOFError, OSError):
+            # Worker went away: hand its shard to someone else
+            if shard is not None:
+                self._retry(shard, "worker disconnected")
+        finally:
+            conn.close()
+            with self._condition:
+                self._workers -= 1
+                if self._workers == 0:
+                    self._idle_since = time.monotonic()
+                self._condition.notify_all()
+
+    def _next_shard(self) -> Optional[Shard]:
+        with self._condition:
+            while not self._pending:
+                if self._finished >= len(self.shards) or self._closing:
+                    return None
+                self._condition.wait()
+            shard = self._pending.popleft()
+            shard.attempts += 1
+            return shard
+
+    def _finish(self, shard: Shard, outcomes: Optional[List[ControlOutcome]] = None, error: Optional[str] = None) -> None:
+        with self._condition:
+            shard.outcomes = outcomes or []
+            shard.error = error
+            self._finished += 1
+            self._condition.notify_all()
+
+    def _retry(self, shard: Shard, error: str) -> None:
+        if shard.attempts >= self.max_attempts:
+            self._finish(shard, error=error)
+            return
+        with self._condition:
+            self._pending.append(shard)
+            self._condition.notify_all()
+
+    def _abandon_pending(self, error: str) -> None:
+        while self._pending:
+            shard = self._pending.popleft()
+            shard.error = error
+            self._finished += 1
+
+    def _shutdown(self, accept: threading.Thread) -> None:
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        # Wake the accept() call with a throwaway connection
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except Exception:
+            pass
+        accept.join(timeout=5)
+        self.listener.close()
@@ -0,0 +1,363 @@
+"""
+Property-path evaluation for checklist validations.
+
+Each `validation` entry of a checklist is compiled once: its `property` path
+is parsed into segments and its `check` into a predicate. Evaluation then
+works on columns: the values of one property path are extracted for every
+resource of a type in a single pass (one list comprehension per path
+segment), cached, and each predicate is applied to the whole column. The
+result is a pass/fail flag per resource.
+
+`az resource list` returns `properties: null`, so `properties.*` paths are
+only evaluated on Resource Graph (or `az resource show`) payloads; a
+requirement that reads them from a resource list, or that uses an unknown
+check, is reported as not evaluable rather than passed or failed.
+
+Supported checks: exists, equals, contains, containsAny, in, greaterThan,
+greaterThanOrEqual, lessThan, lessThanOrEqual.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence
+
+from .records import ResourceRecord
+
+Column = List[Any]
+Predicate = Callable[[Column], List[bool]]
+
+_SEGMENT = re.compile(r"([^.\[\]]+)|\[(\d+)\]")
+
+
+class PropertyPath:
+    """A dotted property path (e.g. `properties.sku.name` or `zones[0]`)."""
+
+    __slots__ = ("path", "segments")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.segments = tuple(
+            int(index) if index else key
+            for key, index in _SEGMENT.findall(path)
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def parse(path: str) -> "PropertyPath":
+        """Return the parsed path, parsing each distinct path only once."""
+        return PropertyPath(path)
+
+    @property
+    def reads_properties(self) -> bool:
+        """Whether the path reads the `properties` payload of a resource."""
+        return bool(self.segments) and self.segments[0] == "properties"
+
+    def extract(self, resources: Sequence[Dict[str, Any]]) -> Column:
+        """Extract the path's value for every resource (None when missing)."""
+        if any(isinstance(r, ResourceRecord) for r in resources):
+            # Compact records hold the value of each schema path directly
+            return [
+                r.value(self.path) if isinstance(r, ResourceRecord) else self.extract([r])[0]
+                for r in resources
+            ]
+        column: Column = list(resources)
+        for segment in self.segments:
+            if isinstance(segment, int):
+                column = [
+                    v[segment] if isinstance(v, list) and -len(v) <= segment < len(v) else None
+                    for v in column
+                ]
+            else:
+                column = [v.get(segment) if isinstance(v, dict) else None for v in column]
+        return column
+
+    def __repr__(self) -> str:
+        return f"PropertyPath({self.path!r})"
+
+
+class ResourceColumns:
+    """
+    Resources of one type with lazily extracted, cached property columns.
+
+    `truncated` marks a query that stopped early, so `resources` may be a
+    prefix of what exists. `has_properties` is False when the resources
+    come from `az resource list`, whose payloads carry no `properties`.
+    `paths` lists the only paths the resources carry when a query projected
+    them, and `covered` is False when the type was not queried at all.
+    """
+
+    def __init__(
+        self,
+        resources: Sequence[Dict[str, Any]],
+        truncated: bool = False,
+        has_properties: bool = True,
+        paths: Optional[FrozenSet[str]] = None,
+        covered: bool = True
+    ):
+        self.resources = resources
+        self.truncated = truncated
+        self.has_properties = has_properties
+        self.paths = paths
+        self.covered = covered
+        self._columns: Dict[str, Column] = {}
+
+    def column(self, path: PropertyPath) -> Column:
+        column = self._columns.get(path.path)
+        if column is None:
+            column = path.extract(self.resources)
+            self._columns[path.path] = column
+        return column
+
+    def __len__(self) -> int:
+        return len(self.resources)
+
+
+@dataclass
+class CompiledCheck:
+    """A validation entry compiled to a column predicate."""
+
+    path: PropertyPath
+    check: str
+    expected: Any = None
+    predicate: Optional[Predicate] = None
+
+    @property
+    def supported(self) -> bool:
+        return self.predicate is not None
+
+    def evaluate(self, columns: ResourceColumns) -> List[bool]:
+        """
+        Return the per-resource outcome.
+
+        Raises:
+            ValueError: If the check is not supported
+        """
+        if self.predicate is None:
+            raise ValueError(f"Unsupported check: {self.check}")
+        return self.predicate(columns.column(self.path))
+
+
+@dataclass
+class RequirementEvaluation:
+    """Outcome of a requirement against the resources of its type."""
+
+    check_outcomes: List[List[bool]]
+    resource_outcomes: List[bool]
+    satisfied: bool
+
+    @property
+    def passed_count(self) -> int:
+        return sum(self.resource_outcomes)
+
+
+@dataclass
+class CompiledRequirement:
+    """
+    A compiled `azure_resources` entry.
+
+    `match` selects whether any compliant resource satisfies the requirement
+    (the default) or whether every resource of the type must comply;
+    `pass_rate` instead requires that share of the resources to comply.
+    """
+
+    resource_type: str
+    required: bool = False
+    match: str = "any"
+    checks: List[CompiledCheck] = field(default_factory=list)
+    pass_rate: Optional[float] = None
+
+    @property
+    def paths(self) -> List[PropertyPath]:
+        """Property paths read by the checks."""
+        return [check.path for check in self.checks]
+
+    @property
+    def threshold(self) -> float:
+        """Share of compliant resources at which the requirement is satisfied (0 means any)."""
+        if self.pass_rate is not None:
+            return self.pass_rate
+        return 1.0 if self.match == "all" else 0.0
+
+    def satisfied_by(self, passed: int, total: int) -> bool:
+        """Whether `passed` compliant resources out of `total` satisfy the requirement."""
+        if not total:
+            return False
+        if self.pass_rate is not None:
+            return passed / total >= self.pass_rate
+        return passed == total if self.match == "all" else passed > 0
+
+    def unevaluable_reason(self, columns: ResourceColumns) -> Optional[str]:
+        """Why the checks cannot be evaluated on these resources, or None when they can."""
+        if not columns.covered:
+            return "resource type not captured in the inventory"
+        if not columns:
+            return None
+        unsupported = sorted({check.check for check in self.checks if not check.supported})
+        if unsupported:
+            return f"unsupported check(s): {', '.join(unsupported)}"
+        if not columns.has_properties and any(check.path.reads_properties for check in self.checks):
+            return "az resource list returns no resource properties; enable azure.use_resource_graph"
+        if columns.paths is not None:
+            missing = sorted({check.path.path for check in self.checks} - columns.paths)
+            if missing:
+                return f"inventory does not capture {', '.join(missing)}"
+        return None
+
+    def evaluate(self, columns: ResourceColumns) -> RequirementEvaluation:
+        check_outcomes = [check.evaluate(columns) for check in self.checks]
+        if check_outcomes:
+            resource_outcomes = [all(row) for row in zip(*check_outcomes)]
+        else:
+            resource_outcomes = [True] * len(columns)
+
+        satisfied = self.satisfied_by(sum(resource_outcomes), len(resource_outcomes))
+        return RequirementEvaluation(check_outcomes, resource_outcomes, satisfied)
+
+
+def compile_check(validation: Dict[str, Any]) -> CompiledCheck:
+    """Compile a single checklist `validation` entry."""
+    check = validation.get('check', 'exists')
+    expected = validation.get('value')
+    factory = _PREDICATES.get(check)
+    return CompiledCheck(
+        path=PropertyPath.parse(validation.get('property', '')),
+        check=check,
+        expected=expected,
+        predicate=factory(expected) if factory else None,
+    )
+
+
+def compile_requirement(requirement: Dict[str, Any]) -> CompiledRequirement:
+    """Compile an `azure_resources` entry and its validations."""
+    pass_rate = requirement.get('pass_rate')
+    return CompiledRequirement(
+        resource_type=requirement.get('type', ''),
+        required=bool(requirement.get('required', False)),
+        match=requirement.get('match', 'any'),
+        checks=[compile_check(v) for v in requirement.get('validation') or []],
+        pass_rate=float(pass_rate) if pass_rate is not None else None,
+    )
+
+
+def compile_control(control: Dict[str, Any]) -> List[CompiledRequirement]:
+    """Compile every resource requirement of a checklist control."""
+    return [compile_requirement(r) for r in control.get('azure_resources') or []]
+
+
+# ---------------------------------------------------------------------------
+# Predicates
+# ---------------------------------------------------------------------------
+
+def _normalize(value: Any) -> Any:
+    """Compare strings case-insensitively and booleans against 'true'/'false'."""
+    if isinstance(value, str):
+        lowered = value.casefold()
+        if lowered in ("true", "false"):
+            return lowered == "true"
+        return lowered
+    return value
+
+
+def _same(a: Any, b: Any) -> bool:
+    """Equality of normalized values that keeps booleans apart from numbers (`1 != True`)."""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    return a == b
+
+
+def _hash_key(value: Any) -> Any:
+    """Set key of a normalized value (None when it is unhashable, e.g. a dict or list)."""
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return (isinstance(value, bool), value)
+
+
+def _contains(haystack: Any, needle: Any) -> bool:
+    """Search strings, lists and dict keys/values recursively."""
+    if haystack is None:
+        return False
+    if isinstance(haystack, str):
+        return isinstance(needle, str) and needle.casefold() in haystack.casefold()
+    if isinstance(haystack, dict):
+        return any(_contains(k, needle) or _contains(v, needle) for k, v in haystack.items())
+    if isinstance(haystack, (list, tuple)):
+        return any(_same(_normalize(item), _normalize(needle)) or _contains(item, needle) for item in haystack)
+    return _same(_normalize(haystack), _normalize(needle))
+
+
+def _as_list(value: Any) -> List[Any]:
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def _numeric(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _exists(_expected: Any) -> Predicate:
+    return lambda column: [v is not None for v in column]
+
+
+def _equals(expected: Any) -> Predicate:
+    target = _normalize(expected)
+    return lambda column: [v is not None and _same(_normalize(v), target) for v in column]
+
+
+def _contains_predicate(expected: Any) -> Predicate:
+    return lambda column: [_contains(v, expected) for v in column]
+
+
+def _contains_any(expected: Any) -> Predicate:
+    needles = _as_list(expected)
+    return lambda column: [any(_contains(v, n) for n in needles) for v in column]
+
+
+def _in(expected: Any) -> Predicate:
+    allowed = [_normalize(v) for v in _as_list(expected)]
+    keys = {_hash_key(v) for v in allowed} - {None}
+    unhashable = [v for v in allowed if _hash_key(v) is None]
+
+    def member(item: Any) -> bool:
+        item = _normalize(item)
+        key = _hash_key(item)
+        if key is not None:
+            return key in keys
+        return any(_same(item, v) for v in unhashable)
+
+    return lambda column: [v is not None and all(member(item) for item in _as_list(v)) for v in column]
+
+
+def _compare(operator: Callable[[float, float], bool]) -> Callable[[Any], Predicate]:
+    def factory(expected: Any) -> Predicate:
+        bound = _numeric(expected)
+
+        def predicate(column: Column) -> List[bool]:
+            if bound is None:
+                return [False] * len(column)
+            values = [_numeric(v) for v in column]
+            return [v is not None and operator(v, bound) for v in values]
+
+        return predicate
+    return factory
+
+
+_PREDICATES: Dict[str, Callable[[Any], Predicate]] = {
+    "exists": _exists,
+    "equals": _equals,
+    "contains": _contains_predicate,
+    "containsAny": _contains_any,
+    "in": _in,
+    "greaterThan": _compare(lambda a, b: a > b),
+    "greaterThanOrEqual": _compare(lambda a, b: a >= b),
+    "lessThan": _compare(lambda a, b: a < b),
+    "lessThanOrEqual": _compare(lambda a, b: a <= b),
+}
@@ -0,0 +1,348 @@
+"""
+Asynchronous Azure CLI executor.
+
+Azure CLI calls are run as asyncio subprocesses so that the agent's event
+loop keeps running while queries are in flight. An AdaptiveLimiter bounds
+how many `az` processes run at once, throttled queries are retried with
+jittered backoff, each query gets the configured timeout, and identical
+commands issued concurrently share a single subprocess. Read-only queries
+can be served from a persistent QueryCache. Large list outputs can be
+streamed element by element straight from the pipe.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .cache import QueryCache, make_cache_key
+from .jsonstream import JsonArrayParser
+from .throttle import AdaptiveLimiter, backoff_delay, is_throttled, retry_after_seconds
+
+# Commands whose output only depends on Azure state and may be cached
+CACHEABLE_COMMANDS = (("resource", "list"), ("graph", "query"))
+
+# Bytes read from the pipe per step when streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class AzureCliError(RuntimeError):
+    """Raised when an Azure CLI command exits with a non-zero status."""
+
+
+class AzureCliTimeout(AzureCliError):
+    """Raised when an Azure CLI command exceeds its timeout."""
+
+
+class AzureCliThrottled(AzureCliError):
+    """Raised when Azure still throttles a command after every retry."""
+
+
+@dataclass
+class CliResult:
+    """Completed Azure CLI invocation."""
+
+    returncode: int
+    stdout: str
+    stderr: str
+
+
+class AzureCliExecutor:
+    """
+    Run Azure CLI commands concurrently with bounded parallelism.
+
+    Args:
+        max_parallel: Maximum number of `az` processes running at once
+            (ignored when a limiter is given)
+        timeout: Per-query timeout in seconds
+        cli_path: Azure CLI executable
+        cache: Optional persistent cache for read-only queries
+        limiter: Adaptive concurrency limiter (fixed at max_parallel by default)
+        max_retries: Retries of a throttled command before giving up
+        backoff_base: First backoff delay in seconds, doubled per retry
+        backoff_max: Upper bound of a backoff delay without Retry-After
+    """
+
+    def __init__(
+        self,
+        max_parallel: int = 8,
+        timeout: float = 30,
+        cli_path: str = "az",
+        cache: Optional[QueryCache] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        self.timeout = timeout
+        self.cli_path = cli_path
+        self.cache = cache
+        self.limiter = limiter or AdaptiveLimiter(max_parallel, adaptive=False)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._inflight: Dict[Tuple[str, ...], "asyncio.Task[CliResult]"] = {}
+        self._account: Optional[Tuple[str, str]] = None
+
+    async def run(self, args: Sequence[str], refresh: bool = False) -> CliResult:
+        """
+        Run `az <args>` and return its result.
+
+        Concurrent calls with the same arguments are coalesced into one
+        subprocess. Successful read-only queries are cached when a cache is
+        configured; `refresh=True` skips the lookup but still stores the
+        fresh result.
+
+        Raises:
+            AzureCliThrottled: If Azure keeps throttling the command
+            AzureCliTimeout: If the command does not finish within the timeout
+        """
+        cache_key = None
+        if self.cache is not None and tuple(args[:2]) in CACHEABLE_COMMANDS:
+            subscription, tenant = await self.account_context()
+            cache_key = make_cache_key(args, subscription, tenant)
+            payload = None if refresh else self.cache.get(cache_key)
+            if payload is not None:
+                return CliResult(returncode=0, stdout=payload, stderr="")
+
+        result = await self._run_coalesced(args)
+        if cache_key is not None and result.returncode == 0:
+            self.cache.put(cache_key, result.stdout, query_resource_types(args))
+        return result
+
+    def forget_account(self) -> None:
+        """Re-read the active account on the next query (it may have changed with `az account set`)."""
+        self._account = None
+
+    async def account_context(self) -> Tuple[str, str]:
+        """
+        Return (subscription id, tenant id) of the active Azure CLI account.
+
+        The pair keys cached responses. It is read once and kept until
+        `forget_account()`, which callers invoke at the start of each scan.
+        """
+        if self._account is None:
+            try:
+                result = await self._run_coalesced(["account", "show", "--output", "json"])
+                account = json.loads(result.stdout) if result.returncode == 0 else {}
+            except (AzureCliError, ValueError):
+                account = {}
+            self._account = (account.get("id", ""), account.get("tenantId", ""))
+        return self._account
+
+    async def _run_coalesced(self, args: Sequence[str]) -> CliResult:
+        key = tuple(args)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._execute(list(args)))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # A cancelled caller only stops its own wait; the others still get the result
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Tuple[str, ...], task: "asyncio.Task[CliResult]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller stopped waiting
+            task.exception()
+
+    async def run_json(self, args: Sequence[str], refresh: bool = False) -> Any:
+        """
+        Run `az <args> --output json` and decode the output.
+
+        Raises:
+            AzureCliError: If the command fails (AzureCliThrottled when throttled)
+            AzureCliTimeout: If the command does not finish within the timeout
+        """
+        result = await self.run([*args, "--output", "json"], refresh=refresh)
+        if result.returncode != 0:
+            raise AzureCliError(f"Error querying Azure: {result.stderr}")
+        return json.loads(result.stdout) if result.stdout.strip() else []
+
+    async def stream_json(
+        self,
+        args: Sequence[str],
+        limit: Optional[int] = None,
+        refresh: bool = False
+    ) -> AsyncIterator[Any]:
+        """
+        Run `az <args> --output json` and yield the elements of its array output.
+
+        Elements are decoded as the pipe is read, and the process is killed
+        as soon as `limit` elements have been yielded or the consumer stops.
+        A fresh cache entry is served instead of running the command unless
+        `refresh` is set, and output read to the end is written to the cache;
+        streams cut short by `limit` or the consumer are not. Cached output
+        is compressed and decompressed chunk by chunk, never held in full.
+
+        Raises:
+            AzureCliError: If the command fails (AzureCliThrottled when throttled)
+            AzureCliTimeout: If the command does not finish within the timeout
+        """
+        args = [*args, "--output", "json"]
+        if limit is not None and limit <= 0:
+            return
+
+        cache_key = None
+        if self.cache is not None and tuple(args[:2]) in CACHEABLE_COMMANDS:
+            subscription, tenant = await self.account_context()
+            cache_key = make_cache_key(args, subscription, tenant)
+            payload = None if refresh else self.cache.get_compressed(cache_key)
+            if payload is not None:
+                parser = JsonArrayParser()
+                decompressor = zlib.decompressobj()
+                yielded = 0
+                for start in range(0, len(payload), STREAM_CHUNK_SIZE):
+                    items = parser.feed(decompressor.decompress(payload[start:start + STREAM_CHUNK_SIZE]))
+                    if start + STREAM_CHUNK_SIZE >= len(payload):
+                        items += parser.feed(decompressor.flush()) + parser.close()
+                    for item in items:
+                        yield item
+                        yielded += 1
+                        if limit is not None and yielded >= limit:
+                            return
+                return
+
+        for attempt in range(self.max_retries + 1):
+            async with self.limiter.slot() as ticket:
+                process = await asyncio.create_subprocess_exec(
+                    self.cli_path,
+                    *args,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                stderr_task = asyncio.ensure_future(process.stderr.read())
+                deadline = asyncio.get_running_loop().time() + self.timeout
+                parser = JsonArrayParser()
+                compressor = zlib.compressobj(6)
+                compressed: List[bytes] = []
+                yielded = 0
+                throttled = None
+                try:
+                    while True:
+                        remaining = deadline - asyncio.get_running_loop().time()
+                        try:
+                            chunk = await asyncio.wait_for(process.stdout.read(STREAM_CHUNK_SIZE), timeout=max(remaining, 0))
+                        except asyncio.TimeoutError:
+                            raise AzureCliTimeout(f"Query timeout after {self.timeout}s: az {' '.join(args)}")
+
+                        if not chunk:
+                            await process.wait()
+                            if process.returncode != 0:
+                                stderr = (await stderr_task).decode("utf-8", errors="replace")
+                                if is_throttled(stderr):
+                                    ticket.throttled(retry_after_seconds(stderr))
+                                    # Retry only while nothing has been handed out
+                                    if yielded == 0 and attempt < self.max_retries:
+                                        throttled = stderr
+                                        break
+                                    raise AzureCliThrottled(f"Azure throttled the query after {attempt} retries: {stderr}")
+                                raise AzureCliError(f"Error querying Azure: {stderr}")
+                            ticket.succeeded()
+                            items = parser.close()
+                            if cache_key is not None:
+                                compressed.append(compressor.flush())
+                                self.cache.put_compressed(cache_key, b"".join(compressed), query_resource_types(args))
+                        else:
+                            items = parser.feed(chunk)
+                            if cache_key is not None:
+                                compressed.append(compressor.compress(chunk))
+
+                        for item in items:
+                            yield item
+                            yielded += 1
+                            if limit is not None and yielded >= limit:
+                                return
+                        if not chunk:
+                            return
+                finally:
+                    if process.returncode is None:
+                        process.kill()
+                        await process.wait()
+                    stderr_task.cancel()
+            await self._backoff(attempt, throttled)
+
+    async def collect_json(
+        self,
+        args: Sequence[str],
+        limit: Optional[int] = None,
+        transform: Optional[Callable[[Any], Any]] = None,
+        refresh: bool = False
+    ) -> List[Any]:
+        """Stream `az <args>` into a list, applying `transform` to each element as it arrives."""
+        items: List[Any] = []
+        stream = self.stream_json(args, limit=limit, refresh=refresh)
+        try:
+            async for item in stream:
+                items.append(transform(item) if transform else item)
+        finally:
+            await stream.aclose()
+        return items
+
+    async def _execute(self, args: List[str]) -> CliResult:
+        """
+        Run a command, retrying it while Azure throttles it.
+
+        Raises:
+            AzureCliThrottled: If the command is still throttled after max_retries
+            AzureCliTimeout: If an attempt does not finish within the timeout
+        """
+        for attempt in range(self.max_retries + 1):
+            async with self.limiter.slot() as ticket:
+                result = await self._execute_once(args)
+                if result.returncode == 0:
+                    ticket.succeeded()
+                    return result
+                if not is_throttled(result.stderr):
+                    return result
+                ticket.throttled(retry_after_seconds(result.stderr))
+            if attempt < self.max_retries:
+                await self._backoff(attempt, result.stderr)
+
+        raise AzureCliThrottled(
+            f"Azure throttled the query after {self.max_retries} retries: {result.stderr}"
+        )
+
+    async def _execute_once(self, args: List[str]) -> CliResult:
+        process = await asyncio.create_subprocess_exec(
+            self.cli_path,
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise AzureCliTimeout(f"Query timeout after {self.timeout}s: az {' '.join(args)}")
+
+        return CliResult(
+            returncode=process.returncode,
+            stdout=stdout.decode("utf-8", errors="replace"),
+            stderr=stderr.decode("utf-8", errors="replace"),
+        )
+
+    async def _backoff(self, attempt: int, stderr: str) -> None:
+        await asyncio.sleep(backoff_delay(
+            attempt, self.backoff_base, self.backoff_max, retry_after_seconds(stderr)
+        ))
+
+
+def query_resource_types(args: Sequence[str]) -> List[str]:
+    """Resource types covered by a query (empty when it lists every type)."""
+    args = list(args)
+    if "--resource-type" in args:
+        index = args.index("--resource-type")
+        return args[index + 1:index + 2]
+    if "-q" in args:
+        kql = args[args.index("-q") + 1] if args.index("-q") + 1 < len(args) else ""
+        match = re.search(r"type in~ \(([^)]*)\)", kql)
+        if match:
+            return re.findall(r"'([^']*)'", match.group(1))
+    return []
@@ -0,0 +1,134 @@
+"""
+Multi-subscription fan-out scanning.
+
+A fan-out scan validates the same checklist against many subscriptions in
+one agent process. Each subscription gets a `ScopedExecutor`: a view of the
+shared Azure CLI executor that pins commands to that subscription (or to a
+management group) and caps how many of its queries run at once, so one
+large subscription cannot starve the others of the global query budget.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .executor import AzureCliExecutor, CliResult
+from .resource_graph import GraphQuery, QueryPlan, ResourceGraphBackend
+from .results import FAILED, MANUAL, PASSED, ComplianceResultStore, ControlOutcome
+
+SUBSCRIPTION_TYPE = "microsoft.resources/subscriptions"
+
+_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+class ScopedExecutor:
+    """
+    Executor view restricted to a subscription or management group.
+
+    `az graph query` takes `--subscriptions` / `--management-groups`, every
+    other command takes `--subscription`.
+
+    Args:
+        executor: Shared executor that actually runs the commands
+        subscription: Subscription id commands are pinned to
+        management_group: Management group Resource Graph queries cover
+        max_parallel: Maximum commands of this scope in flight (None for no cap)
+    """
+
+    def __init__(
+        self,
+        executor: AzureCliExecutor,
+        subscription: Optional[str] = None,
+        management_group: Optional[str] = None,
+        max_parallel: Optional[int] = None,
+    ):
+        self.executor = executor
+        self.subscription = subscription
+        self.management_group = management_group
+        self._semaphore = asyncio.Semaphore(max(1, int(max_parallel))) if max_parallel else None
+
+    def scoped_args(self, args: Sequence[str]) -> List[str]:
+        """Add the scope options to a command line."""
+        args = list(args)
+        if tuple(args[:2]) == ("graph", "query"):
+            if self.subscription:
+                args.extend(["--subscriptions", self.subscription])
+            elif self.management_group:
+                args.extend(["--management-groups", self.management_group])
+        elif self.subscription:
+            args.extend(["--subscription", self.subscription])
+        return args
+
+    async def run(self, args: Sequence[str], refresh: bool = False) -> CliResult:
+        if self._semaphore is None:
+            return await self.executor.run(self.scoped_args(args), refresh=refresh)
+        async with self._semaphore:
+            return await self.executor.run(self.scoped_args(args), refresh=refresh)
+
+    async def run_json(self, args: Sequence[str], refresh: bool = False) -> Any:
+        if self._semaphore is None:
+            return await self.executor.run_json(self.scoped_args(args), refresh=refresh)
+        async with self._semaphore:
+            return await self.executor.run_json(self.scoped_args(args), refresh=refresh)
+
+    async def collect_json(
+        self,
+        args: Sequence[str],
+        limit: Optional[int] = None,
+        transform: Optional[Callable[[Any], Any]] = None,
+        refresh: bool = False
+    ) -> List[Any]:
+        if self._semaphore is None:
+            return await self.executor.collect_json(self.scoped_args(args), limit, transform, refresh)
+        async with self._semaphore:
+            return await self.executor.collect_json(self.scoped_args(args), limit, transform, refresh)
+
+
+def parse_subscriptions(value: Any) -> List[str]:
+    """Split a comma/whitespace separated list (or a list) into unique ids."""
+    items = value if isinstance(value, (list, tuple)) else _SEPARATORS.split(str(value or ""))
+    subscriptions: List[str] = []
+    for item in items:
+        item = str(item).strip()
+        if item and item not in subscriptions:
+            subscriptions.append(item)
+    return subscriptions
+
+
+async def subscriptions_in_management_group(executor: AzureCliExecutor, management_group: str) -> List[str]:
+    """List the subscription ids below a management group with Resource Graph."""
+    backend = ResourceGraphBackend(ScopedExecutor(executor, management_group=management_group))
+    plan = QueryPlan([GraphQuery("resourcecontainers", [SUBSCRIPTION_TYPE])])
+    inventory = await backend.fetch(plan)
+    ids = (resource.get("id") or "" for resource in inventory.of_type(SUBSCRIPTION_TYPE))
+    return sorted({rid.rstrip("/").rsplit("/", 1)[-1] for rid in ids if rid})
+
+
+def merge_outcomes(outcomes: Sequence[ControlOutcome]) -> ControlOutcome:
+    """
+    Combine the outcomes of one control across subscriptions.
+
+    The control fails if it fails anywhere; requirement outcomes are
+    concatenated so non-compliant resources of every subscription are kept.
+    """
+    first = outcomes[0]
+    if first.status == MANUAL:
+        return first
+    status = FAILED if any(o.status == FAILED for o in outcomes) else PASSED
+    requirements = [r for o in outcomes for r in o.requirements]
+    return ControlOutcome(index=first.index, control=first.control, status=status, requirements=requirements)
+
+
+def merge_stores(stores: Iterable[ComplianceResultStore]) -> ComplianceResultStore:
+    """Merge per-subscription results into one store keyed by control index."""
+    by_index: Dict[int, List[ControlOutcome]] = {}
+    for store in stores:
+        for outcome in store:
+            by_index.setdefault(outcome.index, []).append(outcome)
+
+    merged = ComplianceResultStore()
+    for index in sorted(by_index):
+        merged.add(merge_outcomes(by_index[index]))
+    return merged
@@ -0,0 +1,274 @@
+"""
+Persistent compliance scan history.
+
+Every scan is recorded in a SQLite database: one row per scan with its
+status counts, one row per (scan, regulation) with that regulation's
+counts, and one row per control outcome. Trends are read from the
+pre-aggregated rows and diffs join two scans on a stable control key, so
+both stay index lookups however many scans have accumulated.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from .results import FAILED, MANUAL, PASSED, ComplianceResultStore, ControlOutcome
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scan_time TEXT NOT NULL,
+    checklist TEXT,
+    scope TEXT,
+    total INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    manual INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_time ON scans (scan_time);
+
+CREATE TABLE IF NOT EXISTS regulation_summaries (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    regulation TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    manual INTEGER NOT NULL,
+    PRIMARY KEY (scan_id, regulation)
+);
+CREATE INDEX IF NOT EXISTS idx_regulation_summaries ON regulation_summaries (regulation, scan_id);
+
+CREATE TABLE IF NOT EXISTS control_results (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    control_key TEXT NOT NULL,
+    control_index INTEGER NOT NULL,
+    regulation TEXT NOT NULL,
+    requirement TEXT,
+    status TEXT NOT NULL,
+    scan_time TEXT NOT NULL,
+    PRIMARY KEY (scan_id, control_key)
+);
+CREATE INDEX IF NOT EXISTS idx_control_results_control ON control_results (control_key, scan_time);
+CREATE INDEX IF NOT EXISTS idx_control_results_regulation ON control_results (regulation, status, scan_time);
+"""
+
+
+def control_key(outcome: ControlOutcome) -> str:
+    """Identify a control across scans by its content rather than its position."""
+    control = outcome.control
+    raw = "\x1f".join(str(control.get(k) or "") for k in ('reglementation', 'exigence', 'controle'))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class ScanRecord:
+    """Summary row of a recorded scan."""
+
+    id: int
+    scan_time: str
+    checklist: Optional[str]
+    scope: Optional[str]
+    total: int
+    passed: int
+    failed: int
+    manual: int
+
+    @property
+    def compliance_rate(self) -> float:
+        return (self.passed / self.total * 100) if self.total else 0.0
+
+
+@dataclass
+class TrendPoint:
+    """Compliance of one scan, overall or for one regulation."""
+
+    scan_id: int
+    scan_time: str
+    total: int
+    passed: int
+
+    @property
+    def compliance_rate(self) -> float:
+        return (self.passed / self.total * 100) if self.total else 0.0
+
+
+@dataclass
+class ControlChange:
+    """A control whose status differs between two scans."""
+
+    control_index: int
+    regulation: str
+    requirement: str
+    before: Optional[str]
+    after: Optional[str]
+
+
+@dataclass
+class ScanDiff:
+    """Differences between two recorded scans."""
+
+    old: ScanRecord
+    new: ScanRecord
+    newly_failing: List[ControlChange]
+    newly_passing: List[ControlChange]
+    other_changes: List[ControlChange]
+    unchanged: int
+
+
+class ScanHistory:
+    """
+    SQLite store of compliance scans.
+
+    Args:
+        path: Database file (parent directories are created)
+        keep_scans: Most recent scans retained, older ones are pruned when
+            a scan is recorded (None or 0 keeps every scan)
+    """
+
+    def __init__(self, path: Path, keep_scans: Optional[int] = None):
+        self.path = Path(path)
+        self.keep_scans = keep_scans
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+
+    def record(
+        self,
+        store: ComplianceResultStore,
+        checklist: Optional[str] = None,
+        scope: Optional[str] = None,
+        scan_time: Optional[datetime] = None,
+    ) -> int:
+        """Persist the outcomes of a scan and return its id."""
+        when = (scan_time or datetime.now()).isoformat(timespec="seconds")
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO scans (scan_time, checklist, scope, total, passed, failed, manual) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (when, checklist, scope, len(store), store.count(PASSED), store.count(FAILED), store.count(MANUAL)),
+            )
+            scan_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO regulation_summaries VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        scan_id,
+                        regulation,
+                        store.count(regulation=regulation),
+                        store.count(PASSED, regulation),
+                        store.count(FAILED, regulation),
+                        store.count(MANUAL, regulation),
+                    )
+                    for regulation in store.regulations
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO control_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (scan_id, control_key(o), o.index, o.regulation, o.requirement, o.status, when)
+                    for o in store
+                ],
+            )
+            if self.keep_scans:
+                # Summaries and control results go with their scan (ON DELETE CASCADE)
+                self._conn.execute(
+                    "DELETE FROM scans WHERE id <= (SELECT id FROM scans ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.keep_scans,),
+                )
+        return scan_id
+
+    def scans(self, limit: int = 20) -> List[ScanRecord]:
+        """Most recent scans, newest first."""
+        rows = self._conn.execute(
+            "SELECT id, scan_time, checklist, scope, total, passed, failed, manual "
+            "FROM scans ORDER BY id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [ScanRecord(*row) for row in rows]
+
+    def latest_id(self) -> Optional[int]:
+        row = self._conn.execute("SELECT MAX(id) FROM scans").fetchone()
+        return row[0]
+
+    def previous_id(self, scan_id: int) -> Optional[int]:
+        """Id of the scan recorded just before the given one."""
+        row = self._conn.execute("SELECT MAX(id) FROM scans WHERE id < ?", (scan_id,)).fetchone()
+        return row[0]
+
+    def get(self, scan_id: int) -> Optional[ScanRecord]:
+        row = self._conn.execute(
+            "SELECT id, scan_time, checklist, scope, total, passed, failed, manual FROM scans WHERE id = ?",
+            (scan_id,),
+        ).fetchone()
+        return ScanRecord(*row) if row else None
+
+    def trend(self, regulation: Optional[str] = None, limit: int = 30) -> List[TrendPoint]:
+        """Compliance over the last `limit` scans, oldest first."""
+        if regulation:
+            rows = self._conn.execute(
+                "SELECT s.id, s.scan_time, r.total, r.passed FROM regulation_summaries r "
+                "JOIN scans s ON s.id = r.scan_id WHERE r.regulation = ? "
+                "ORDER BY r.scan_id DESC LIMIT ?",
+                (regulation, limit),
+            ).fetchall()
+        else:
+            rows = self._conn.execute(
+                "SELECT id, scan_time, total, passed FROM scans ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [TrendPoint(*row) for row in reversed(rows)]
+
+    def regulations(self) -> List[str]:
+        """Regulations present in the history."""
+        rows = self._conn.execute("SELECT DISTINCT regulation FROM regulation_summaries ORDER BY regulation")
+        return [row[0] for row in rows]
+
+    def diff(self, old_id: int, new_id: int) -> Optional[ScanDiff]:
+        """Compare the control statuses of two scans (None if either is unknown)."""
+        old, new = self.get(old_id), self.get(new_id)
+        if old is None or new is None:
+            return None
+
+        # Full outer join on the control key (controls may be added or removed)
+        rows = self._conn.execute(
+            """
+            SELECT n.control_index, n.regulation, n.requirement, o.status, n.status
+            FROM control_results n
+            LEFT JOIN control_results o ON o.scan_id = ? AND o.control_key = n.control_key
+            WHERE n.scan_id = ?
+            UNION ALL
+            SELECT o.control_index, o.regulation, o.requirement, o.status, NULL
+            FROM control_results o
+            WHERE o.scan_id = ? AND NOT EXISTS (
+                SELECT 1 FROM control_results n WHERE n.scan_id = ? AND n.control_key = o.control_key
+            )
+            ORDER BY 1
+            """,
+            (old_id, new_id, old_id, new_id),
+        ).fetchall()
+
+        newly_failing: List[ControlChange] = []
+        newly_passing: List[ControlChange] = []
+        other: List[ControlChange] = []
+        unchanged = 0
+        for index, regulation, requirement, before, after in rows:
+            if before == after:
+                unchanged += 1
+                continue
+            change = ControlChange(index, regulation, requirement or "", before, after)
+            if after == FAILED:
+                newly_failing.append(change)
+            elif after == PASSED:
+                newly_passing.append(change)
+            else:
+                other.append(change)
+        return ScanDiff(old, new, newly_failing, newly_passing, other, unchanged)
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,87 @@
+"""
+Incremental re-validation support.
+
+After a scan, every resource type of the inventory is summarised by a
+fingerprint: an order-independent hash of each resource's identity and
+change markers (`changedTime`/`etag`), or of the whole projected row for
+Resource Graph inventories. A follow-up scan re-queries cheaply, compares
+fingerprints, and only the controls that depend on changed types are
+re-evaluated.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from .inventory import ResourceInventory
+from .records import as_dict
+
+# Fields compared for `az resource list` inventories
+FINGERPRINT_FIELDS = ("id", "changedTime", "etag")
+
+# JMESPath projection returning only the fingerprint fields
+FINGERPRINT_QUERY = "[].{id:id, type:type, changedTime:changedTime, etag:etag}"
+
+_MODULUS = 2 ** 64
+
+
+def fingerprint_resources(
+    resources: Iterable[Dict[str, Any]],
+    fields: Optional[Sequence[str]] = None
+) -> str:
+    """
+    Hash a set of resources independently of their order.
+
+    Args:
+        resources: Resources of a single type
+        fields: Fields to hash; None hashes the whole resource
+    """
+    total = 0
+    count = 0
+    for resource in resources:
+        if fields is None:
+            payload = json.dumps(as_dict(resource), sort_keys=True, default=str)
+        else:
+            values = (resource.get(f) for f in fields)
+            payload = "\x1f".join("" if v is None else str(v) for v in values)
+        digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest()
+        total = (total + int.from_bytes(digest, "big")) % _MODULUS
+        count += 1
+    return f"{count}:{total:016x}"
+
+
+def fingerprint_inventory(
+    inventory: ResourceInventory,
+    fields: Optional[Sequence[str]] = None
+) -> Dict[str, str]:
+    """Fingerprint every resource type of an inventory."""
+    return {t: fingerprint_resources(inventory.of_type(t), fields) for t in inventory.types}
+
+
+def changed_types(previous: Dict[str, str], current: Dict[str, str]) -> Set[str]:
+    """Resource types that appeared, disappeared or changed between scans."""
+    return {t for t in set(previous) | set(current) if previous.get(t) != current.get(t)}
+
+
+def controls_by_type(controls: Sequence[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """Map each normalized resource type to the indexes of controls that check it."""
+    mapping: Dict[str, List[int]] = {}
+    for index, control in enumerate(controls):
+        if control.get('manual_verification'):
+            continue
+        for requirement in control.get('azure_resources') or []:
+            resource_type = (requirement.get('type') or "").lower()
+            if resource_type and index not in mapping.setdefault(resource_type, []):
+                mapping[resource_type].append(index)
+    return mapping
+
+
+def dependent_controls(controls: Sequence[Dict[str, Any]], types: Iterable[str]) -> List[int]:
+    """Indexes of controls depending on any of the given resource types."""
+    mapping = controls_by_type(controls)
+    indexes: Set[int] = set()
+    for resource_type in types:
+        indexes.update(mapping.get(resource_type.lower(), []))
+    return sorted(indexes)
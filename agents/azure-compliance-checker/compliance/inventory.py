@@ -0,0 +1,161 @@
+"""
+In-memory Azure resource inventory.
+
+A full checklist scan used to run one `az resource list --resource-type X`
+call per resource requirement. The inventory is fetched once per scan and
+indexed by resource type, location and resource group so that every control
+is answered from memory. `compact()` reduces it to `ResourceRecord`s holding
+only the properties a checklist reads.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .evaluator import PropertyPath, ResourceColumns, compile_control
+from .records import RecordSchema
+
+# Backend whose payloads carry no `properties` (`az resource list`)
+RESOURCE_LIST = "resource-list"
+
+
+class ResourceInventory:
+    """
+    Azure resources indexed by type, location and resource group.
+
+    Resource types and locations are compared case-insensitively, matching
+    how ARM treats them.
+
+    Args:
+        resources: Resources shaped like `az resource list` output
+        source: Backend that produced the resources ("resource-list",
+            "resource-graph", or "synthetic" for generated benchmarks);
+            only resource-list payloads lack `properties`
+        projection: Paths captured per resource type when the backend
+            projected them (Resource Graph); None for whole payloads of
+            every type
+    """
+
+    def __init__(
+        self,
+        resources: Optional[Iterable[Dict[str, Any]]] = None,
+        source: str = RESOURCE_LIST,
+        projection: Optional[Dict[str, Sequence[str]]] = None
+    ):
+        self.source = source
+        self.projection = (
+            {_normalize(t): sorted(paths) for t, paths in projection.items()} if projection is not None else None
+        )
+        self._resources: List[Dict[str, Any]] = []
+        self._by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._by_location: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._by_resource_group: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._columns: Dict[str, ResourceColumns] = {}
+
+        for resource in resources or []:
+            self.add(resource)
+
+    def add(self, resource: Dict[str, Any]) -> None:
+        """Add a single resource to the inventory and its indexes."""
+        resource_type = _normalize(resource.get("type"))
+        self._resources.append(resource)
+        self._by_type[resource_type].append(resource)
+        self._columns.pop(resource_type, None)
+        self._by_location[_normalize(resource.get("location"))].append(resource)
+        self._by_resource_group[_normalize(resource.get("resourceGroup"))].append(resource)
+
+    def of_type(self, resource_type: str) -> List[Dict[str, Any]]:
+        """Return every resource of the given type (empty list if none)."""
+        return self._by_type.get(_normalize(resource_type), [])
+
+    def columns(self, resource_type: str) -> ResourceColumns:
+        """Return the resources of a type with cached property columns."""
+        key = _normalize(resource_type)
+        columns = self._columns.get(key)
+        if columns is None:
+            projected = self.projection.get(key) if self.projection is not None else None
+            columns = ResourceColumns(
+                self.of_type(key),
+                has_properties=self.has_properties,
+                paths=frozenset(projected) if projected is not None else None,
+                covered=self.projection is None or projected is not None
+            )
+            self._columns[key] = columns
+        return columns
+
+    def in_location(self, location: str, resource_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return resources deployed in a location, optionally filtered by type."""
+        resources = self._by_location.get(_normalize(location), [])
+        return _filter_type(resources, resource_type)
+
+    def in_resource_group(self, resource_group: str, resource_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return resources of a resource group, optionally filtered by type."""
+        resources = self._by_resource_group.get(_normalize(resource_group), [])
+        return _filter_type(resources, resource_type)
+
+    def compact(self, schema: RecordSchema) -> "ResourceInventory":
+        """Return a new inventory of compact records for the schema's paths."""
+        return ResourceInventory((schema.record(r) for r in self._resources), self.source, self.projection)
+
+    def replace_types(self, resources_by_type: Dict[str, List[Dict[str, Any]]]) -> "ResourceInventory":
+        """Return a new inventory where the given types hold the given resources."""
+        replaced = {_normalize(t) for t in resources_by_type}
+        kept = (r for r in self._resources if _normalize(r.get("type")) not in replaced)
+        inventory = ResourceInventory(kept, self.source, self.projection)
+        for resources in resources_by_type.values():
+            for resource in resources:
+                inventory.add(resource)
+        return inventory
+
+    @property
+    def has_properties(self) -> bool:
+        """Whether resources carry their `properties` payload."""
+        return self.source != RESOURCE_LIST
+
+    @property
+    def types(self) -> List[str]:
+        """Normalized resource types present in the inventory."""
+        return sorted(self._by_type)
+
+    @property
+    def locations(self) -> List[str]:
+        """Normalized locations present in the inventory."""
+        return sorted(self._by_location)
+
+    @property
+    def resource_groups(self) -> List[str]:
+        """Normalized resource group names present in the inventory."""
+        return sorted(self._by_resource_group)
+
+    def __len__(self) -> int:
+        return len(self._resources)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._resources)
+
+    def __contains__(self, resource_type: object) -> bool:
+        return isinstance(resource_type, str) and _normalize(resource_type) in self._by_type
+
+
+def record_schema(controls: Iterable[Dict[str, Any]], extra_fields: Iterable[str] = ()) -> RecordSchema:
+    """Schema capturing every property path validated by the controls."""
+    paths = [
+        check.path
+        for control in controls
+        for requirement in compile_control(control)
+        for check in requirement.checks
+    ]
+    paths.extend(PropertyPath.parse(f) for f in extra_fields)
+    return RecordSchema(paths)
+
+
+def _normalize(value: Optional[str]) -> str:
+    return (value or "").lower()
+
+
+def _filter_type(resources: List[Dict[str, Any]], resource_type: Optional[str]) -> List[Dict[str, Any]]:
+    if resource_type is None:
+        return resources
+    wanted = _normalize(resource_type)
+    return [r for r in resources if _normalize(r.get("type")) == wanted]
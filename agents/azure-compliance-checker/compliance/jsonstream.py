@@ -0,0 +1,167 @@
+"""
+Incremental parsing of Azure CLI JSON output.
+
+`az resource list` prints one JSON array that can reach hundreds of MB on
+large tenants. `JsonArrayParser` is fed the subprocess pipe chunk by chunk
+and returns each array element as soon as it is complete, so neither the
+full stdout string nor the full decoded list has to be held at once.
+`project_resource` then trims each resource to the fields a control reads.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from .evaluator import PropertyPath
+from .records import BASE_FIELDS
+
+_WHITESPACE = " \t\n\r"
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[,\]\s]")
+
+
+class JsonArrayParser:
+    """
+    Push parser yielding the elements of a top-level JSON array.
+
+    Nesting depth and string state are tracked across chunks, so an element
+    is decoded once, when its closing bracket arrives, however many chunks
+    it spans. A document that is not an array is decoded as a whole by
+    `close()` and returned as a single element.
+    """
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._mode = None  # None until the first character, then "array" or "document"
+        self._done = False
+        self._pending: List[str] = []  # text of the element (or document) read so far
+        self._element = None  # None between elements, else "scalar" or "nested"
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add bytes read from the pipe and return the elements they completed."""
+        return self._drain(self._utf8.decode(chunk))
+
+    def close(self) -> List[Any]:
+        """Signal end of input and return the remaining elements."""
+        items = self._drain(self._utf8.decode(b"", final=True))
+        text = "".join(self._pending)
+        self._pending = []
+        if self._mode == "document" and text.strip():
+            items.append(json.loads(text))
+        elif self._mode == "array":
+            if self._element is not None:
+                # Only a scalar can end with the input; anything else is cut short
+                items.append(json.loads(text))
+            if not self._done:
+                raise ValueError("Truncated JSON array")
+        return items
+
+    def _drain(self, text: str) -> List[Any]:
+        items: List[Any] = []
+        pos = 0
+        if self._mode is None:
+            pos = _skip(text, pos)
+            if pos == len(text):
+                return items
+            self._mode = "array" if text[pos] == "[" else "document"
+            if self._mode == "array":
+                pos += 1
+        if self._mode == "document":
+            self._pending.append(text[pos:])
+            return items
+
+        while not self._done:
+            start = pos
+            if self._element is None:
+                while pos < len(text) and (text[pos] in _WHITESPACE or text[pos] == ","):
+                    pos += 1
+                if pos == len(text):
+                    break
+                if text[pos] == "]":
+                    self._done = True
+                    break
+                start = pos
+                self._element = "nested" if text[pos] in "[{\"" else "scalar"
+
+            if self._element == "scalar":
+                match = _SCALAR_END.search(text, pos)
+                end = match.start() if match else None
+            else:
+                end = self._scan(text, pos)
+            if end is None:
+                self._pending.append(text[start:])
+                break
+
+            self._pending.append(text[start:end])
+            items.append(json.loads("".join(self._pending)))
+            self._pending = []
+            self._element = None
+            pos = end
+        return items
+
+    def _scan(self, text: str, pos: int) -> Optional[int]:
+        """Position just past the end of the current nested element, or None if it goes on."""
+        while True:
+            if self._escape:
+                if pos >= len(text):
+                    return None
+                pos += 1
+                self._escape = False
+            if self._in_string:
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    return None
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                    continue
+                self._in_string = False
+                if self._depth == 0:
+                    return pos  # a string element
+                continue
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                return None
+            pos = match.end()
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    return pos
+
+
+def project_resource(resource: Dict[str, Any], paths: Sequence[PropertyPath]) -> Dict[str, Any]:
+    """Keep the identity fields of a resource and the values at the given paths."""
+    projected = {name: resource[name] for name in BASE_FIELDS if name in resource}
+    for path in paths:
+        keys = path.segments
+        source: Any = resource
+        target = projected
+        for depth, key in enumerate(keys):
+            if not isinstance(key, str) or not isinstance(source, dict) or key not in source:
+                break
+            value = source[key]
+            # Copy whole values once the path leaves nested objects (list indexes, leaves)
+            if depth == len(keys) - 1 or not isinstance(keys[depth + 1], str) or not isinstance(value, dict):
+                target[key] = value
+                break
+            source = value
+            target = target.setdefault(key, {})
+    return projected
+
+
+def _skip(buffer: str, pos: int) -> int:
+    while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+        pos += 1
+    return pos
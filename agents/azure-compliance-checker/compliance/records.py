@@ -0,0 +1,147 @@
+"""
+Compact resource records.
+
+Raw `az` resources carry every tag, SKU, identity and properties blob while
+a checklist reads a handful of property paths. A `ResourceRecord` keeps the
+identity fields (with interned type, location and resource group strings)
+and a tuple of the values at the paths of a shared `RecordSchema`, which
+makes large inventories several times smaller and faster to iterate.
+Records answer `get()` like the dicts they replace, so inventory indexes,
+outcomes and reports work on either.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+# Identity fields stored as record attributes
+BASE_FIELDS = ("id", "name", "type", "location", "resourceGroup")
+
+
+class RecordSchema:
+    """
+    Property paths captured by records.
+
+    Args:
+        paths: Parsed property paths (objects with `path` and `segments`,
+            e.g. `PropertyPath`)
+    """
+
+    __slots__ = ("paths", "index")
+
+    def __init__(self, paths: Iterable[Any]):
+        unique: Dict[str, Any] = {}
+        for path in paths:
+            if path.path and path.path not in BASE_FIELDS:
+                unique.setdefault(path.path, path)
+        self.paths: Tuple[Any, ...] = tuple(unique.values())
+        self.index: Dict[str, int] = {path.path: i for i, path in enumerate(self.paths)}
+
+    def record(self, resource: Any) -> "ResourceRecord":
+        """Compact a resource dict (or re-project a record from another schema)."""
+        if isinstance(resource, ResourceRecord):
+            if resource.schema is self or resource.schema.index == self.index:
+                return resource
+            resource = resource.to_dict()
+        values = tuple(_walk(resource, path.segments) for path in self.paths)
+        return ResourceRecord(
+            resource.get("id"),
+            resource.get("name"),
+            _intern(resource.get("type")),
+            _intern(resource.get("location")),
+            _intern(resource.get("resourceGroup")),
+            self,
+            values,
+        )
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+
+class ResourceRecord:
+    """A resource reduced to its identity and the schema's property values."""
+
+    __slots__ = ("id", "name", "type", "location", "resourceGroup", "schema", "values")
+
+    def __init__(
+        self,
+        id: Optional[str],
+        name: Optional[str],
+        type: Optional[str],
+        location: Optional[str],
+        resourceGroup: Optional[str],
+        schema: RecordSchema,
+        values: Sequence[Any],
+    ):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.location = location
+        self.resourceGroup = resourceGroup
+        self.schema = schema
+        self.values = values
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access to identity fields and captured top-level paths."""
+        return self.value(key, default)
+
+    def value(self, path: str, default: Any = None) -> Any:
+        """Value captured at a property path (default when not in the schema)."""
+        if path in BASE_FIELDS:
+            value = getattr(self, path)
+        else:
+            index = self.schema.index.get(path)
+            value = None if index is None else self.values[index]
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Rebuild a nested resource dict holding the captured values."""
+        resource: Dict[str, Any] = {name: getattr(self, name) for name in BASE_FIELDS}
+        for path, value in zip(self.schema.paths, self.values):
+            if value is None:
+                continue
+            keys = [k for k in path.segments if isinstance(k, str)]
+            if len(keys) != len(path.segments):
+                # Indexed paths cannot be rebuilt faithfully; keep them flat
+                resource[path.path] = value
+                continue
+            target = resource
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+                if not isinstance(target, dict):
+                    break
+            else:
+                target[keys[-1]] = value
+        return resource
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ResourceRecord):
+            return NotImplemented
+        return self.id == other.id and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"ResourceRecord({self.id!r})"
+
+
+def as_dict(resource: Any) -> Dict[str, Any]:
+    """Return a plain dict for a resource dict or record."""
+    return resource.to_dict() if isinstance(resource, ResourceRecord) else resource
+
+
+def _walk(resource: Any, segments: Sequence[Any]) -> Any:
+    value = resource
+    for segment in segments:
+        if isinstance(segment, int):
+            if not isinstance(value, list) or not -len(value) <= segment < len(value):
+                return None
+            value = value[segment]
+        else:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(segment)
+    return value
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
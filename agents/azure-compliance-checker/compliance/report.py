@@ -0,0 +1,112 @@
+"""
+Text rendering of structured compliance results.
+
+Outcomes are only turned into markdown when a tool result or report is
+actually requested.
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+from .results import FAILED, MANUAL, PASSED, ControlOutcome, RequirementOutcome
+
+STATUS_ICONS = {PASSED: "✅", FAILED: "❌", MANUAL: "⚠️"}
+
+# Non-compliant resources listed per validation before truncating
+MAX_LISTED_RESOURCES = 3
+
+
+def render_control(outcome: ControlOutcome) -> str:
+    """Render a control outcome in the agent's validation format."""
+    control = outcome.control
+    text = f"\n{'='*80}\n"
+    text += f"Control #{outcome.index + 1}\n"
+    text += f"{'='*80}\n\n"
+
+    text += f"🏛️  **Réglementation**: {control.get('reglementation')}\n"
+    text += f"📋 **Exigence**: {control.get('exigence')}\n"
+    text += f"📄 **Preuve**: {control.get('preuve')}\n"
+    text += f"🔧 **Contrôle**: {control.get('controle')}\n\n"
+
+    if outcome.status == MANUAL and not outcome.requirements:
+        text += "⚠️  **Manual Verification Required**\n"
+        if control.get('notes'):
+            text += f"   Note: {control.get('notes')}\n"
+        text += "\n❓ **Status**: MANUAL CHECK REQUIRED\n"
+        return text
+
+    if not outcome.requirements:
+        text += "⚠️  No Azure resource validations defined\n"
+        return text
+
+    for requirement in outcome.requirements:
+        text += _render_requirement(requirement)
+
+    text += f"\n{'='*40}\n"
+    if outcome.status == PASSED:
+        text += "✅ **Status**: PASSED\n"
+    elif outcome.status == MANUAL:
+        text += "❓ **Status**: MANUAL CHECK REQUIRED\n"
+    else:
+        text += "❌ **Status**: FAILED\n"
+    text += f"{'='*40}\n"
+    return text
+
+
+def _render_requirement(requirement: RequirementOutcome) -> str:
+    text = f"\n🔍 Checking Resource Type: {requirement.resource_type}\n"
+    required = requirement.required
+
+    if requirement.error is not None:
+        if required:
+            return text + f"   ❌ FAILED: {requirement.error}\n"
+        return text + f"   ⚠️  WARNING: {requirement.error}\n"
+
+    if not requirement.found:
+        if required:
+            return text + "   ❌ FAILED: No resources found (required)\n"
+        return text + "   ⚠️  WARNING: No resources found (optional)\n"
+
+    at_least = "at least " if requirement.truncated else ""
+    text += f"   ✅ Found {at_least}{requirement.found} resource(s)\n"
+
+    if requirement.unevaluable is not None:
+        for check in requirement.checks:
+            text += f"      • Validating: {check.property} ({check.check})\n"
+        return text + f"   ❓ NOT EVALUATED: {requirement.unevaluable}\n"
+
+    sample = requirement.sample
+    if sample is not None:
+        text += (
+            f"   📊 Sampled {sample.sampled} resource(s) across {sample.strata} resource group/location strata: "
+            f"estimated pass rate {sample.estimate:.1%} ({sample.confidence:.0%} CI {sample.low:.1%}–{sample.high:.1%})\n"
+        )
+        if sample.escalated:
+            text += "   🔎 Estimate too close to the pass threshold: evaluated every resource\n"
+
+    non_compliant: List[str] = []
+    if any(not ok for ok in requirement.resource_outcomes):
+        non_compliant = requirement.non_compliant_ids()
+
+    for check in requirement.checks:
+        text += f"      • Validating: {check.property} ({check.check})\n"
+        expected = f" {check.expected}" if check.expected is not None else ""
+        icon = "✅" if check.compliant == check.total else ("⚠️ " if check.compliant else "❌")
+        text += f"         {icon} {check.compliant}/{check.total} resource(s) match{expected}\n"
+
+    for resource_id in non_compliant[:MAX_LISTED_RESOURCES]:
+        text += f"      - Non-compliant: {resource_id.rsplit('/', 1)[-1]}\n"
+    if len(non_compliant) > MAX_LISTED_RESOURCES:
+        text += f"      ... and {len(non_compliant) - MAX_LISTED_RESOURCES} more\n"
+
+    if requirement.checks and not requirement.satisfied:
+        if requirement.pass_rate is not None:
+            rule = f"at least {requirement.pass_rate:.0%} of resources"
+        else:
+            rule = "every resource" if requirement.match == "all" else "at least one resource"
+        if required:
+            text += f"   ❌ FAILED: Validations must pass for {rule}\n"
+        else:
+            text += f"   ⚠️  WARNING: Validations must pass for {rule} (optional)\n"
+    return text
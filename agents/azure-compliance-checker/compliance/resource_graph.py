@@ -0,0 +1,216 @@
+"""
+Azure Resource Graph backend for compliance scans.
+
+A loaded checklist is compiled into a query plan: resource requirements are
+grouped by type, types are grouped by Resource Graph table, and each table
+gets a single KQL query that projects only the property paths referenced by
+the checklist's `validation` entries. Results are paged with skip tokens and
+rebuilt into nested resource dicts so the rest of the engine does not care
+which backend produced them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from .evaluator import PropertyPath
+from .executor import AzureCliExecutor
+from .inventory import ResourceInventory
+
+# Columns returned for every resource, whatever the checklist references
+BASE_COLUMNS = ("id", "name", "type", "location", "resourceGroup", "subscriptionId")
+
+# Resource types that Resource Graph keeps outside the `resources` table.
+# Longest matching prefix wins.
+TABLE_PREFIXES = {
+    "microsoft.security/": "securityresources",
+    "microsoft.authorization/policy": "policyresources",
+    "microsoft.policyinsights/": "policyresources",
+    "microsoft.authorization/roleassignments": "authorizationresources",
+    "microsoft.authorization/roledefinitions": "authorizationresources",
+    "microsoft.recoveryservices/vaults/": "recoveryservicesresources",
+    "microsoft.resources/subscriptions": "resourcecontainers",
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+@dataclass
+class GraphQuery:
+    """A single Resource Graph query covering one table."""
+
+    table: str
+    types: List[str] = field(default_factory=list)
+    properties: List[str] = field(default_factory=list)
+
+    @property
+    def columns(self) -> Dict[str, str]:
+        """Projected column name -> property path for non-base properties."""
+        extra = [p for p in self.properties if p not in BASE_COLUMNS]
+        return {f"p{i}": path for i, path in enumerate(extra)}
+
+    def to_kql(self) -> str:
+        """Render the query as KQL."""
+        type_list = ", ".join(f"'{t}'" for t in self.types)
+        projections = list(BASE_COLUMNS)
+        projections.extend(f"{name} = {kql_path(path)}" for name, path in self.columns.items())
+        return "\n".join([
+            self.table,
+            f"| where type in~ ({type_list})",
+            f"| project {', '.join(projections)}",
+        ])
+
+
+@dataclass
+class QueryPlan:
+    """Set of Resource Graph queries answering a checklist."""
+
+    queries: List[GraphQuery] = field(default_factory=list)
+
+    @property
+    def types(self) -> List[str]:
+        return sorted(t for q in self.queries for t in q.types)
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+
+def table_for_type(resource_type: str) -> str:
+    """Return the Resource Graph table holding a resource type."""
+    normalized = resource_type.lower()
+    matches = [prefix for prefix in TABLE_PREFIXES if normalized.startswith(prefix)]
+    if not matches:
+        return "resources"
+    return TABLE_PREFIXES[max(matches, key=len)]
+
+
+def build_query_plan(controls: Iterable[Dict[str, Any]]) -> QueryPlan:
+    """
+    Compile checklist controls into a minimal set of Resource Graph queries.
+
+    Manual controls are skipped. Requirements on the same resource type are
+    merged and the union of their validation property paths is projected.
+    """
+    properties_by_type: Dict[str, set] = {}
+    for control in controls:
+        if control.get('manual_verification'):
+            continue
+        for requirement in control.get('azure_resources') or []:
+            resource_type = (requirement.get('type') or "").lower()
+            if not resource_type:
+                continue
+            paths = properties_by_type.setdefault(resource_type, set())
+            for validation in requirement.get('validation') or []:
+                if validation.get('property'):
+                    paths.add(validation['property'])
+
+    queries: Dict[str, GraphQuery] = {}
+    for resource_type in sorted(properties_by_type):
+        table = table_for_type(resource_type)
+        query = queries.setdefault(table, GraphQuery(table=table))
+        query.types.append(resource_type)
+        for path in properties_by_type[resource_type]:
+            if path not in query.properties:
+                query.properties.append(path)
+
+    for query in queries.values():
+        query.properties.sort()
+    return QueryPlan(queries=[queries[t] for t in sorted(queries)])
+
+
+def kql_path(path: str) -> str:
+    """Render a property path (e.g. `properties.ipRules[0].value`) as a KQL dynamic accessor."""
+    head, *rest = PropertyPath.parse(path).segments
+    rendered = str(head)
+    for segment in rest:
+        if isinstance(segment, int):
+            rendered += f"[{segment}]"
+        else:
+            rendered += f".{segment}" if _IDENTIFIER.match(segment) else f"['{segment}']"
+    return rendered
+
+
+def row_to_resource(row: Dict[str, Any], columns: Dict[str, str]) -> Dict[str, Any]:
+    """Rebuild a nested resource dict from a projected Resource Graph row."""
+    resource = {name: row.get(name) for name in BASE_COLUMNS}
+    for column, path in columns.items():
+        value = row.get(column)
+        if value is not None:
+            _assign(resource, PropertyPath.parse(path).segments, value)
+    return resource
+
+
+def _assign(target: Any, segments: tuple, value: Any) -> None:
+    # Create the dicts and lists along the path; give up on conflicting shapes
+    for depth, segment in enumerate(segments):
+        leaf = depth == len(segments) - 1
+        child = value if leaf else ([] if isinstance(segments[depth + 1], int) else {})
+        if isinstance(segment, int):
+            if not isinstance(target, list):
+                return
+            target.extend([None] * (segment + 1 - len(target)))
+            if leaf or target[segment] is None:
+                target[segment] = child
+            target = target[segment]
+        else:
+            if not isinstance(target, dict):
+                return
+            if leaf:
+                target[segment] = child
+            target = target.setdefault(segment, child)
+
+
+class ResourceGraphBackend:
+    """
+    Fetch resources with `az graph query` (requires the resource-graph extension).
+
+    Args:
+        executor: Azure CLI executor used to run the queries
+        page_size: Rows requested per page (Resource Graph allows up to 1000)
+    """
+
+    def __init__(self, executor: AzureCliExecutor, page_size: int = 1000):
+        self.executor = executor
+        self.page_size = page_size
+
+    async def fetch(self, plan: QueryPlan, refresh: bool = False) -> ResourceInventory:
+        """
+        Run every query of the plan concurrently and build an inventory.
+
+        Args:
+            plan: Query plan compiled from a checklist
+            refresh: Bypass cached responses
+        """
+        pages = await asyncio.gather(*(self._fetch_query(q, refresh) for q in plan.queries))
+        projection = {t: [*BASE_COLUMNS, *q.properties] for q in plan.queries for t in q.types}
+        inventory = ResourceInventory(source="resource-graph", projection=projection)
+        for resources in pages:
+            for resource in resources:
+                inventory.add(resource)
+        return inventory
+
+    async def _fetch_query(self, query: GraphQuery, refresh: bool) -> List[Dict[str, Any]]:
+        kql = query.to_kql()
+        columns = query.columns
+        resources: List[Dict[str, Any]] = []
+        skip_token: Optional[str] = None
+
+        while True:
+            args = ["graph", "query", "-q", kql, "--first", str(self.page_size)]
+            if skip_token:
+                args.extend(["--skip-token", skip_token])
+            response = await self.executor.run_json(args, refresh=refresh)
+
+            # Older CLI versions return the rows directly
+            if isinstance(response, list):
+                rows, skip_token = response, None
+            else:
+                rows = response.get("data") or []
+                skip_token = response.get("skip_token") or response.get("skipToken")
+
+            resources.extend(row_to_resource(row, columns) for row in rows)
+            if not skip_token:
+                return resources
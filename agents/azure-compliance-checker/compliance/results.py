@@ -0,0 +1,305 @@
+"""
+Structured compliance results.
+
+Validation produces typed outcomes (control -> resource requirements ->
+checks, with per-resource compliance flags) instead of rendered markdown.
+`ComplianceResultStore` keeps one row per control with status and
+regulation codes in compact arrays and maintains indexes by regulation and
+status, so summaries and remediation plans are lookups rather than rescans.
+Text is rendered from the outcomes only when a report is requested.
+"""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from .evaluator import CompiledRequirement, ResourceColumns
+
+PASSED = "PASSED"
+FAILED = "FAILED"
+MANUAL = "MANUAL"
+STATUSES = (PASSED, FAILED, MANUAL)
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+@dataclass
+class CheckOutcome:
+    """Aggregated outcome of one property validation."""
+
+    property: str
+    check: str
+    expected: Any = None
+    supported: bool = True
+    compliant: int = 0
+    total: int = 0
+
+
+@dataclass
+class SampleEstimate:
+    """Pass rate of a requirement estimated from a stratified sample."""
+
+    population: int
+    sampled: int
+    strata: int
+    passed: int
+    estimate: float
+    low: float
+    high: float
+    confidence: float
+    escalated: bool = False
+
+
+@dataclass
+class RequirementOutcome:
+    """
+    Outcome of one `azure_resources` entry of a control.
+
+    `unevaluable` holds why the checks could not be evaluated on the
+    resources found; such a requirement neither passes nor fails.
+    """
+
+    resource_type: str
+    required: bool = False
+    match: str = "any"
+    found: int = 0
+    error: Optional[str] = None
+    satisfied: bool = False
+    truncated: bool = False
+    checks: List[CheckOutcome] = field(default_factory=list)
+    resource_ids: List[str] = field(default_factory=list)
+    resource_outcomes: bytearray = field(default_factory=bytearray)
+    pass_rate: Optional[float] = None
+    sample: Optional[SampleEstimate] = None
+    unevaluable: Optional[str] = None
+
+    @classmethod
+    def from_evaluation(cls, requirement: CompiledRequirement, resources: ResourceColumns) -> "RequirementOutcome":
+        """Evaluate a compiled requirement against the resources of its type."""
+        outcome = cls(
+            resource_type=requirement.resource_type,
+            required=requirement.required,
+            match=requirement.match,
+            pass_rate=requirement.pass_rate,
+            found=len(resources),
+            truncated=resources.truncated,
+            resource_ids=[r.get('id') or r.get('name') or "" for r in resources.resources],
+        )
+        outcome.unevaluable = requirement.unevaluable_reason(resources)
+        if outcome.unevaluable is not None:
+            outcome.checks = [
+                CheckOutcome(property=check.path.path, check=check.check, expected=check.expected, supported=check.supported)
+                for check in requirement.checks
+            ]
+            return outcome
+        if not resources:
+            return outcome
+
+        evaluation = requirement.evaluate(resources)
+        outcome.resource_outcomes = bytearray(evaluation.resource_outcomes)
+        outcome.satisfied = evaluation.satisfied if requirement.checks else True
+        outcome.checks = [
+            CheckOutcome(
+                property=check.path.path,
+                check=check.check,
+                expected=check.expected,
+                compliant=sum(flags),
+                total=len(flags),
+            )
+            for check, flags in zip(requirement.checks, evaluation.check_outcomes)
+        ]
+        return outcome
+
+    @classmethod
+    def from_error(cls, requirement: CompiledRequirement, message: str) -> "RequirementOutcome":
+        """Record a requirement whose resources could not be queried."""
+        return cls(
+            resource_type=requirement.resource_type,
+            required=requirement.required,
+            match=requirement.match,
+            pass_rate=requirement.pass_rate,
+            error=message,
+        )
+
+    @property
+    def blocking(self) -> bool:
+        """True when this requirement makes its control fail."""
+        return self.required and not self.satisfied and self.unevaluable is None
+
+    def non_compliant_ids(self, limit: Optional[int] = None) -> List[str]:
+        ids = [rid for rid, ok in zip(self.resource_ids, self.resource_outcomes) if not ok]
+        return ids if limit is None else ids[:limit]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'resource_type': self.resource_type,
+            'required': self.required,
+            'match': self.match,
+            'found': self.found,
+            'truncated': self.truncated,
+            'error': self.error,
+            'satisfied': self.satisfied,
+            'checks': [vars(c).copy() for c in self.checks],
+            'non_compliant': self.non_compliant_ids(),
+            'sample': vars(self.sample).copy() if self.sample else None,
+            'unevaluable': self.unevaluable,
+        }
+
+
+@dataclass
+class ControlOutcome:
+    """Outcome of a checklist control."""
+
+    index: int
+    control: Dict[str, Any]
+    status: str
+    requirements: List[RequirementOutcome] = field(default_factory=list)
+
+    @classmethod
+    def from_requirements(
+        cls, index: int, control: Dict[str, Any], requirements: List[RequirementOutcome]
+    ) -> "ControlOutcome":
+        """
+        Derive the control status from its requirement outcomes: a control
+        that does not fail but has a required requirement that could not be
+        evaluated needs manual verification.
+        """
+        if not requirements or any(r.blocking for r in requirements):
+            status = FAILED
+        elif any(r.required and r.unevaluable is not None for r in requirements):
+            status = MANUAL
+        else:
+            status = PASSED
+        return cls(index=index, control=control, status=status, requirements=requirements)
+
+    @classmethod
+    def manual(cls, index: int, control: Dict[str, Any]) -> "ControlOutcome":
+        return cls(index=index, control=control, status=MANUAL)
+
+    @property
+    def regulation(self) -> str:
+        return self.control.get('reglementation') or "Unknown"
+
+    @property
+    def requirement(self) -> str:
+        return self.control.get('exigence') or ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index,
+            'regulation': self.regulation,
+            'requirement': self.requirement,
+            'control': self.control.get('controle'),
+            'status': self.status,
+            'resources': [r.to_dict() for r in self.requirements],
+        }
+
+
+class ComplianceResultStore:
+    """
+    Control outcomes with regulation/status indexes and O(1) counters.
+
+    Rows are keyed by control index; adding an outcome for an index that is
+    already stored replaces it and updates the indexes.
+    """
+
+    def __init__(self):
+        self._outcomes: List[ControlOutcome] = []
+        self._status = bytearray()
+        self._regulation = array('H')
+        self._regulations: List[str] = []
+        self._regulation_ids: Dict[str, int] = {}
+        self._row_by_index: Dict[int, int] = {}
+        self._rows_by_status: List[Dict[int, None]] = [{} for _ in STATUSES]
+        self._rows_by_regulation: List[Dict[int, None]] = []
+        self._counts: List[List[int]] = []
+
+    def add(self, outcome: ControlOutcome) -> None:
+        """Insert or replace the outcome of a control."""
+        status = _STATUS_CODES[outcome.status]
+        regulation = self._regulation_id(outcome.regulation)
+
+        row = self._row_by_index.get(outcome.index)
+        if row is None:
+            row = len(self._outcomes)
+            self._row_by_index[outcome.index] = row
+            self._outcomes.append(outcome)
+            self._status.append(status)
+            self._regulation.append(regulation)
+        else:
+            self._unindex(row)
+            self._outcomes[row] = outcome
+            self._status[row] = status
+            self._regulation[row] = regulation
+
+        self._rows_by_status[status][row] = None
+        self._rows_by_regulation[regulation][row] = None
+        self._counts[regulation][status] += 1
+
+    def get(self, index: int) -> Optional[ControlOutcome]:
+        row = self._row_by_index.get(index)
+        return None if row is None else self._outcomes[row]
+
+    def count(self, status: Optional[str] = None, regulation: Optional[str] = None) -> int:
+        """Number of controls, optionally restricted to a status and/or regulation."""
+        if regulation is not None:
+            reg_id = self._regulation_ids.get(regulation)
+            if reg_id is None:
+                return 0
+            if status is None:
+                return len(self._rows_by_regulation[reg_id])
+            return self._counts[reg_id][_STATUS_CODES[status]]
+        if status is not None:
+            return len(self._rows_by_status[_STATUS_CODES[status]])
+        return len(self._outcomes)
+
+    def compliance_rate(self, regulation: Optional[str] = None) -> float:
+        """Percentage of passed controls."""
+        total = self.count(regulation=regulation)
+        return (self.count(PASSED, regulation) / total * 100) if total else 0.0
+
+    @property
+    def regulations(self) -> List[str]:
+        """Regulations that have at least one control, sorted by name."""
+        return sorted(r for r, i in self._regulation_ids.items() if self._rows_by_regulation[i])
+
+    def select(self, status: Optional[str] = None, regulation: Optional[str] = None) -> List[ControlOutcome]:
+        """Outcomes matching a status and/or regulation, in control order."""
+        if status is not None and regulation is not None:
+            reg_rows = self._rows_by_regulation[self._regulation_ids[regulation]] \
+                if regulation in self._regulation_ids else {}
+            rows = [r for r in self._rows_by_status[_STATUS_CODES[status]] if r in reg_rows]
+        elif status is not None:
+            rows = list(self._rows_by_status[_STATUS_CODES[status]])
+        elif regulation is not None:
+            reg_id = self._regulation_ids.get(regulation)
+            rows = list(self._rows_by_regulation[reg_id]) if reg_id is not None else []
+        else:
+            rows = range(len(self._outcomes))
+        return sorted((self._outcomes[r] for r in rows), key=lambda o: o.index)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return [o.to_dict() for o in self]
+
+    def __iter__(self) -> Iterator[ControlOutcome]:
+        return iter(self.select())
+
+    def __len__(self) -> int:
+        return len(self._outcomes)
+
+    def _regulation_id(self, regulation: str) -> int:
+        reg_id = self._regulation_ids.get(regulation)
+        if reg_id is None:
+            reg_id = len(self._regulations)
+            self._regulation_ids[regulation] = reg_id
+            self._regulations.append(regulation)
+            self._rows_by_regulation.append({})
+            self._counts.append([0] * len(STATUSES))
+        return reg_id
+
+    def _unindex(self, row: int) -> None:
+        status, regulation = self._status[row], self._regulation[row]
+        del self._rows_by_status[status][row]
+        del self._rows_by_regulation[regulation][row]
+        self._counts[regulation][status] -= 1
@@ -0,0 +1,163 @@
+"""
+Statistical sampling of per-resource checks.
+
+On types with a very large number of resources (e.g. diagnostic settings
+across a whole tenant) evaluating every resource is the dominant cost of a
+scan. When sampling is enabled, a requirement is first evaluated on a
+stratified random sample: resources are grouped by resource group and
+location, and each stratum contributes in proportion to its size. The pass
+rate is estimated from the weighted stratum rates with a Wilson score
+interval.
+
+The sample decides the requirement when it is conclusive: a compliant
+resource settles `match: any`, a non-compliant one settles `match: all`,
+and a `pass_rate` threshold is settled when the estimate and its whole
+confidence interval lie on one side of it, further than `margin` away.
+Otherwise every resource is evaluated.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .evaluator import CompiledRequirement, ResourceColumns
+from .results import RequirementOutcome, SampleEstimate
+
+
+@dataclass
+class SamplingPolicy:
+    """
+    When and how much to sample.
+
+    Args:
+        min_resources: Smallest number of resources of a type that is sampled
+        sample_size: Resources evaluated per requirement
+        confidence: Confidence level of the reported interval
+        margin: Distance to the pass threshold within which every resource
+            is evaluated instead
+        seed: Random seed, for reproducible samples
+    """
+
+    min_resources: int = 10000
+    sample_size: int = 400
+    confidence: float = 0.95
+    margin: float = 0.05
+    seed: Optional[int] = None
+
+    def applies(self, requirement: CompiledRequirement, resources: ResourceColumns) -> bool:
+        return bool(requirement.checks) and len(resources) >= max(self.min_resources, self.sample_size + 1)
+
+
+def wilson_interval(rate: float, sampled: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """Wilson score interval of a proportion observed on `sampled` items."""
+    if sampled <= 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    denominator = 1 + z * z / sampled
+    center = (rate + z * z / (2 * sampled)) / denominator
+    spread = z * math.sqrt(rate * (1 - rate) / sampled + z * z / (4 * sampled * sampled)) / denominator
+    return max(0.0, center - spread), min(1.0, center + spread)
+
+
+def stratify(resources: Sequence[Dict[str, Any]]) -> Dict[Tuple[str, str], List[int]]:
+    """Resource indexes grouped by (resource group, location)."""
+    strata: Dict[Tuple[str, str], List[int]] = {}
+    for index, resource in enumerate(resources):
+        key = (
+            str(resource.get('resourceGroup') or "").lower(),
+            str(resource.get('location') or "").lower(),
+        )
+        strata.setdefault(key, []).append(index)
+    return strata
+
+
+def allocate(sizes: Sequence[int], total: int) -> List[int]:
+    """
+    Proportional sample size per stratum (largest remainder).
+
+    Every stratum gets at least one draw while the sample is large enough.
+    """
+    population = sum(sizes)
+    if total >= population:
+        return list(sizes)
+    quotas = [total * size / population for size in sizes]
+    floor = 1 if total >= len(sizes) else 0
+    counts = [min(size, max(floor, int(quota))) for size, quota in zip(sizes, quotas)]
+    while sum(counts) > total:
+        # The one-per-stratum floor overshot: take the excess from the largest allocation
+        counts[counts.index(max(counts))] -= 1
+    by_remainder = sorted(range(len(sizes)), key=lambda i: quotas[i] - int(quotas[i]), reverse=True)
+    while sum(counts) < total:
+        for i in by_remainder:
+            if sum(counts) >= total:
+                break
+            if counts[i] < sizes[i]:
+                counts[i] += 1
+    return counts
+
+
+def evaluate_sampled(
+    requirement: CompiledRequirement,
+    resources: ResourceColumns,
+    policy: Optional[SamplingPolicy],
+) -> RequirementOutcome:
+    """Evaluate a requirement on a sample when the policy allows it, otherwise on every resource."""
+    if policy is None or not policy.applies(requirement, resources) or requirement.unevaluable_reason(resources):
+        return RequirementOutcome.from_evaluation(requirement, resources)
+
+    rng = random.Random(policy.seed)
+    strata = list(stratify(resources.resources).values())
+    counts = allocate([len(stratum) for stratum in strata], policy.sample_size)
+    drawn = [rng.sample(stratum, count) for stratum, count in zip(strata, counts)]
+    indexes = [index for stratum in drawn for index in stratum]
+
+    sample = ResourceColumns([resources.resources[i] for i in indexes], truncated=resources.truncated)
+    flags = requirement.evaluate(sample).resource_outcomes
+
+    # Weighted by stratum size, so over-represented small strata do not skew the rate
+    rate, weight, position = 0.0, 0, 0
+    for stratum, count in zip(strata, counts):
+        if count:
+            rate += len(stratum) * sum(flags[position:position + count]) / count
+            weight += len(stratum)
+        position += count
+    rate = rate / weight if weight else 0.0
+    low, high = wilson_interval(rate, len(indexes), policy.confidence)
+
+    estimate = SampleEstimate(
+        population=len(resources),
+        sampled=len(indexes),
+        strata=len(strata),
+        passed=sum(flags),
+        estimate=rate,
+        low=low,
+        high=high,
+        confidence=policy.confidence,
+    )
+    satisfied = sample_decision(requirement, estimate, policy.margin)
+    if satisfied is None:
+        estimate.escalated = True
+        outcome = RequirementOutcome.from_evaluation(requirement, resources)
+    else:
+        outcome = RequirementOutcome.from_evaluation(requirement, sample)
+        outcome.found = len(resources)
+        outcome.satisfied = satisfied
+    outcome.sample = estimate
+    return outcome
+
+
+def sample_decision(requirement: CompiledRequirement, estimate: SampleEstimate, margin: float) -> Optional[bool]:
+    """Whether the sample satisfies the requirement, or None when every resource must be evaluated."""
+    if requirement.pass_rate is None:
+        if requirement.match == "all":
+            return False if estimate.passed < estimate.sampled else None
+        return True if estimate.passed else None
+
+    threshold = requirement.pass_rate
+    if abs(estimate.estimate - threshold) <= margin or estimate.low < threshold <= estimate.high:
+        return None
+    return estimate.estimate >= threshold
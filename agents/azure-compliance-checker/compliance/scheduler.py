@@ -0,0 +1,165 @@
+"""
+Priority scheduling of checklist controls.
+
+Controls are dispatched by the priority of their regulation (from the
+`regulations` section of config.yaml, or a control's own `priority`), then
+by estimated cost so cheap answers of a priority arrive first. Costs are
+learned per resource type from past Azure query durations and persisted
+between scans. At most a bounded number of controls run at once, so the
+dispatch order is also the order in which queries reach Azure, and a scan
+can stop early once enough critical controls have failed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+from .results import FAILED, ControlOutcome
+
+PRIORITY_RANKS = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+DEFAULT_PRIORITY = "medium"
+
+
+def regulation_priorities(regulations: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    """Map casefolded regulation names and config keys to their priority."""
+    priorities: Dict[str, str] = {}
+    for key, settings in (regulations or {}).items():
+        priority = str((settings or {}).get('priority') or DEFAULT_PRIORITY).lower()
+        priorities[str(key).casefold()] = priority
+        if (settings or {}).get('name'):
+            priorities[str(settings['name']).casefold()] = priority
+    return priorities
+
+
+def control_priority(control: Dict[str, Any], priorities: Dict[str, str]) -> str:
+    """Priority of a control: its own `priority`, else its regulation's."""
+    if control.get('priority'):
+        return str(control['priority']).lower()
+    regulation = str(control.get('reglementation') or "").casefold()
+    if regulation in priorities:
+        return priorities[regulation]
+    # Checklists may shorten names ("ACPR" for "ACPR – Gouvernance SI")
+    for name, priority in priorities.items():
+        if regulation and (name.startswith(regulation) or regulation.startswith(name)):
+            return priority
+    return DEFAULT_PRIORITY
+
+
+class CostModel:
+    """
+    Estimated query seconds per resource type.
+
+    Observations are folded into an exponentially weighted moving average;
+    unknown types are assumed to cost `default` seconds.
+
+    Args:
+        path: Optional JSON file the estimates are loaded from and saved to
+        alpha: Weight of a new observation
+        default: Estimate for types never observed
+    """
+
+    def __init__(self, path: Optional[Path] = None, alpha: float = 0.3, default: float = 1.0):
+        self.path = Path(path) if path else None
+        self.alpha = alpha
+        self.default = default
+        self.costs: Dict[str, float] = {}
+        if self.path is not None and self.path.exists():
+            try:
+                self.costs = {k: float(v) for k, v in json.loads(self.path.read_text()).items()}
+            except (ValueError, OSError, AttributeError):
+                self.costs = {}
+
+    def observe(self, resource_type: str, seconds: float) -> None:
+        key = resource_type.lower()
+        previous = self.costs.get(key)
+        self.costs[key] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    def estimate(self, control: Dict[str, Any]) -> float:
+        """Estimated seconds to validate a control (0 for manual controls)."""
+        if control.get('manual_verification'):
+            return 0.0
+        return sum(
+            self.costs.get(str(resource.get('type', '')).lower(), self.default)
+            for resource in control.get('azure_resources') or []
+        )
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        costs = {key: round(value, 4) for key, value in self.costs.items()}
+        self.path.write_text(json.dumps(costs, indent=2, sort_keys=True))
+
+
+def schedule(controls: Sequence[Dict[str, Any]], priorities: Dict[str, str], costs: CostModel) -> List[int]:
+    """Control indexes ordered by priority, then estimated cost, then file order."""
+    def key(index: int):
+        control = controls[index]
+        rank = PRIORITY_RANKS.get(control_priority(control, priorities), len(PRIORITY_RANKS))
+        return rank, costs.estimate(control), index
+
+    return sorted(range(len(controls)), key=key)
+
+
+class CriticalFailureLimit:
+    """
+    Early-termination rule: stop once `limit` critical controls have failed.
+
+    Args:
+        limit: Critical failures that end the scan (0 never stops)
+        critical: Indexes of the controls counted as critical
+    """
+
+    def __init__(self, limit: int, critical: Set[int]):
+        self.limit = limit
+        self.critical = critical
+        self.failures = 0
+
+    def __call__(self, outcome: ControlOutcome) -> bool:
+        if outcome.status == FAILED and outcome.index in self.critical:
+            self.failures += 1
+        return 0 < self.limit <= self.failures
+
+
+async def run_prioritized(
+    order: Sequence[int],
+    run: Callable[[int], Awaitable[ControlOutcome]],
+    concurrency: Callable[[], int],
+    stop: Optional[Callable[[ControlOutcome], bool]] = None,
+) -> AsyncIterator[ControlOutcome]:
+    """
+    Run controls in `order`, at most `concurrency()` at a time.
+
+    Outcomes are yielded as they complete. When `stop` returns True for an
+    outcome, controls still running are cancelled and the rest are never
+    started; the same happens if the consumer stops iterating.
+    """
+    position = {index: i for i, index in enumerate(order)}
+    pending = iter(order)
+    running: Dict["asyncio.Future[ControlOutcome]", int] = {}
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(running) < max(1, concurrency()):
+                index = next(pending, None)
+                if index is None:
+                    exhausted = True
+                    break
+                running[asyncio.ensure_future(run(index))] = index
+            if not running:
+                return
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            # Several controls may finish together: keep them in dispatch order
+            for task in sorted(done, key=lambda t: position[running[t]]):
+                del running[task]
+                outcome = task.result()
+                yield outcome
+                if stop is not None and stop(outcome):
+                    return
+    finally:
+        for task in running:
+            task.cancel()
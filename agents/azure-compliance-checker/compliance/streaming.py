@@ -0,0 +1,81 @@
+"""
+Streaming of control outcomes.
+
+Controls are yielded as soon as their validation completes rather than
+after the whole scan, and each outcome is appended to a JSON Lines file so
+that partial results survive an interrupted scan and nothing but the
+current line is buffered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, Optional, TypeVar
+
+from .results import ControlOutcome
+
+T = TypeVar("T")
+
+
+async def iter_completed(awaitables: Iterable[Awaitable[T]]) -> AsyncIterator[T]:
+    """
+    Yield results in completion order.
+
+    Pending work is cancelled if the consumer stops iterating early.
+    """
+    tasks = [asyncio.ensure_future(a) for a in awaitables]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class ResultStreamWriter:
+    """
+    Append-only JSON Lines log of a scan.
+
+    The file holds a `scan` record, one `control` record per outcome in
+    completion order, and a closing `summary` record.
+
+    Args:
+        path: Target `.jsonl` file (parent directories are created)
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self.written = 0
+
+    def start(self, checklist: Optional[str], controls: int) -> None:
+        self._write({
+            'type': 'scan',
+            'checklist': checklist,
+            'controls': controls,
+            'started': datetime.now().isoformat(),
+        })
+
+    def write(self, outcome: ControlOutcome) -> None:
+        self._write({'type': 'control', **outcome.to_dict()})
+        self.written += 1
+
+    def finish(self, summary: Dict[str, Any]) -> None:
+        self._write({'type': 'summary', 'finished': datetime.now().isoformat(), **summary})
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ResultStreamWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
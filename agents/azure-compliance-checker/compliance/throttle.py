@@ -0,0 +1,168 @@
+"""
+Adaptive concurrency for Azure CLI queries.
+
+ARM throttles callers with HTTP 429 once they exceed their request budget.
+`az` exits with status 1 like for any other failure, so throttling is
+recognised from its error output, together with the `Retry-After` delay
+when the service sends one. `AdaptiveLimiter` replaces a fixed semaphore
+with an AIMD window: the number of queries allowed in flight grows by one
+per window of successful queries and is cut multiplicatively on throttling,
+so the executor settles near the highest rate the API accepts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+_THROTTLED = re.compile(r"\b429\b|too ?many ?requests|throttl|rate ?limit", re.IGNORECASE)
+_RETRY_AFTER = re.compile(r"retry[-_ ]after['\"]?\s*[:=]?\s*['\"]?(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+def is_throttled(stderr: str) -> bool:
+    """Whether an Azure CLI error output reports throttling."""
+    return bool(_THROTTLED.search(stderr or ""))
+
+
+def retry_after_seconds(stderr: str) -> Optional[float]:
+    """`Retry-After` delay in seconds found in an error output, if any."""
+    match = _RETRY_AFTER.search(stderr or "")
+    return float(match.group(1)) if match else None
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 1.0,
+    cap: float = 60.0,
+    retry_after: Optional[float] = None,
+) -> float:
+    """
+    Delay before retrying a throttled query.
+
+    Honours `Retry-After` (plus a little jitter so waiting queries do not
+    retry in lockstep), otherwise uses exponential backoff with full jitter.
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class Ticket:
+    """A held slot; the caller reports how its query went before releasing it."""
+
+    __slots__ = ("epoch", "outcome", "retry_after")
+
+    def __init__(self, epoch: int):
+        self.epoch = epoch
+        self.outcome: Optional[str] = None
+        self.retry_after: Optional[float] = None
+
+    def succeeded(self) -> None:
+        self.outcome = "success"
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        self.outcome = "throttled"
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit adjusted by additive increase / multiplicative decrease.
+
+    Only queries started after the last decrease can trigger the next one, so
+    a burst of 429s from queries that were already in flight halves the
+    window once. A `Retry-After` pauses every new query until it elapses.
+
+    Args:
+        initial: Starting number of queries allowed in flight
+        min_limit: Lower bound of the window
+        max_limit: Upper bound of the window (defaults to `initial`)
+        decrease: Factor applied to the window on throttling
+        adaptive: When False the window stays at `initial` (throttled
+            queries are still paused and retried by the executor)
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        decrease: float = 0.5,
+        adaptive: bool = True,
+    ):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit if max_limit is not None else initial))
+        self.limit = float(min(max(int(initial), self.min_limit), self.max_limit))
+        self.decrease = decrease
+        self.adaptive = adaptive
+        self.throttle_count = 0
+        self._active = 0
+        self._epoch = 0
+        self._pause_until = 0.0
+        self._waiters: List["asyncio.Future[None]"] = []
+
+    @property
+    def window(self) -> int:
+        """Queries currently allowed in flight."""
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self) -> Ticket:
+        loop = asyncio.get_running_loop()
+        while True:
+            pause = self._pause_until - loop.time()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            if self._active < self.window:
+                self._active += 1
+                return Ticket(self._epoch)
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass the wake-up on if it arrived just before cancellation
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def release(self, ticket: Ticket) -> None:
+        self._active -= 1
+        if ticket.outcome == "success":
+            if self.adaptive:
+                # +1 per window of successes, i.e. roughly +1 per round trip
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        elif ticket.outcome == "throttled":
+            self.throttle_count += 1
+            if self.adaptive and ticket.epoch == self._epoch:
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+                self._epoch += 1
+            if ticket.retry_after:
+                loop = asyncio.get_running_loop()
+                self._pause_until = max(self._pause_until, loop.time() + ticket.retry_after)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Ticket]:
+        """Hold a slot for one query."""
+        ticket = await self.acquire()
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def _wake(self) -> None:
+        # Waiters already woken will take a slot when they resume
+        free = self.window - self._active - sum(1 for waiter in self._waiters if waiter.done())
+        for waiter in self._waiters:
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
@@ -0,0 +1,83 @@
+"""
+Output of the continuous watch mode.
+
+Each watch cycle writes a timestamped JSON and markdown report, refreshes
+`latest.json` / `latest.md`, prunes reports beyond a retention count, and
+rewrites `status.json`, a small machine-readable summary meant for
+monitoring (state, counts, drift since the previous cycle, next run).
+Every file is replaced atomically so readers never see a partial write.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .results import FAILED, PASSED, ComplianceResultStore
+
+# Watch states reported in status.json
+STATE_OK = "ok"
+STATE_DRIFT = "drift"
+STATE_ERROR = "error"
+
+
+def status_transitions(before: Dict[int, str], store: ComplianceResultStore) -> Dict[str, List[int]]:
+    """Control indexes that started failing or passing since `before`."""
+    newly_failing: List[int] = []
+    newly_passing: List[int] = []
+    for outcome in store:
+        previous = before.get(outcome.index)
+        if previous is None or previous == outcome.status:
+            continue
+        if outcome.status == FAILED:
+            newly_failing.append(outcome.index)
+        elif outcome.status == PASSED:
+            newly_passing.append(outcome.index)
+    return {'newly_failing': newly_failing, 'newly_passing': newly_passing}
+
+
+class WatchOutput:
+    """
+    Rolling reports and status file of a watch session.
+
+    Args:
+        directory: Output directory (created if missing)
+        keep: Timestamped reports of each format to retain
+    """
+
+    def __init__(self, directory: Path, keep: int = 10):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keep = max(1, keep)
+        self.status_path = self.directory / "status.json"
+
+    def write_reports(self, markdown: str, report: Dict[str, Any], when: datetime) -> Tuple[Path, Path]:
+        """Write a cycle's reports, refresh the `latest` copies and prune old ones."""
+        # Microseconds keep cycles shorter than a second apart distinct
+        stamp = when.strftime("%Y%m%d_%H%M%S_%f")
+        json_text = json.dumps(report, indent=2, ensure_ascii=False, default=str)
+        json_path = self.directory / f"report_{stamp}.json"
+        markdown_path = self.directory / f"report_{stamp}.md"
+
+        _atomic_write(json_path, json_text)
+        _atomic_write(markdown_path, markdown)
+        _atomic_write(self.directory / "latest.json", json_text)
+        _atomic_write(self.directory / "latest.md", markdown)
+
+        for pattern in ("report_*.json", "report_*.md"):
+            for old in sorted(self.directory.glob(pattern))[:-self.keep]:
+                old.unlink()
+        return json_path, markdown_path
+
+    def write_status(self, status: Dict[str, Any]) -> None:
+        _atomic_write(self.status_path, json.dumps(status, indent=2, ensure_ascii=False, default=str))
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the Azure CLI.
+
+Serves `az` commands used by the compliance checker from a JSON inventory
+file so that scans can be exercised without an Azure subscription.
+
+Usage:
+    FAKE_AZ_INVENTORY=inventory.json python scripts/fake-az.py resource list --output json
+
+Supported commands:
+    account show
+    resource list [--resource-type TYPE] [--subscription ID]
+    graph query -q KQL [--first N] [--skip-token TOKEN] [--subscriptions ID]
+
+Environment:
+    FAKE_AZ_INVENTORY   Path to a JSON list of resources with their properties
+                        (Resource Graph shape); like the real CLI, `resource
+                        list` returns them with `properties: null`
+    FAKE_AZ_NO_GRAPH    When set, `graph query` fails, to exercise the
+                        fallback to `az resource list`
+    FAKE_AZ_SUBSCRIPTION  Subscription id reported by `account show`, to
+                        exercise `az account set` between scans
+    FAKE_AZ_LATENCY     Optional delay in seconds added to every call
+    FAKE_AZ_THROTTLE    Optional probability (0-1) that a query fails with
+                        an ARM 429 error, to exercise throttling handling
+
+Only the KQL subset emitted by compliance.resource_graph is understood:
+a table name, `| where type in~ (...)` and `| project col, alias = path`.
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+FAKE_SUBSCRIPTION = {
+    "id": "00000000-0000-0000-0000-000000000000",
+    "name": "fake-subscription",
+    "tenantId": "11111111-1111-1111-1111-111111111111",
+    "state": "Enabled",
+}
+
+_PATH_PART = re.compile(r"\['([^']*)'\]|\[(\d+)\]|\.?([A-Za-z_][A-Za-z0-9_]*)")
+
+
+def load_inventory(subscription: Optional[str] = None) -> List[Dict[str, Any]]:
+    path = os.environ.get("FAKE_AZ_INVENTORY")
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        resources = json.load(f)
+    if subscription:
+        prefix = f"/subscriptions/{subscription.lower()}/"
+        resources = [r for r in resources if (r.get("id") or "").lower().startswith(prefix)]
+    return resources
+
+
+def option(args: List[str], *names: str) -> Optional[str]:
+    for name in names:
+        if name in args:
+            index = args.index(name)
+            if index + 1 < len(args):
+                return args[index + 1]
+    return None
+
+
+def resolve(resource: Dict[str, Any], path: str) -> Any:
+    value: Any = resource
+    for quoted, index, plain in _PATH_PART.findall(path):
+        if index:
+            value = value[int(index)] if isinstance(value, list) and int(index) < len(value) else None
+        elif isinstance(value, dict):
+            value = value.get(quoted or plain)
+        else:
+            return None
+    return value
+
+
+def resource_list(args: List[str]) -> Any:
+    resources = load_inventory(option(args, "--subscription"))
+    resource_type = option(args, "--resource-type")
+    if resource_type:
+        resources = [r for r in resources if (r.get("type") or "").lower() == resource_type.lower()]
+    # The real `az resource list` never returns resource properties
+    return [dict(r, properties=None) for r in resources]
+
+
+def graph_query(args: List[str]) -> Any:
+    kql = option(args, "-q", "--graph-query") or ""
+    first = int(option(args, "--first") or 100)
+    offset = int(option(args, "--skip-token") or 0)
+
+    types = None
+    projections = None
+    for clause in [c.strip() for c in kql.split("|")[1:]]:
+        if clause.startswith("where type in~"):
+            types = {t.lower() for t in re.findall(r"'([^']*)'", clause)}
+        elif clause.startswith("project "):
+            projections = [p.strip() for p in clause[len("project "):].split(",")]
+
+    rows = []
+    for resource in load_inventory(option(args, "--subscriptions")):
+        if types is not None and (resource.get("type") or "").lower() not in types:
+            continue
+        if projections is None:
+            rows.append(resource)
+            continue
+        row = {}
+        for projection in projections:
+            alias, _, path = projection.partition("=")
+            alias, path = alias.strip(), (path.strip() or alias.strip())
+            row[alias] = resolve(resource, path)
+        rows.append(row)
+
+    page = rows[offset:offset + first]
+    next_offset = offset + first
+    return {
+        "count": len(page),
+        "data": page,
+        "skip_token": str(next_offset) if next_offset < len(rows) else None,
+        "total_records": len(rows),
+    }
+
+
+def main(argv: List[str]) -> int:
+    latency = float(os.environ.get("FAKE_AZ_LATENCY", "0") or 0)
+    if latency:
+        time.sleep(latency)
+
+    throttle = float(os.environ.get("FAKE_AZ_THROTTLE", "0") or 0)
+    if argv[:2] != ["account", "show"] and random.random() < throttle:
+        sys.stderr.write(
+            "ERROR: (TooManyRequests) Number of requests exceeded the limit. "
+            "Code: TooManyRequests Status: 429 Retry-After: 1\n"
+        )
+        return 1
+
+    if argv[:2] == ["account", "show"]:
+        output = dict(FAKE_SUBSCRIPTION, id=os.environ.get("FAKE_AZ_SUBSCRIPTION") or FAKE_SUBSCRIPTION["id"])
+    elif argv[:2] == ["resource", "list"]:
+        output = resource_list(argv[2:])
+    elif argv[:2] == ["graph", "query"]:
+        if os.environ.get("FAKE_AZ_NO_GRAPH"):
+            sys.stderr.write("ERROR: (ResourceGraphUnavailable) Resource Graph is not available.\n")
+            return 1
+        output = graph_query(argv[2:])
+    else:
+        sys.stderr.write(f"ERROR: fake-az does not support: az {' '.join(argv)}\n")
+        return 2
+
+    json.dump(output, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic inventory snapshot for benchmarking.
+
+Resources are spread over the resource types referenced by a checklist and
+carry every property its validations read, compliant or not at random. The
+same seed always produces the same snapshot, so scans can be timed
+deterministically at any size.
+
+Usage:
+    python scripts/synthetic-snapshot.py --resources 100000 --output snapshots/bench-100k.jsonl.gz
+    python agent.py --snapshot snapshots/bench-100k.jsonl.gz
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from compliance.checklists import ChecklistCache
+from compliance.snapshot import SnapshotHeader, write_resources
+
+LOCATIONS = ["francecentral", "westeurope", "northeurope"]
+
+
+def sample_value(check: Dict[str, Any], rng: random.Random) -> Any:
+    """Return a value that satisfies the check most of the time."""
+    compliant = rng.random() < 0.8
+    kind = check.get('check')
+    expected = check.get('value')
+    if kind == 'exists':
+        return {"enabled": True} if compliant else None
+    if kind in ('in', 'containsAny') and isinstance(expected, list) and expected:
+        value = rng.choice(expected) if compliant else "other"
+        return [value] if kind == 'containsAny' else value
+    if kind in ('greaterThan', 'greaterThanOrEqual'):
+        return (expected or 0) + (1 if compliant else -1)
+    if kind in ('lessThan', 'lessThanOrEqual'):
+        return (expected or 0) - (1 if compliant else -1)
+    if kind == 'contains':
+        return f"x-{expected}-x" if compliant else "x"
+    return expected if compliant else "Other"
+
+
+def set_path(resource: Dict[str, Any], path: str, value: Any) -> None:
+    *parents, leaf = path.split(".")
+    target = resource
+    for part in parents:
+        target = target.setdefault(part, {})
+    target[leaf] = value
+
+
+def generate(requirements: List[Dict[str, Any]], count: int, subscriptions: int, seed: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for i in range(count):
+        requirement = requirements[i % len(requirements)]
+        resource_type = requirement['type']
+        subscription = f"{i % subscriptions:08d}-0000-0000-0000-000000000000"
+        group = f"rg-{i % 50:02d}"
+        name = f"res-{i:07d}"
+        resource = {
+            "id": f"/subscriptions/{subscription}/resourceGroups/{group}/providers/{resource_type}/{name}",
+            "name": name,
+            "type": resource_type,
+            "location": rng.choice(LOCATIONS),
+            "resourceGroup": group,
+        }
+        for check in requirement.get('validation') or []:
+            value = sample_value(check, rng)
+            if value is not None:
+                set_path(resource, check['property'], value)
+        yield resource
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic inventory snapshot")
+    parser.add_argument('--checklist', type=Path,
+                        default=Path(__file__).parent.parent / "checklists" / "french-fsi-regulations.yaml")
+    parser.add_argument('--resources', type=int, default=10000)
+    parser.add_argument('--subscriptions', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, required=True)
+    args = parser.parse_args()
+
+    checklist = ChecklistCache().load(args.checklist)
+    requirements = [
+        requirement
+        for control in checklist['checklist'] if not control.get('manual_verification')
+        for requirement in control.get('azure_resources') or [] if requirement.get('type')
+    ]
+    if not requirements:
+        sys.stderr.write(f"No resource requirements in {args.checklist}\n")
+        return 1
+
+    header = SnapshotHeader(
+        created=datetime.now().isoformat(),
+        source="synthetic",
+        resources=args.resources,
+        types=sorted({r['type'].lower() for r in requirements}),
+        metadata={'synthetic': True, 'seed': args.seed, 'checklist': args.checklist.name},
+    )
+    write_resources(args.output, header, generate(requirements, args.resources, max(1, args.subscriptions), args.seed))
+    print(f"Wrote {args.resources} resource(s) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
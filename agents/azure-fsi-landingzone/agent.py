@@ -27,7 +27,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from shared.agents import InteractiveAgent
 from shared.utils import setup_logging
-from shared.utils.bicep_linter import lint_bicep_targets, format_lint_report
+from shared.utils.bicep_linter import LINT_CACHE_FILE, lint_bicep_targets_async, format_lint_report
 from claude_agent_sdk import tool, AssistantMessage, TextBlock
 
 
@@ -408,20 +408,20 @@ User: "Clean up lint warnings before deployment"
 
         return base_prompt
 
-    def _run_bicep_linter(self, targets: Optional[List[Path]] = None) -> str:
+    async def _run_bicep_linter(self, targets: Optional[List[Path]] = None) -> str:
         """Run the lightweight Bicep linter on provided targets or current project."""
         lint_targets: List[Path] = []
+        project_dir = self._get_project_path_if_available()
 
         if targets:
             lint_targets.extend(targets)
+        elif project_dir is None:
+            return "❌ Project name not set. Use set_project_name before running the linter."
         else:
-            try:
-                project_dir = self.get_project_dir()
-            except ValueError:
-                return "❌ Project name not set. Use set_project_name before running the linter."
             lint_targets.append(project_dir)
 
-        results = lint_bicep_targets(lint_targets)
+        cache = project_dir / LINT_CACHE_FILE if project_dir is not None else None
+        results = await lint_bicep_targets_async(lint_targets, cache=cache)
         return format_lint_report(results)
 
     def _get_project_path_if_available(self) -> Optional[Path]:
@@ -1432,7 +1432,7 @@ main
         with open(template_path, 'w') as f:
             f.write(bicep_content)
 
-        lint_results = lint_bicep_targets([template_path])
+        lint_results = await lint_bicep_targets_async([template_path], cache=project_dir / LINT_CACHE_FILE)
         lint_report = format_lint_report(lint_results)
 
         preview_content = template_path.read_text()
@@ -1480,7 +1480,7 @@ main
 
             targets = [candidate]
 
-        report = self._run_bicep_linter(targets)
+        report = await self._run_bicep_linter(targets)
         return {
             "content": [
                 {"type": "text", "text": report}
@@ -2673,7 +2673,7 @@ output bastionDnsName string = bastionPublicIP.properties.dnsSettings.fqdn
         with open(template_path, 'w') as f:
             f.write(bicep_content)
 
-        lint_results = lint_bicep_targets([template_path])
+        lint_results = await lint_bicep_targets_async([template_path], cache=project_dir / LINT_CACHE_FILE)
         lint_report = format_lint_report(lint_results)
 
         result_text = f"✅ Generated Azure Bastion template\n\n"
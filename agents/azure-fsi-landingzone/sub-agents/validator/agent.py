@@ -13,7 +13,7 @@ from typing import AsyncIterator, Dict, Optional
 
 from claude_agent_sdk import AssistantMessage, TextBlock
 
-from shared.utils.bicep_linter import lint_bicep_targets, format_lint_report
+from shared.utils.bicep_linter import LINT_CACHE_FILE, lint_bicep_targets_async, format_lint_report
 from shared.utils.logging import get_logger
 from ..base import BaseSpecialistAgent
 
@@ -62,7 +62,8 @@ class ValidatorSpecialistAgent:
             )
             return
 
-        results = lint_bicep_targets([project_path])
+        cache_dir = project_path if project_path.is_dir() else project_path.parent
+        results = await lint_bicep_targets_async([project_path], cache=cache_dir / LINT_CACHE_FILE)
         report = format_lint_report(results)
 
         summary_lines = [
@@ -1,23 +1,49 @@
 """
 Utility helpers for linting and auto-fixing Bicep templates.
 
-These helpers provide lightweight static analysis that focuses on the two
-warning classes we routinely see when running `bicep build` / `az deployment`:
+These helpers provide lightweight static analysis without relying on the
+Bicep CLI being available in the execution environment. Two rules fix the
+warning classes we routinely see when running `bicep build` /
+`az deployment`:
 
 1. `no-unused-params` – parameters declared but never referenced.
 2. `no-unnecessary-dependson` – explicit dependsOn entries that the compiler
    can infer automatically.
 
-The goal is to keep generated infrastructure templates warning-free without
-relying on the Bicep CLI being available in the execution environment.
+The other registered rules only report: `no-hardcoded-location`,
+`secure-secrets-in-params`, `prefer-avm-module`,
+`missing-diagnostic-settings` and `fsi-required-tags`.
+
+Each file is tokenized and parsed once, in a single linear pass, into a
+`BicepModel`: a symbol table of the top-level declarations (params, vars,
+resources, modules, outputs, ...), a reference map of every identifier
+used in an expression, and the object properties of each declaration.
+Comments and string literals are tokens of their own, so names inside them
+are never mistaken for references; string interpolations are parsed as
+expressions.
+
+Rules are `LintRule` subclasses added to `RULES` with `@register_rule`.
+Each declares the node kinds it inspects, and the engine dispatches every
+node to the interested rules in a single traversal of the shared model.
+Rules report `BicepDiagnostic`s (with line and column) and may fix the
+file through text edits.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+import hashlib
+from itertools import repeat
+import json
+import math
+import multiprocessing
+import os
 from pathlib import Path
 import re
-from typing import Iterable, List
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
 
 
 @dataclass
@@ -27,34 +53,219 @@ class BicepLintResult:
     file: Path
     removed_parameters: List[str] = field(default_factory=list)
     removed_dependson: List[str] = field(default_factory=list)
+    diagnostics: List["BicepDiagnostic"] = field(default_factory=list)
 
     @property
     def changed(self) -> bool:
         return bool(self.removed_parameters or self.removed_dependson)
 
+    @property
+    def findings(self) -> List["BicepDiagnostic"]:
+        """Diagnostics that were not auto-fixed."""
+        return [d for d in self.diagnostics if not d.fixed]
+
+
+# Fewest files worth starting a process pool for, and chunks handed to each worker
+PARALLEL_MIN_FILES = 16
+CHUNKS_PER_WORKER = 4
+
+# Bump when the parser or engine changes what any rule reports or fixes
+LINTER_VERSION = 1
+
+# Lint cache file name, kept in the project directory
+LINT_CACHE_FILE = ".bicep-lint-cache"
+
 
-def lint_bicep_targets(targets: Iterable[Path]) -> List[BicepLintResult]:
+def lint_bicep_targets(
+    targets: Iterable[Path],
+    rules: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    cache: Optional[Path] = None,
+) -> List[BicepLintResult]:
     """
     Lint and auto-fix a collection of Bicep files/directories.
 
+    Large trees are linted in parallel: the sorted files are split into
+    contiguous chunks that a process pool works through, and the chunks'
+    results are joined back in order, so the output does not depend on
+    scheduling. Rules run in the workers, so custom rules must be
+    registered when their module is imported.
+
+    With a `cache` file, a file whose content was linted before by the
+    same linter and rule versions is not parsed again: its diagnostics
+    come from the cache and its cached fixed output is written back.
+
     Args:
         targets: Iterable of file system paths (files or directories).
+        rules: Ids of the rules to run (every registered rule by default).
+        workers: Worker processes; 1 lints serially in the calling process.
+            By default one per CPU once there are PARALLEL_MIN_FILES files.
+        cache: Lint cache file (usually LINT_CACHE_FILE in the project
+            directory); None lints every file.
 
     Returns:
         List of lint results ordered by path.
     """
+    files = _collect_bicep_files(targets)
+    rule_ids = tuple(RULES) if rules is None else tuple(rules)
+    if cache is None:
+        return _lint_files(files, rule_ids, workers)
+
+    store = LintCache(cache)
+    version = ruleset_version(rule_ids)
+    cached: Dict[Path, BicepLintResult] = {}
+    keys: Dict[Path, str] = {}
+    for file_path in files:
+        key = store.key(file_path.read_text(encoding="utf-8"), version)
+        entry = store.get(key)
+        if entry is None:
+            keys[file_path] = key
+        else:
+            cached[file_path] = _cached_result(file_path, entry)
+
+    for result in _lint_files(list(keys), rule_ids, workers):
+        fixed = result.file.read_text(encoding="utf-8") if result.changed else None
+        store.put(keys[result.file], _cache_entry(result, fixed))
+        cached[result.file] = result
+    store.save()
+    return [cached[file_path] for file_path in files]
+
+
+def _lint_files(files: List[Path], rules: Tuple[str, ...], workers: Optional[int]) -> List[BicepLintResult]:
+    """
+    Lint files in order, across a process pool when there are enough of them.
+
+    Workers are spawned rather than forked: callers run this from threads
+    (`lint_bicep_targets_async`), and forking a threaded process can copy
+    locks held by other threads and deadlock the children.
+    """
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(files) >= PARALLEL_MIN_FILES else 1
+    workers = min(workers, len(files))
+
+    if workers > 1:
+        size = math.ceil(len(files) / (workers * CHUNKS_PER_WORKER))
+        chunks = [files[i:i + size] for i in range(0, len(files), size)]
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_register_rules,
+                initargs=(tuple(RULES[rule_id] for rule_id in rules),),
+            ) as executor:
+                return [result for chunk in executor.map(_lint_chunk, chunks, repeat(rules)) for result in chunk]
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            pass  # no usable process support here: lint serially
+
+    return _lint_chunk(files, rules)
+
+
+async def lint_bicep_targets_async(
+    targets: Iterable[Path],
+    rules: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    cache: Optional[Path] = None,
+) -> List[BicepLintResult]:
+    """`lint_bicep_targets` run in a worker thread, leaving the event loop free."""
+    return await asyncio.to_thread(lint_bicep_targets, list(targets), rules, workers, cache)
+
+
+def _collect_bicep_files(targets: Iterable[Path]) -> List[Path]:
+    """Sorted, de-duplicated Bicep files of the targets."""
     files: List[Path] = []
     for target in targets:
         if target.is_file() and target.suffix == ".bicep":
             files.append(target)
         elif target.is_dir():
-            files.extend(sorted(target.rglob("*.bicep")))
+            files.extend(target.rglob("*.bicep"))
+    return sorted(set(files))
+
+
+def _register_rules(rules: Tuple[Type[LintRule], ...]) -> None:
+    # Spawned workers only import this module: re-add rules registered elsewhere
+    for rule in rules:
+        RULES.setdefault(rule.id, rule)
+
+
+def _lint_chunk(files: List[Path], rules: Tuple[str, ...]) -> List[BicepLintResult]:
+    return [_lint_single_file(file_path, rules) for file_path in files]
+
+
+def ruleset_version(rules: Iterable[str]) -> str:
+    """The linter and rule versions that lint results depend on."""
+    return ";".join([f"linter@{LINTER_VERSION}", *(f"{rule}@{RULES[rule].version}" for rule in sorted(rules))])
+
+
+class LintCache:
+    """
+    Persistent lint results keyed by file content and rule-set version.
+
+    Entries hold the diagnostics, the fixed parameter/dependsOn names and
+    the fixed output (None when the file needed no fix). They live in one
+    JSON file, rewritten atomically; the `max_entries` most recently used
+    entries are kept.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 2000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if isinstance(data, dict) and isinstance(data.get("entries"), dict):
+                self._entries = data["entries"]
+        except (OSError, ValueError):
+            pass
+        self._clock = max((entry.get("used", 0) for entry in self._entries.values()), default=0)
+
+    @staticmethod
+    def key(text: str, version: str) -> str:
+        return hashlib.sha256(f"{version}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._clock += 1
+            entry["used"] = self._clock
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        self._clock += 1
+        self._entries[key] = dict(entry, used=self._clock)
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache if entries were added, dropping the least recently used."""
+        if not self._dirty:
+            return
+        entries = sorted(self._entries.items(), key=lambda item: item[1].get("used", 0))[-self.max_entries:]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"entries": dict(entries)}), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = False
 
-    results: List[BicepLintResult] = []
-    for file_path in sorted(set(files)):
-        results.append(_lint_single_file(file_path))
 
-    return results
+def _cache_entry(result: BicepLintResult, fixed: Optional[str]) -> dict:
+    return {
+        "fixed": fixed,
+        "removed_parameters": result.removed_parameters,
+        "removed_dependson": result.removed_dependson,
+        "diagnostics": [asdict(d) for d in result.diagnostics],
+    }
+
+
+def _cached_result(path: Path, entry: dict) -> BicepLintResult:
+    """Result of a cache hit, writing the cached fixed output back to the file."""
+    if entry.get("fixed") is not None:
+        path.write_text(entry["fixed"], encoding="utf-8")
+    return BicepLintResult(
+        file=path,
+        removed_parameters=list(entry.get("removed_parameters", [])),
+        removed_dependson=list(entry.get("removed_dependson", [])),
+        diagnostics=[BicepDiagnostic(**d) for d in entry.get("diagnostics", [])],
+    )
 
 
 def format_lint_report(results: List[BicepLintResult]) -> str:
@@ -65,13 +276,13 @@ def format_lint_report(results: List[BicepLintResult]) -> str:
         return "✅ No Bicep files found to lint."
 
     changed_files = [r for r in results if r.changed]
-    if not changed_files:
+    flagged_files = [r for r in results if r.findings]
+    if not changed_files and not flagged_files:
         return "✅ Bicep lint completed – no changes required."
 
-    report_lines: List[str] = [
-        "🛠️  Bicep Linter Auto-Fixes Applied:",
-        "",
-    ]
+    report_lines: List[str] = []
+    if changed_files:
+        report_lines.extend(["🛠️  Bicep Linter Auto-Fixes Applied:", ""])
 
     for result in changed_files:
         report_lines.append(f"- {result.file}")
@@ -81,145 +292,1024 @@ def format_lint_report(results: List[BicepLintResult]) -> str:
         if result.removed_dependson:
             removed = ", ".join(result.removed_dependson)
             report_lines.append(f"  • Removed redundant dependsOn entries: {removed}")
+
+    if flagged_files:
+        if report_lines:
+            report_lines.append("")
+        count = sum(len(r.findings) for r in flagged_files)
+        report_lines.extend([f"🔎 Bicep Lint Findings ({count}):", ""])
+    for result in flagged_files:
+        report_lines.append(f"- {result.file}")
+        for diagnostic in result.findings:
+            report_lines.append(
+                f"  • {diagnostic.line}:{diagnostic.column} {diagnostic.severity} "
+                f"[{diagnostic.rule}] {diagnostic.message}"
+            )
     return "\n".join(report_lines)
 
 
 # ---------------------------------------------------------------------------
-# Internal helpers
+# Tokenizer
 # ---------------------------------------------------------------------------
 
-_PARAM_PATTERN = re.compile(r"^\s*param\s+([a-zA-Z_][\w]*)\b.*$", re.MULTILINE)
+IDENT = "ident"
+NUMBER = "number"
+STRING = "string"
+PUNCT = "punct"
+NEWLINE = "newline"
 
 
-def _lint_single_file(path: Path) -> BicepLintResult:
-    """Lint and auto-fix a single Bicep file."""
-    original_text = path.read_text(encoding="utf-8")
-    updated_text = original_text
+class Token(NamedTuple):
+    """A lexical token; `line` and `column` are 1-based."""
+
+    kind: str
+    value: str
+    offset: int
+    end: int
+    line: int
+    column: int
+
+
+_TOKEN_PATTERN = re.compile(
+    r"(?P<space>[ \t\r]+)"
+    r"|(?P<newline>\n)"
+    r"|(?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|(?P<mlstring>'''.*?(?:'''|\Z))"
+    r"|(?P<ident>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<number>\d+(?:\.\d+)?)"
+    r"|(?P<punct>\$\{|\.\?|::|\?\?|==|!=|<=|>=|&&|\|\||=>|=~|!~|[{}\[\]()<>,:.?=!@+\-*/%|&^~])",
+    re.DOTALL,
+)
+
+# Characters ending a single-line string segment
+_STRING_STOP = re.compile(r"\\.|'|\$\{|\n", re.DOTALL)
+
+
+def tokenize(text: str) -> List[Token]:
+    """
+    Split Bicep source into tokens in one pass.
+
+    Comments and whitespace are dropped (newlines are kept: they end
+    statements and properties). A string with interpolations becomes its
+    literal segments as STRING tokens around the tokens of each `${...}`
+    expression, which is opened by a `${` token and closed by `}`.
+    """
+    tokens: List[Token] = []
+    length = len(text)
+    pos = 0
+    line, line_start = 1, 0
+    # Open interpolations: brace depth of each, innermost last
+    interpolations: List[int] = []
+
+    def add(kind: str, start: int, end: int) -> None:
+        tokens.append(Token(kind, text[start:end], start, end, line, start - line_start + 1))
+
+    def scan_string(start: int) -> int:
+        """Emit a string segment starting at `start`; return where scanning resumes."""
+        cursor = start + 1 if text[start] == "'" else start
+        while True:
+            stop = _STRING_STOP.search(text, cursor)
+            if stop is None or stop.group() == "\n":
+                # Unterminated string: end it at the line break
+                end = stop.start() if stop else length
+                add(STRING, start, end)
+                return end
+            if stop.group() == "'":
+                add(STRING, start, stop.end())
+                return stop.end()
+            if stop.group() == "${":
+                if stop.start() > start:
+                    add(STRING, start, stop.start())
+                add(PUNCT, stop.start(), stop.end())
+                interpolations.append(0)
+                return stop.end()
+            cursor = stop.end()  # escape sequence
+
+    while pos < length:
+        char = text[pos]
+        if char == "'" and not text.startswith("'''", pos):
+            pos = scan_string(pos)
+            continue
+        if char == "}" and interpolations:
+            if interpolations[-1] == 0:
+                interpolations.pop()
+                add(PUNCT, pos, pos + 1)
+                pos = pos + 1
+                if pos < length and text[pos] != "'":
+                    pos = scan_string(pos)
+                elif pos < length:
+                    add(STRING, pos, pos + 1)
+                    pos += 1
+                continue
+            interpolations[-1] -= 1
+        elif char == "{" and interpolations:
+            interpolations[-1] += 1
+
+        match = _TOKEN_PATTERN.match(text, pos)
+        if match is None:
+            # Unknown character: keep it as punctuation so positions stay exact
+            add(PUNCT, pos, pos + 1)
+            pos += 1
+            continue
+
+        kind = match.lastgroup
+        end = match.end()
+        if kind == "newline":
+            add(NEWLINE, pos, end)
+            line, line_start = line + 1, end
+        elif kind in ("comment", "mlstring"):
+            if kind == "mlstring":
+                add(STRING, pos, end)
+            breaks = text.count("\n", pos, end)
+            if breaks:
+                line, line_start = line + breaks, text.rfind("\n", pos, end) + 1
+        elif kind != "space":
+            add({"ident": IDENT, "number": NUMBER, "punct": PUNCT}[kind], pos, end)
+        pos = end
+
+    return tokens
+
+
+def string_value(token: Token) -> Optional[str]:
+    """Value of a complete, non-interpolated string literal token."""
+    raw = token.value
+    if token.kind != STRING:
+        return None
+    if raw.startswith("'''") and raw.endswith("'''") and len(raw) >= 6:
+        return raw[3:-3]
+    if len(raw) >= 2 and raw[0] == "'" and raw[-1] == "'":
+        return re.sub(r"\\(.)", lambda m: {"n": "\n", "r": "\r", "t": "\t"}.get(m.group(1), m.group(1)), raw[1:-1])
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Parser
+# ---------------------------------------------------------------------------
+
+# Statement keywords that declare a referenceable symbol
+DECLARATION_KINDS = ("param", "var", "resource", "module", "output", "type", "func")
+
+# Top-level statements without a referenceable name
+_OTHER_STATEMENTS = ("metadata", "targetScope", "import", "using", "extension", "provider")
+
+_EXPRESSION_KEYWORDS = frozenset(("for", "in", "if", "true", "false", "null", "existing"))
+
+_OPENERS = {"{": "}", "[": "]", "(": ")", "${": "}"}
+_CLOSERS = frozenset(("}", "]", ")"))
+
+
+# Syntax node kinds lint rules can subscribe to
+NODE_DECLARATION = "declaration"
+NODE_PROPERTY = "property"
+NODE_REFERENCE = "reference"
+NODE_KINDS = (NODE_DECLARATION, NODE_PROPERTY, NODE_REFERENCE)
+
+
+@dataclass
+class Decorator:
+    """A `@name(...)` decorator of a top-level statement."""
+
+    name: str
+    line: int
+    column: int
+    offset: int
+
+
+@dataclass
+class Declaration:
+    """
+    A top-level declaration.
+
+    `start` includes the declaration's decorators and `end` is the offset of
+    the line break ending the statement. `type_name` holds the declared type
+    of params and outputs, the resource type string of resources and the
+    path of modules; `existing` marks a reference to an existing resource.
+    """
+
+    kind: str
+    name: str
+    line: int
+    column: int
+    start: int
+    end: int
+    type_name: Optional[str] = None
+    decorators: List[Decorator] = field(default_factory=list)
+    body_start: Optional[int] = None
+    existing: bool = False
+
+
+@dataclass
+class Reference:
+    """An identifier used in an expression."""
+
+    name: str
+    line: int
+    column: int
+    offset: int
+    owner: Optional[str] = None
+    call: bool = False
+
+
+@dataclass
+class Property:
+    """
+    An object property, e.g. `location: location`.
+
+    `path` lists the keys from the declaration body down to this property;
+    `first`/`last` delimit the value's tokens (`tokens[first:last]`).
+    """
+
+    key: str
+    path: Tuple[str, ...]
+    line: int
+    column: int
+    offset: int
+    owner: Optional[str]
+    first: int
+    last: int = -1
+    end: int = -1
+
+
+@dataclass
+class BicepModel:
+    """
+    Symbol table, reference map and properties of one Bicep file.
+
+    `nodes` holds every declaration, property and reference as
+    (node kind, node) pairs in source order.
+    """
+
+    text: str
+    tokens: List[Token]
+    declarations: List[Declaration] = field(default_factory=list)
+    symbols: Dict[str, Declaration] = field(default_factory=dict)
+    references: Dict[str, List[Reference]] = field(default_factory=dict)
+    properties: List[Property] = field(default_factory=list)
+    nodes: List[Tuple[str, object]] = field(default_factory=list)
+
+    def value_references(self, name: str) -> List[Reference]:
+        """References to `name` as a value (function calls excluded)."""
+        return [r for r in self.references.get(name, ()) if not r.call]
+
+    def line_span(self, start: int, end: int) -> Tuple[int, int]:
+        """Expand [start, end) to whole lines, including the final line break."""
+        line_start = self.text.rfind("\n", 0, start) + 1
+        line_end = self.text.find("\n", end)
+        return line_start, len(self.text) if line_end < 0 else line_end + 1
+
+    def owns_lines(self, start: int, end: int) -> bool:
+        """Whether only whitespace shares the lines of [start, end) with it."""
+        line_start, line_end = self.line_span(start, end)
+        before = self.text[line_start:start]
+        after = self.text[end:line_end]
+        return not before.strip() and (not after.strip() or after.strip().startswith("//"))
+
+
+class _ObjectFrame:
+    """An open `{` while parsing: its key path and the property being read."""
+
+    __slots__ = ("path", "open_property")
+
+    def __init__(self, path: Tuple[str, ...]):
+        self.path = path
+        self.open_property: Optional[Property] = None
+
+
+def parse_bicep(text: str) -> BicepModel:
+    """Build the symbol table, reference map and properties of a Bicep file in one pass."""
+    tokens = tokenize(text)
+    model = BicepModel(text, tokens)
+    count = len(tokens)
+
+    stack: List[Tuple[str, int]] = []          # open brackets: (opener, token index)
+    frames: List[_ObjectFrame] = []            # open objects, innermost last
+    current: Optional[Declaration] = None      # top-level statement being read
+    decorators: List[Decorator] = []           # decorators awaiting their statement
+    statement_start = True                     # at the first token of a top-level statement
+    skip: set = set()                          # token indexes that are declared names
+    loop_variables = False                     # between `for` and `in`
+
+    def kind_at(index: int) -> Optional[str]:
+        return tokens[index].kind if 0 <= index < count else None
+
+    def value_at(index: int) -> Optional[str]:
+        return tokens[index].value if 0 <= index < count else None
+
+    def close_property(frame: _ObjectFrame, index: int) -> None:
+        prop = frame.open_property
+        if prop is not None:
+            prop.last = index
+            # End of the value's last token (the key's end when there is no value)
+            prop.end = tokens[index - 1].end if index - 1 >= prop.first - 2 else prop.offset
+            frame.open_property = None
+
+    def end_statement(index: int) -> None:
+        nonlocal current
+        if current is not None:
+            current.end = tokens[index].offset if index < count else len(text)
+            current = None
+
+    for index, token in enumerate(tokens):
+        kind, value = token.kind, token.value
+        depth = len(stack)
+
+        if kind == NEWLINE:
+            if depth == 0:
+                end_statement(index)
+                statement_start = True
+            elif frames and stack[-1][0] == "{":
+                close_property(frames[-1], index)
+            continue
+
+        # Top-level statements and their decorators
+        if depth == 0 and statement_start:
+            statement_start = False
+            if value == "@" and kind == PUNCT:
+                name_index = index + 1
+                if value_at(index + 2) == ".":  # namespaced, e.g. @sys.description
+                    name_index = index + 3
+                decorators.append(Decorator(value_at(name_index) or "", token.line, token.column, token.offset))
+                skip.add(name_index)
+                continue
+            if kind == IDENT and value in DECLARATION_KINDS and kind_at(index + 1) == IDENT:
+                name_token = tokens[index + 1]
+                skip.add(index + 1)
+                type_token = tokens[index + 2] if index + 2 < count else None
+                type_name = None
+                if type_token is not None:
+                    if type_token.kind == STRING:
+                        type_name = string_value(type_token)
+                    elif type_token.kind == IDENT and value in ("param", "output"):
+                        type_name = type_token.value
+                        skip.add(index + 2)
+                current = Declaration(
+                    kind=value,
+                    name=name_token.value,
+                    line=token.line,
+                    column=token.column,
+                    start=decorators[0].offset if decorators else token.offset,
+                    end=len(text),
+                    type_name=type_name,
+                    decorators=decorators,
+                )
+                decorators = []
+                model.declarations.append(current)
+                model.symbols.setdefault(current.name, current)
+                model.nodes.append((NODE_DECLARATION, current))
+                continue
+            if kind == IDENT and value in _OTHER_STATEMENTS:
+                decorators = []
+                if value == "metadata" and kind_at(index + 1) == IDENT:
+                    skip.add(index + 1)
+                continue
+
+        if kind == PUNCT:
+            if value == "=" and current is not None and depth == 0 and current.body_start is None:
+                current.body_start = token.end
+            if value in _OPENERS:
+                path: Tuple[str, ...] = ()
+                if frames and frames[-1].open_property is not None:
+                    path = frames[-1].open_property.path
+                elif frames:
+                    path = frames[-1].path
+                stack.append((value, index))
+                if value == "{":
+                    frames.append(_ObjectFrame(path))
+            elif value in _CLOSERS and stack:
+                opener, _ = stack.pop()
+                if opener == "{" and frames:
+                    close_property(frames.pop(), index)
+                if not stack and decorators and current is None:
+                    # A decorator's argument list closed: the statement follows
+                    statement_start = True
+            elif value == "," and frames and stack and stack[-1][0] == "{":
+                close_property(frames[-1], index)
+            elif value == "=>" and value_at(index - 1) == ")":
+                # Lambda parameters `(a, b) =>` are local names, not references
+                opener_index = _matching_opener(tokens, index - 1)
+                for name_index in range(opener_index + 1, index - 1):
+                    if tokens[name_index].kind == IDENT:
+                        _drop_reference(model, tokens[name_index])
+            continue
+
+        if kind != IDENT or index in skip:
+            continue
+
+        previous = value_at(index - 1)
+        following = value_at(index + 1)
+
+        if value == "for":
+            loop_variables = True
+            continue
+        if value == "in" and loop_variables:
+            loop_variables = False
+            continue
+        if value == "existing" and depth == 0 and current is not None and current.body_start is None:
+            current.existing = True
+            continue
+        if loop_variables or value in _EXPRESSION_KEYWORDS:
+            continue
+
+        # Nested child resource: `resource name 'type' = {...}` inside a body
+        if value == "resource" and kind_at(index + 1) == IDENT and kind_at(index + 2) == STRING:
+            skip.add(index + 1)
+            continue
+
+        if previous in (".", ".?", "::", "@"):
+            continue  # property access, child resource accessor or decorator name
+
+        if following == ":" and stack and stack[-1][0] == "{" and (
+            previous in ("{", ",") or kind_at(index - 1) == NEWLINE
+        ):
+            frame = frames[-1]
+            prop = Property(
+                key=value,
+                path=frame.path + (value,),
+                line=token.line,
+                column=token.column,
+                offset=token.offset,
+                owner=current.name if current else None,
+                first=index + 2,
+            )
+            frame.open_property = prop
+            model.properties.append(prop)
+            model.nodes.append((NODE_PROPERTY, prop))
+            continue
+
+        if following == "=>":
+            continue  # single lambda parameter
+
+        reference = Reference(
+            name=value,
+            line=token.line,
+            column=token.column,
+            offset=token.offset,
+            owner=current.name if current else None,
+            call=following == "(",
+        )
+        model.references.setdefault(value, []).append(reference)
+        model.nodes.append((NODE_REFERENCE, reference))
+
+    end_statement(count)
+    for frame in frames:
+        close_property(frame, count)
+    return model
+
+
+def _matching_opener(tokens: List[Token], closer_index: int) -> int:
+    """Index of the bracket opening the one at `closer_index` (scans back over the group only)."""
+    depth = 0
+    for index in range(closer_index, -1, -1):
+        value = tokens[index].value
+        if tokens[index].kind != PUNCT:
+            continue
+        if value in _CLOSERS:
+            depth += 1
+        elif value in _OPENERS:
+            depth -= 1
+            if depth == 0:
+                return index
+    return 0
+
+
+def _drop_reference(model: BicepModel, token: Token) -> None:
+    references = model.references.get(token.value) or []
+    model.references[token.value] = [r for r in references if r.offset != token.offset]
+    # Lambda parameters were just read: look for them from the end
+    for position in range(len(model.nodes) - 1, -1, -1):
+        kind, node = model.nodes[position]
+        if kind == NODE_REFERENCE and node.offset == token.offset:
+            del model.nodes[position]
+            break
+        if (node.start if kind == NODE_DECLARATION else node.offset) < token.offset:
+            break
+
+
+# ---------------------------------------------------------------------------
+# Rule engine
+# ---------------------------------------------------------------------------
+
+ERROR = "error"
+WARNING = "warning"
+INFO = "info"
+
+
+@dataclass
+class BicepDiagnostic:
+    """A finding of a lint rule; `fixed` when the rule's auto-fix was applied."""
+
+    rule: str
+    severity: str
+    message: str
+    line: int
+    column: int
+    fixed: bool = False
+
+
+class _Edit(NamedTuple):
+    start: int
+    end: int
+    replacement: str = ""
 
-    removed_params: List[str]
-    updated_text, removed_params = _remove_unused_parameters(updated_text)
 
-    removed_depends: List[str]
-    updated_text, removed_depends = _remove_redundant_dependson(updated_text)
+class LintContext:
+    """The parsed file shared by the rules, and what they report and fix."""
+
+    def __init__(self, model: BicepModel):
+        self.model = model
+        self.diagnostics: List[BicepDiagnostic] = []
+        self.edits: List[_Edit] = []
+        self.fixed: Dict[str, List[str]] = {}
+
+    def report(self, rule: "LintRule", message: str, line: int, column: int) -> None:
+        self.diagnostics.append(BicepDiagnostic(rule.id, rule.severity, message, line, column))
+
+    def fix(self, rule: "LintRule", subject: str, edits: List[_Edit], message: str, line: int, column: int) -> None:
+        """Record an auto-fix: its edits, the fixed `subject` and a diagnostic."""
+        self.edits.extend(edits)
+        self.fixed.setdefault(rule.id, []).append(subject)
+        self.diagnostics.append(BicepDiagnostic(rule.id, rule.severity, message, line, column, fixed=True))
+
+
+class LintRule:
+    """
+    Base class of lint rules.
+
+    A rule lists the node kinds it inspects in `node_kinds`; the engine
+    walks the model's nodes once and calls `visit` for each node of those
+    kinds, after `start` and before `finish`. A new instance checks each
+    file, so rules may keep per-file state. Bump `version` when a rule's
+    findings or fixes change.
+    """
+
+    id: str = ""
+    description: str = ""
+    severity: str = WARNING
+    node_kinds: Tuple[str, ...] = ()
+    version: int = 1
+
+    def start(self, context: LintContext) -> None:
+        pass
+
+    def visit(self, kind: str, node: object, context: LintContext) -> None:
+        pass
+
+    def finish(self, context: LintContext) -> None:
+        pass
+
+
+RULES: Dict[str, Type[LintRule]] = {}
+
+
+def register_rule(rule: Type[LintRule]) -> Type[LintRule]:
+    """Class decorator adding a rule to the registry under its `id`."""
+    if not rule.id or rule.id in RULES:
+        raise ValueError(f"Lint rule id missing or already registered: {rule.id!r}")
+    unknown = set(rule.node_kinds) - set(NODE_KINDS)
+    if unknown:
+        raise ValueError(f"Lint rule {rule.id} uses unknown node kinds: {sorted(unknown)}")
+    RULES[rule.id] = rule
+    return rule
+
+
+def run_rules(model: BicepModel, rules: Optional[Iterable[str]] = None) -> LintContext:
+    """
+    Run the given rules (every registered rule by default) over a parsed
+    file in one traversal of its nodes.
+
+    Raises:
+        ValueError: If a rule id is not registered
+    """
+    rule_ids = list(RULES) if rules is None else list(rules)
+    unknown = [rule_id for rule_id in rule_ids if rule_id not in RULES]
+    if unknown:
+        raise ValueError(f"Unknown lint rules: {', '.join(unknown)}")
+
+    instances = [RULES[rule_id]() for rule_id in rule_ids]
+    dispatch = {kind: [rule for rule in instances if kind in rule.node_kinds] for kind in NODE_KINDS}
+    context = LintContext(model)
+    for rule in instances:
+        rule.start(context)
+    for kind, node in model.nodes:
+        for rule in dispatch[kind]:
+            rule.visit(kind, node, context)
+    for rule in instances:
+        rule.finish(context)
+    context.diagnostics.sort(key=lambda d: (d.line, d.column, d.rule))
+    return context
+
+
+def _lint_text(text: str, rules: Optional[Iterable[str]] = None) -> Tuple[str, LintContext]:
+    """Parse and lint Bicep source; returns the fixed text and the lint context."""
+    context = run_rules(parse_bicep(text), rules)
+    return _apply_edits(text, context.edits), context
+
+
+def _lint_single_file(path: Path, rules: Optional[Iterable[str]] = None) -> BicepLintResult:
+    """Lint and auto-fix a single Bicep file."""
+    original_text = path.read_text(encoding="utf-8")
+    updated_text, context = _lint_text(original_text, rules)
 
     if updated_text != original_text:
         path.write_text(updated_text, encoding="utf-8")
 
     return BicepLintResult(
         file=path,
-        removed_parameters=removed_params,
-        removed_dependson=removed_depends,
+        removed_parameters=context.fixed.get(NoUnusedParams.id, []),
+        removed_dependson=context.fixed.get(NoUnnecessaryDependsOn.id, []),
+        diagnostics=context.diagnostics,
     )
 
 
-def _remove_unused_parameters(content: str) -> tuple[str, List[str]]:
-    """
-    Remove parameter declarations that are never referenced elsewhere.
-    """
-    removed: List[str] = []
-    if not content:
-        return content, removed
-
-    # Count occurrences once using the original content.
-    occurrences = {}
-    for match in _PARAM_PATTERN.finditer(content):
-        name = match.group(1)
-        occurrences[name] = len(re.findall(rf"\b{name}\b", content))
-
-    if not occurrences:
-        return content, removed
-
-    lines = content.splitlines()
-    filtered_lines: List[str] = []
-    for line in lines:
-        match = _PARAM_PATTERN.match(line)
-        if match:
-            name = match.group(1)
-            if occurrences.get(name, 0) <= 1:
-                removed.append(name)
-                continue  # Drop the entire line
-        filtered_lines.append(line)
-
-    updated = "\n".join(filtered_lines)
-    if content.endswith("\n"):
-        updated += "\n"
-    updated = re.sub(r"\n{3,}", "\n\n", updated)
-    return updated, removed
-
-
-def _remove_redundant_dependson(content: str) -> tuple[str, List[str]]:
-    """
-    Remove dependsOn blocks when every entry points to a locally declared
-    module/resource. Bicep will infer those dependencies automatically.
-    """
-    removed: List[str] = []
-    if not content:
-        return content, removed
-
-    lines = content.splitlines()
-    updated_lines: List[str] = []
-    i = 0
-    length = len(lines)
-
-    while i < length:
-        line = lines[i]
-        stripped = line.strip()
-        if stripped.startswith("dependsOn:"):
-            block_lines = [line]
-            i += 1
-            while i < length:
-                block_lines.append(lines[i])
-                if lines[i].strip().endswith("]"):
-                    i += 1
-                    break
-                i += 1
-            else:
-                # Unterminated block; keep as-is
-                updated_lines.extend(block_lines)
-                break
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
 
-            block_text = "\n".join(block_lines)
-            entries = _extract_dependson_entries(block_text)
+@register_rule
+class NoUnusedParams(LintRule):
+    """Remove parameter declarations (with their decorators) that are never referenced."""
 
-            if entries and _all_entries_are_local_symbols(entries, content):
-                removed.extend(entries)
-                continue  # Drop the entire dependsOn block
+    id = "no-unused-params"
+    description = "Parameters must be referenced"
+    node_kinds = (NODE_DECLARATION,)
 
-            updated_lines.extend(block_lines)
+    def visit(self, kind: str, node: object, context: LintContext) -> None:
+        model = context.model
+        if node.kind != "param" or model.value_references(node.name):
+            return
+        message = f"Parameter '{node.name}' is declared but never used"
+        if model.owns_lines(node.start, node.end):
+            context.fix(self, node.name, [_Edit(*model.line_span(node.start, node.end))], message, node.line, node.column)
         else:
-            updated_lines.append(line)
-            i += 1
+            context.report(self, message, node.line, node.column)
 
-    updated = "\n".join(updated_lines)
-    if content.endswith("\n"):
-        updated += "\n"
-    updated = re.sub(r"\n{3,}", "\n\n", updated)
-    return updated, removed
 
+@register_rule
+class NoUnnecessaryDependsOn(LintRule):
+    """
+    Remove dependsOn entries that Bicep infers on its own: local modules or
+    resources that the declaration already references in its body. The
+    whole dependsOn property goes when every entry is redundant.
+    """
+
+    id = "no-unnecessary-dependson"
+    description = "dependsOn must not repeat inferred dependencies"
+    node_kinds = (NODE_PROPERTY,)
+
+    def start(self, context: LintContext) -> None:
+        self.references_by_owner: Dict[Optional[str], Dict[str, List[int]]] = {}
+        for name, references in context.model.references.items():
+            for reference in references:
+                self.references_by_owner.setdefault(reference.owner, {}).setdefault(name, []).append(reference.offset)
+
+    def visit(self, kind: str, node: object, context: LintContext) -> None:
+        model = context.model
+        owner = model.symbols.get(node.owner or "")
+        if node.key != "dependsOn" or len(node.path) != 1 or owner is None or owner.kind not in ("resource", "module"):
+            return
+        elements = _array_elements(model.tokens, node.first, node.last)
+        if not elements:
+            return
+
+        referenced = self.references_by_owner.get(owner.name, {})
+        redundant = []
+        for element in elements:
+            if len(element) != 1 or element[0].kind != IDENT:
+                continue
+            target = model.symbols.get(element[0].value)
+            if target is None or target.kind not in ("resource", "module") or target is owner:
+                continue
+            # Referenced outside the dependsOn array itself
+            if any(not node.offset <= offset < node.end for offset in referenced.get(target.name, ())):
+                redundant.append(element)
+
+        if not redundant:
+            return
+
+        # Edits per redundant entry (None when it cannot be removed cleanly)
+        fixes: List[Optional[List[_Edit]]] = []
+        opener, closer = model.tokens[node.first], model.tokens[node.last - 1]
+        if len(redundant) == len(elements):
+            removable = model.owns_lines(node.offset, node.end)
+            fixes = [[] if removable else None for _ in redundant]
+            if removable:
+                fixes[0] = [_Edit(*model.line_span(node.offset, node.end))]
+        elif opener.line == closer.line:
+            kept = [model.text[e[0].offset:e[-1].end] for e in elements if e not in redundant]
+            fixes = [[] for _ in redundant]
+            fixes[0] = [_Edit(opener.end, closer.offset, ", ".join(kept))]
+        else:
+            for element in redundant:
+                token = element[0]
+                if model.owns_lines(token.offset, token.end + _trailing_comma(model.text, token.end)):
+                    fixes.append([_Edit(*model.line_span(token.offset, token.end))])
+                else:
+                    fixes.append(None)
+
+        for element, edits in zip(redundant, fixes):
+            token = element[0]
+            message = f"Dependency on '{token.value}' is inferred from its references"
+            if edits is None:
+                context.report(self, message, token.line, token.column)
+            else:
+                context.fix(self, token.value, edits, message, token.line, token.column)
+
+
+@register_rule
+class NoHardcodedLocation(LintRule):
+    """Resource and module locations come from a parameter, not a literal region."""
+
+    id = "no-hardcoded-location"
+    description = "Locations must not be hard-coded"
+    node_kinds = (NODE_PROPERTY,)
+
+    def visit(self, kind: str, node: object, context: LintContext) -> None:
+        model = context.model
+        owner = model.symbols.get(node.owner or "")
+        if node.key != "location" or owner is None:
+            return
+        if not (owner.kind == "resource" and node.path == ("location",)
+                or owner.kind == "module" and node.path == ("params", "location")):
+            return
+
+        value = model.tokens[node.first:node.last]
+        literal = value[0] if len(value) == 1 else None
+        if literal is not None and literal.kind == IDENT and literal.value in model.symbols:
+            # A variable holding a literal region
+            source = model.symbols[literal.value]
+            if source.kind == "var" and source.body_start is not None:
+                literal = _single_string(model.text[source.body_start:source.end])
+            else:
+                literal = None
+        region = string_value(literal) if literal is not None and literal.kind == STRING else None
+        if region is not None and region.casefold() != "global":
+            context.report(
+                self,
+                f"'{owner.name}' has hard-coded location '{region}'; use a location parameter",
+                node.line, node.column,
+            )
+
+
+# Name fragments of parameters holding secrets, and suffixes of names that only describe one
+_SECRET_NAME = re.compile(r"password|passwd|secret|token|credential|connectionstring|apikey|accesskey|sharedkey|sas(?:key|token)?$", re.IGNORECASE)
+_NOT_SECRET_SUFFIX = re.compile(r"(?:name|names|uri|url|id|ids|version|expiry|enabled|type)$", re.IGNORECASE)
+
+
+@register_rule
+class SecureSecretsInParams(LintRule):
+    """Parameters carrying secrets must be `@secure()` so they are not logged."""
+
+    id = "secure-secrets-in-params"
+    description = "Secret parameters must be @secure()"
+    severity = ERROR
+    node_kinds = (NODE_DECLARATION,)
+
+    def visit(self, kind: str, node: object, context: LintContext) -> None:
+        if node.kind != "param" or node.type_name not in ("string", "object"):
+            return
+        if not _SECRET_NAME.search(node.name) or _NOT_SECRET_SUFFIX.search(node.name):
+            return
+        if any(d.name == "secure" for d in node.decorators):
+            return
+        context.report(self, f"Parameter '{node.name}' looks like a secret but is not @secure()", node.line, node.column)
+
+
+# Azure Verified Modules of common landing-zone resource types (lower-cased type -> module path)
+AVM_MODULES: Dict[str, str] = {
+    "microsoft.network/virtualnetworks": "avm/res/network/virtual-network",
+    "microsoft.network/azurefirewalls": "avm/res/network/azure-firewall",
+    "microsoft.network/bastionhosts": "avm/res/network/bastion-host",
+    "microsoft.network/networksecuritygroups": "avm/res/network/network-security-group",
+    "microsoft.network/publicipaddresses": "avm/res/network/public-ip-address",
+    "microsoft.network/privateendpoints": "avm/res/network/private-endpoint",
+    "microsoft.network/routetables": "avm/res/network/route-table",
+    "microsoft.network/privatednszones": "avm/res/network/private-dns-zone",
+    "microsoft.keyvault/vaults": "avm/res/key-vault/vault",
+    "microsoft.storage/storageaccounts": "avm/res/storage/storage-account",
+    "microsoft.operationalinsights/workspaces": "avm/res/operational-insights/workspace",
+    "microsoft.containerregistry/registries": "avm/res/container-registry/registry",
+    "microsoft.web/sites": "avm/res/web/site",
+    "microsoft.sql/servers": "avm/res/sql/server",
+    "microsoft.managedidentity/userassignedidentities": "avm/res/managed-identity/user-assigned-identity",
+}
+
+
+def _resource_type(declaration: Declaration) -> str:
+    """Lower-cased resource type of a resource declaration, without the API version."""
+    return (declaration.type_name or "").split("@", 1)[0].casefold()
+
+
+def _avm_module_type(declaration: Declaration) -> Optional[str]:
+    """Resource type deployed by an AVM registry module, if it is a known one."""
+    path = declaration.type_name or ""
+    if not path.startswith("br/public:avm/"):
+        return None
+    module = path[len("br/public:"):].rsplit(":", 1)[0]
+    return next((t for t, m in AVM_MODULES.items() if m == module), None)
+
+
+@register_rule
+class PreferAvmModule(LintRule):
+    """Suggest the Azure Verified Module for hand-written resources it covers."""
+
+    id = "prefer-avm-module"
+    description = "Prefer Azure Verified Modules over raw resources"
+    severity = INFO
+    node_kinds = (NODE_DECLARATION,)
+
+    def visit(self, kind: str, node: object, context: LintContext) -> None:
+        if node.kind != "resource" or node.existing:
+            return
+        module = AVM_MODULES.get(_resource_type(node))
+        if module:
+            context.report(self, f"Resource '{node.name}' could use the verified module br/public:{module}", node.line, node.column)
 
-def _extract_dependson_entries(block_text: str) -> List[str]:
+
+# Resource types that emit logs or metrics through diagnostic settings (lower-cased)
+DIAGNOSTIC_TYPES = frozenset((
+    "microsoft.network/virtualnetworks",
+    "microsoft.network/azurefirewalls",
+    "microsoft.network/bastionhosts",
+    "microsoft.network/networksecuritygroups",
+    "microsoft.network/publicipaddresses",
+    "microsoft.network/applicationgateways",
+    "microsoft.keyvault/vaults",
+    "microsoft.storage/storageaccounts",
+    "microsoft.containerregistry/registries",
+    "microsoft.containerservice/managedclusters",
+    "microsoft.web/sites",
+    "microsoft.sql/servers/databases",
+    "microsoft.documentdb/databaseaccounts",
+    "microsoft.eventhub/namespaces",
+    "microsoft.servicebus/namespaces",
+))
+
+_DIAGNOSTIC_SETTINGS = "microsoft.insights/diagnosticsettings"
+
+
+@register_rule
+class MissingDiagnosticSettings(LintRule):
+    """
+    Resources that emit logs need diagnostic settings: a
+    `Microsoft.Insights/diagnosticSettings` resource scoped to them, or the
+    `diagnosticSettings` parameter of their verified module.
+    """
+
+    id = "missing-diagnostic-settings"
+    description = "Log-emitting resources must have diagnostic settings"
+    node_kinds = (NODE_DECLARATION, NODE_PROPERTY)
+
+    def start(self, context: LintContext) -> None:
+        self.candidates: List[Declaration] = []
+        self.covered: set = set()
+
+    def visit(self, kind: str, node: object, context: LintContext) -> None:
+        model = context.model
+        if kind == NODE_DECLARATION:
+            if node.kind == "resource" and not node.existing and _resource_type(node) in DIAGNOSTIC_TYPES:
+                self.candidates.append(node)
+            elif node.kind == "module" and _avm_module_type(node) in DIAGNOSTIC_TYPES:
+                self.candidates.append(node)
+            return
+
+        owner = model.symbols.get(node.owner or "")
+        if owner is None:
+            return
+        if owner.kind == "module" and node.path == ("params", "diagnosticSettings"):
+            self.covered.add(owner.name)
+        elif owner.kind == "resource" and node.path == ("scope",) and _resource_type(owner) == _DIAGNOSTIC_SETTINGS:
+            self.covered.update(t.value for t in model.tokens[node.first:node.last] if t.kind == IDENT)
+
+    def finish(self, context: LintContext) -> None:
+        for declaration in self.candidates:
+            if declaration.name not in self.covered:
+                context.report(
+                    self,
+                    f"'{declaration.name}' has no diagnostic settings sending its logs to Log Analytics",
+                    declaration.line, declaration.column,
+                )
+
+
+# Resource types that take no tags of their own (lower-cased)
+_UNTAGGED_TYPES = frozenset((
+    _DIAGNOSTIC_SETTINGS,
+    "microsoft.authorization/roleassignments",
+    "microsoft.authorization/locks",
+    "microsoft.authorization/policyassignments",
+    "microsoft.authorization/policydefinitions",
+    "microsoft.authorization/policysetdefinitions",
+))
+
+
+@register_rule
+class FsiRequiredTags(LintRule):
     """
-    Extract identifier entries from a dependsOn block.
+    FSI resources carry the tags used for cost allocation and regulatory
+    scoping. Tags given as a variable or parameter are followed to its
+    object literal; computed tags (e.g. `union(...)`) are not checked.
     """
-    entries = []
-    for token in re.split(r"[,\\n]", block_text):
-        token = token.strip()
-        if not token or token.startswith("dependsOn"):
+
+    id = "fsi-required-tags"
+    description = "Resources must carry the FSI tags"
+    node_kinds = (NODE_DECLARATION, NODE_PROPERTY)
+    required_tags: Tuple[str, ...] = ("Environment", "Compliance")
+
+    def start(self, context: LintContext) -> None:
+        self.candidates: List[Declaration] = []
+        self.tags: Dict[str, Property] = {}
+        self.keys: Dict[Tuple[str, Tuple[str, ...]], set] = {}
+
+    def visit(self, kind: str, node: object, context: LintContext) -> None:
+        if kind == NODE_DECLARATION:
+            resource_type = _resource_type(node)
+            if node.kind == "resource" and not node.existing and resource_type.count("/") == 1 \
+                    and resource_type not in _UNTAGGED_TYPES:
+                self.candidates.append(node)
+            elif node.kind == "module" and _avm_module_type(node):
+                self.candidates.append(node)
+            return
+
+        if node.owner is None:
+            return
+        self.keys.setdefault((node.owner, node.path[:-1]), set()).add(node.key.casefold())
+        if node.path in (("tags",), ("params", "tags")):
+            self.tags[node.owner] = node
+
+    def finish(self, context: LintContext) -> None:
+        model = context.model
+        for declaration in self.candidates:
+            tags = self.tags.get(declaration.name)
+            if tags is None:
+                missing = list(self.required_tags)
+            else:
+                keys = self._tag_keys(model, tags)
+                if keys is None:
+                    continue
+                missing = [tag for tag in self.required_tags if tag.casefold() not in keys]
+            if missing:
+                context.report(
+                    self,
+                    f"'{declaration.name}' is missing required tags: {', '.join(missing)}",
+                    declaration.line, declaration.column,
+                )
+
+    def _tag_keys(self, model: BicepModel, tags: Property) -> Optional[set]:
+        """Lower-cased keys of a tags value, or None when they cannot be known statically."""
+        value = model.tokens[tags.first:tags.last]
+        if value and value[0].value == "{":
+            return self.keys.get((tags.owner, tags.path), set())
+        if len(value) == 1 and value[0].kind == IDENT:
+            source = model.symbols.get(value[0].value)
+            if source is not None and source.kind in ("var", "param") and source.body_start is not None:
+                if model.text[source.body_start:source.end].strip().startswith("{"):
+                    return self.keys.get((source.name, ()), set())
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Fix helpers
+# ---------------------------------------------------------------------------
+
+def _single_string(text: str) -> Optional[Token]:
+    """The token of `text` if it is nothing but a string literal."""
+    tokens = [t for t in tokenize(text) if t.kind != NEWLINE]
+    return tokens[0] if len(tokens) == 1 and tokens[0].kind == STRING else None
+
+
+def _array_elements(tokens: List[Token], first: int, last: int) -> List[List[Token]]:
+    """Elements of an array literal spanning `tokens[first:last]` (empty if it is not one)."""
+    if last - first < 2 or tokens[first].value != "[" or tokens[last - 1].value != "]":
+        return []
+    elements: List[List[Token]] = []
+    element: List[Token] = []
+    depth = 0
+    for token in tokens[first + 1:last - 1]:
+        if token.kind == PUNCT and token.value in _OPENERS:
+            depth += 1
+        elif token.kind == PUNCT and token.value in _CLOSERS:
+            depth -= 1
+        if depth == 0 and (token.kind == NEWLINE or token.value == ","):
+            if element:
+                elements.append(element)
+            element = []
             continue
-        # Remove trailing comments
-        token = token.split("//", maxsplit=1)[0].strip()
-        if re.match(r"^[a-zA-Z_][\w]*$", token):
-            entries.append(token)
-    return entries
+        element.append(token)
+    if element:
+        elements.append(element)
+    return elements
+
+
+def _trailing_comma(text: str, offset: int) -> int:
+    return 1 if text[offset:offset + 1] == "," else 0
 
 
-def _all_entries_are_local_symbols(entries: List[str], content: str) -> bool:
+def _apply_edits(text: str, edits: List[_Edit]) -> str:
     """
-    Check if every dependsOn entry corresponds to a module/resource declared in
-    the same file. We assume these dependencies can be inferred automatically.
+    Apply non-overlapping edits. Removing whole lines that sat between two
+    blank lines also drops one of the blank lines.
     """
-    for entry in entries:
-        pattern = rf"\b(module|resource)\s+{entry}\b"
-        if not re.search(pattern, content):
-            return False
-    return True
+    for start, end, replacement in sorted(edits, reverse=True):
+        if not replacement and text[:start].endswith("\n\n") and text[end:end + 1] == "\n":
+            end += 1
+        text = text[:start] + replacement + text[end:]
+    return text
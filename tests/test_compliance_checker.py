@@ -0,0 +1,1221 @@
+"""
+Tests for the Azure Compliance Checker scan engine.
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from multiprocessing.connection import Client
+from pathlib import Path
+
+import pytest
+import yaml
+
+# Add the compliance checker agent to path
+repo_root = Path(__file__).parent.parent
+checker_dir = repo_root / "agents" / "azure-compliance-checker"
+sys.path.insert(0, str(checker_dir))
+
+from compliance.batch import load_batch, render_batch_table
+from compliance.cache import QueryCache
+from compliance.checklists import ChecklistCache, ChecklistSet
+import compliance.checklists as checklists_module
+from compliance.distributed import ScanCoordinator, Shard, shard_controls
+from compliance.evaluator import PropertyPath, ResourceColumns, compile_requirement
+from compliance.executor import AzureCliError, AzureCliExecutor, AzureCliThrottled, AzureCliTimeout
+from compliance.fanout import ScopedExecutor, merge_stores, parse_subscriptions, subscriptions_in_management_group
+from compliance.history import ScanHistory
+from compliance.incremental import (
+    FINGERPRINT_FIELDS,
+    changed_types,
+    dependent_controls,
+    fingerprint_inventory,
+    fingerprint_resources,
+)
+from compliance.inventory import ResourceInventory, record_schema
+from compliance.jsonstream import JsonArrayParser, project_resource
+from compliance.records import RecordSchema, ResourceRecord
+from compliance.report import render_control
+from compliance.results import FAILED, MANUAL, PASSED, ComplianceResultStore, ControlOutcome, RequirementOutcome
+from compliance.resource_graph import ResourceGraphBackend, build_query_plan
+from compliance.sampling import SamplingPolicy, allocate, evaluate_sampled, wilson_interval
+from compliance.scheduler import (
+    CostModel,
+    CriticalFailureLimit,
+    regulation_priorities,
+    run_prioritized,
+    schedule,
+)
+from compliance.snapshot import SnapshotError, read_snapshot, write_snapshot
+from compliance.streaming import ResultStreamWriter, iter_completed
+from compliance.throttle import AdaptiveLimiter, is_throttled, retry_after_seconds
+from compliance.watch import WatchOutput, status_transitions
+
+FAKE_AZ = str(checker_dir / "scripts" / "fake-az.py")
+
+
+def make_resource(name, resource_type, location="westeurope", resource_group="rg-core", **extra):
+    """Build a resource dict shaped like `az resource list` output."""
+    resource = {
+        "id": f"/subscriptions/sub/resourceGroups/{resource_group}/providers/{resource_type}/{name}",
+        "name": name,
+        "type": resource_type,
+        "location": location,
+        "resourceGroup": resource_group,
+    }
+    resource.update(extra)
+    return resource
+
+
+class TestResourceInventory:
+    """Test the in-memory resource inventory."""
+
+    def setup_method(self):
+        self.inventory = ResourceInventory([
+            make_resource("kv1", "Microsoft.KeyVault/vaults"),
+            make_resource("kv2", "Microsoft.KeyVault/vaults", location="francecentral", resource_group="rg-data"),
+            make_resource("law", "Microsoft.OperationalInsights/workspaces", resource_group="rg-data"),
+        ])
+
+    def test_of_type_is_case_insensitive(self):
+        """Test that type lookups ignore case like ARM does."""
+        names = [r["name"] for r in self.inventory.of_type("microsoft.keyvault/VAULTS")]
+        assert names == ["kv1", "kv2"]
+
+    def test_missing_type_returns_empty_list(self):
+        """Test that unknown types have no resources."""
+        assert self.inventory.of_type("Microsoft.Sql/servers") == []
+        assert "Microsoft.Sql/servers" not in self.inventory
+
+    def test_location_and_resource_group_indexes(self):
+        """Test the secondary indexes."""
+        assert [r["name"] for r in self.inventory.in_location("westeurope")] == ["kv1", "law"]
+        data = self.inventory.in_resource_group("RG-DATA", "Microsoft.KeyVault/vaults")
+        assert [r["name"] for r in data] == ["kv2"]
+        assert len(self.inventory) == 3
+
+
+class TestAzureCliExecutor:
+    """Test the asynchronous Azure CLI executor (using python as the CLI)."""
+
+    def test_queries_run_concurrently_in_stable_order(self):
+        """Test that results keep input order and queries overlap."""
+        executor = AzureCliExecutor(max_parallel=4, timeout=10, cli_path=sys.executable)
+        script = "import sys, time; time.sleep(float(sys.argv[1])); print('[' + sys.argv[1] + ']')"
+
+        async def scan():
+            delays = ["0.4", "0.1", "0.3", "0.2"]
+            return await asyncio.gather(*(executor.run_json(["-c", script, d]) for d in delays))
+
+        started = time.monotonic()
+        results = asyncio.run(scan())
+        assert results == [[0.4], [0.1], [0.3], [0.2]]
+        assert time.monotonic() - started < 0.9
+
+    def test_timeout_and_errors(self):
+        """Test that timeouts and failing commands raise dedicated errors."""
+        executor = AzureCliExecutor(max_parallel=1, timeout=0.2, cli_path=sys.executable)
+        with pytest.raises(AzureCliTimeout):
+            asyncio.run(executor.run(["-c", "import time; time.sleep(5)"]))
+        with pytest.raises(AzureCliError):
+            asyncio.run(executor.run_json(["-c", "import sys; sys.exit('denied')"]))
+
+
+class TestThrottling:
+    """Test throttling detection, AIMD concurrency and retries."""
+
+    def test_detects_429_and_retry_after(self):
+        """Test that ARM throttling errors are told apart from other failures."""
+        stderr = "ERROR: (TooManyRequests) Number of requests exceeded the limit. Status: 429 Retry-After: 17"
+        assert is_throttled(stderr)
+        assert retry_after_seconds(stderr) == 17
+        assert retry_after_seconds("Please retry after 2.5 seconds") == 2.5
+        assert not is_throttled("ERROR: (AuthorizationFailed) The client does not have authorization")
+        assert retry_after_seconds("ERROR: denied") is None
+
+    def test_window_grows_additively_and_halves_once_per_burst(self):
+        """Test that concurrent 429s only cut the window once."""
+        async def scenario():
+            limiter = AdaptiveLimiter(4, max_limit=8)
+            for _ in range(5):
+                async with limiter.slot() as ticket:
+                    ticket.succeeded()
+            grown = limiter.window
+
+            tickets = [await limiter.acquire() for _ in range(limiter.window)]
+            for ticket in tickets:
+                ticket.throttled()
+                limiter.release(ticket)
+            return grown, limiter.window, limiter.throttle_count
+
+        grown, cut, throttled = asyncio.run(scenario())
+        assert grown == 5
+        assert cut == 2
+        assert throttled == 5
+
+    def test_throttled_queries_are_retried(self, tmp_path):
+        """Test that a query throttled twice succeeds on the third attempt."""
+        counter = tmp_path / "attempts"
+        script = (
+            "import sys, pathlib; p = pathlib.Path(sys.argv[1]); "
+            "n = int(p.read_text()) if p.exists() else 0; p.write_text(str(n + 1)); "
+            "sys.exit('ERROR: (TooManyRequests) Status: 429 Retry-After: 0') if n < int(sys.argv[2]) else print('[1]')"
+        )
+        executor = AzureCliExecutor(cli_path=sys.executable, max_retries=2, backoff_base=0.01)
+        assert asyncio.run(executor.run_json(["-c", script, str(counter), "2"])) == [1]
+        assert counter.read_text() == "3"
+        assert executor.limiter.throttle_count == 2
+
+        counter.unlink()
+        with pytest.raises(AzureCliThrottled):
+            asyncio.run(executor.collect_json(["-c", script, str(counter), "5"]))
+        assert counter.read_text() == "3"
+
+
+    def test_cancelled_caller_leaves_coalesced_query_running(self, tmp_path):
+        """Test that cancelling one caller of a coalesced query does not cancel the others."""
+        counter = tmp_path / "runs"
+        script = (
+            "import sys, time, pathlib; p = pathlib.Path(sys.argv[1]); "
+            "p.write_text(str(int(p.read_text()) + 1) if p.exists() else '1'); time.sleep(0.3); print('[1]')"
+        )
+
+        async def scenario():
+            executor = AzureCliExecutor(cli_path=sys.executable)
+            first = asyncio.ensure_future(executor.run_json(["-c", script, str(counter)]))
+            second = asyncio.ensure_future(executor.run_json(["-c", script, str(counter)]))
+            await asyncio.sleep(0.1)
+            first.cancel()
+            return await second, first.cancelled()
+
+        assert asyncio.run(scenario()) == ([1], True)
+        assert counter.read_text() == "1"
+
+
+class TestResourceGraphBackend:
+    """Test the checklist-to-KQL planner and the Resource Graph backend."""
+
+    controls = [
+        {
+            "reglementation": "ACPR",
+            "azure_resources": [
+                {"type": "Microsoft.KeyVault/vaults", "validation": [
+                    {"property": "properties.enableSoftDelete", "check": "equals", "value": True},
+                ]},
+                {"type": "Microsoft.Security/pricings", "validation": [
+                    {"property": "properties.pricingTier", "check": "equals", "value": "Standard"},
+                ]},
+            ],
+        },
+        {
+            "reglementation": "DORA",
+            "azure_resources": [
+                {"type": "microsoft.keyvault/VAULTS", "validation": [
+                    {"property": "properties.enablePurgeProtection", "check": "exists"},
+                    {"property": "name", "check": "exists"},
+                ]},
+            ],
+        },
+        {"reglementation": "LCB-FT", "manual_verification": True,
+         "azure_resources": [{"type": "Microsoft.Logic/workflows"}]},
+    ]
+
+    def test_plan_groups_types_by_table_and_projects_properties(self):
+        """Test that the planner merges requirements into per-table queries."""
+        plan = build_query_plan(self.controls)
+        assert [q.table for q in plan.queries] == ["resources", "securityresources"]
+        resources_query = plan.queries[0]
+        assert resources_query.types == ["microsoft.keyvault/vaults"]
+        assert resources_query.columns == {
+            "p0": "properties.enablePurgeProtection",
+            "p1": "properties.enableSoftDelete",
+        }
+        kql = resources_query.to_kql()
+        assert "where type in~ ('microsoft.keyvault/vaults')" in kql
+        assert "p1 = properties.enableSoftDelete" in kql
+
+    def test_backend_pages_through_fake_az(self, tmp_path, monkeypatch):
+        """Test paging and row reconstruction against the offline fake CLI."""
+        resources = [
+            make_resource(f"kv{i}", "Microsoft.KeyVault/vaults",
+                          properties={"enableSoftDelete": i % 2 == 0, "sku": {"name": "premium"}})
+            for i in range(5)
+        ]
+        resources.append(make_resource("law", "Microsoft.OperationalInsights/workspaces"))
+        inventory_file = tmp_path / "inventory.json"
+        inventory_file.write_text(json.dumps(resources))
+        monkeypatch.setenv("FAKE_AZ_INVENTORY", str(inventory_file))
+
+        executor = AzureCliExecutor(max_parallel=2, timeout=10, cli_path=FAKE_AZ)
+        backend = ResourceGraphBackend(executor, page_size=2)
+        inventory = asyncio.run(backend.fetch(build_query_plan(self.controls)))
+
+        vaults = inventory.of_type("Microsoft.KeyVault/vaults")
+        assert len(inventory) == 5
+        assert [v["name"] for v in vaults] == ["kv0", "kv1", "kv2", "kv3", "kv4"]
+        # Only referenced properties are projected
+        assert vaults[0]["properties"] == {"enableSoftDelete": True}
+        assert vaults[1]["properties"] == {"enableSoftDelete": False}
+
+    def test_indexed_paths_are_projected_and_rebuilt(self, tmp_path, monkeypatch):
+        """Test that list indexes in validation paths survive the KQL round trip."""
+        inventory_file = tmp_path / "inventory.json"
+        inventory_file.write_text(json.dumps([make_resource("sa1", "Microsoft.Storage/storageAccounts", zones=["2"], properties={
+            "networkAcls": {"ipRules": [{"value": "10.0.0.1", "action": "Allow"}, {"value": "10.0.0.2"}]},
+        })]))
+        monkeypatch.setenv("FAKE_AZ_INVENTORY", str(inventory_file))
+        paths = ["zones[0]", "properties.networkAcls.ipRules[0].action", "properties.networkAcls.ipRules[1].value"]
+        controls = [{"azure_resources": [{"type": "Microsoft.Storage/storageAccounts", "validation": [
+            {"property": path, "check": "exists"} for path in paths
+        ]}]}]
+
+        plan = build_query_plan(controls)
+        assert "p0 = properties.networkAcls.ipRules[0].action" in plan.queries[0].to_kql()
+        inventory = asyncio.run(ResourceGraphBackend(AzureCliExecutor(cli_path=FAKE_AZ)).fetch(plan))
+        [account] = inventory.of_type("Microsoft.Storage/storageAccounts")
+        assert account["zones"] == ["2"]
+        assert account["properties"] == {"networkAcls": {"ipRules": [{"action": "Allow"}, {"value": "10.0.0.2"}]}}
+        assert [inventory.columns("Microsoft.Storage/storageAccounts").column(PropertyPath.parse(p)) for p in paths] == [
+            ["2"], ["Allow"], ["10.0.0.2"],
+        ]
+
+
+class TestEvaluator:
+    """Test the compiled property-path evaluator."""
+
+    def setup_method(self):
+        self.resources = ResourceColumns([
+            make_resource("pa1", "Microsoft.Authorization/policyAssignments",
+                          properties={"enforcementMode": "Default",
+                                      "parameters": {"effect": {"value": "Deny"}},
+                                      "retention": 1825, "zones": ["1", "2"]}),
+            make_resource("pa2", "Microsoft.Authorization/policyAssignments",
+                          properties={"enforcementMode": "DoNotEnforce", "retention": "30"}),
+            make_resource("pa3", "Microsoft.Authorization/policyAssignments"),
+        ])
+
+    def evaluate(self, *validations, match="any"):
+        requirement = compile_requirement({
+            "type": "Microsoft.Authorization/policyAssignments",
+            "required": True,
+            "match": match,
+            "validation": list(validations),
+        })
+        return requirement.evaluate(self.resources)
+
+    def test_paths_are_parsed_once(self):
+        """Test that identical paths share one parsed instance."""
+        path = PropertyPath.parse("properties.zones[1]")
+        assert path is PropertyPath.parse("properties.zones[1]")
+        assert path.segments == ("properties", "zones", 1)
+        assert path.extract(self.resources.resources) == ["2", None, None]
+
+    def test_checks_return_per_resource_outcomes(self):
+        """Test exists/equals/contains/in/greaterThan across all resources."""
+        cases = [
+            ({"property": "properties.enforcementMode", "check": "exists"}, [True, True, False]),
+            ({"property": "properties.enforcementMode", "check": "equals", "value": "default"}, [True, False, False]),
+            ({"property": "properties.parameters", "check": "contains", "value": "Deny"}, [True, False, False]),
+            ({"property": "properties.enforcementMode", "check": "in",
+              "value": ["Default", "DoNotEnforce"]}, [True, True, False]),
+            ({"property": "properties.retention", "check": "greaterThanOrEqual", "value": 365}, [True, False, False]),
+        ]
+        for validation, expected in cases:
+            assert self.evaluate(validation).resource_outcomes == expected, validation
+
+    def test_match_any_and_all(self):
+        """Test requirement satisfaction modes."""
+        validation = {"property": "properties.enforcementMode", "check": "exists"}
+        assert self.evaluate(validation).satisfied
+        assert not self.evaluate(validation, match="all").satisfied
+
+    def test_predicates_keep_types_apart_and_accept_structures(self):
+        """Test that 1 is not true and that dict/list values can be compared with `in`."""
+        resources = ResourceColumns([
+            make_resource("a", "T", properties={"flag": 1, "rules": {"port": 22}}),
+            make_resource("b", "T", properties={"flag": True, "rules": [{"port": 22}]}),
+        ])
+        flag = compile_requirement({"type": "T", "validation": [
+            {"property": "properties.flag", "check": "equals", "value": "true"}]})
+        assert flag.evaluate(resources).resource_outcomes == [False, True]
+
+        rules = compile_requirement({"type": "T", "validation": [
+            {"property": "properties.rules", "check": "in", "value": [{"port": 22}, "any"]}]})
+        assert rules.evaluate(resources).resource_outcomes == [True, True]
+
+    def test_unsupported_checks_and_missing_properties_are_not_evaluated(self):
+        """Test that a typo in a check or a resource list payload gives MANUAL, never PASSED or FAILED."""
+        typo = compile_requirement({"type": "Microsoft.Authorization/policyAssignments", "required": True,
+                                    "validation": [{"property": "properties.enforcementMode", "check": "equal"}]})
+        outcome = RequirementOutcome.from_evaluation(typo, self.resources)
+        assert outcome.unevaluable == "unsupported check(s): equal" and not outcome.blocking
+        assert ControlOutcome.from_requirements(0, {}, [outcome]).status == MANUAL
+        with pytest.raises(ValueError):
+            typo.checks[0].evaluate(self.resources)
+
+        listed = ResourceColumns(self.resources.resources, has_properties=False)
+        requirement = compile_requirement({"type": "Microsoft.Authorization/policyAssignments", "required": True,
+                                           "validation": [{"property": "properties.enforcementMode"}]})
+        assert RequirementOutcome.from_evaluation(requirement, listed).unevaluable
+        by_name = compile_requirement({"type": "Microsoft.Authorization/policyAssignments", "required": True,
+                                       "validation": [{"property": "name", "check": "equals", "value": "pa1"}]})
+        assert RequirementOutcome.from_evaluation(by_name, listed).satisfied
+
+    def test_columns_are_cached(self):
+        """Test that a property column is extracted once per resource set."""
+        path = PropertyPath.parse("properties.enforcementMode")
+        assert self.resources.column(path) is self.resources.column(path)
+
+
+class TestComplianceResultStore:
+    """Test the structured result store."""
+
+    def make_outcome(self, index, regulation, required_found):
+        control = {"reglementation": regulation, "exigence": f"req-{index}"}
+        requirement = compile_requirement({"type": "Microsoft.KeyVault/vaults", "required": True})
+        resources = [make_resource("kv", "Microsoft.KeyVault/vaults")] if required_found else []
+        outcome = RequirementOutcome.from_evaluation(requirement, ResourceColumns(resources))
+        return ControlOutcome.from_requirements(index, control, [outcome])
+
+    def test_counts_and_indexes(self):
+        """Test counters and lookups by status and regulation."""
+        store = ComplianceResultStore()
+        store.add(self.make_outcome(0, "DORA", True))
+        store.add(self.make_outcome(1, "DORA", False))
+        store.add(ControlOutcome.manual(2, {"reglementation": "NIS2"}))
+        store.add(self.make_outcome(3, "ACPR", True))
+
+        assert len(store) == 4
+        assert store.count(PASSED) == 2
+        assert store.count(FAILED, "DORA") == 1
+        assert store.count(MANUAL, "NIS2") == 1
+        assert store.regulations == ["ACPR", "DORA", "NIS2"]
+        assert store.compliance_rate("DORA") == 50.0
+        assert [o.index for o in store.select(PASSED)] == [0, 3]
+
+    def test_replacing_a_control_updates_indexes(self):
+        """Test that re-adding a control index replaces its row."""
+        store = ComplianceResultStore()
+        store.add(self.make_outcome(0, "DORA", False))
+        store.add(self.make_outcome(0, "DORA", True))
+        assert len(store) == 1
+        assert store.count(FAILED) == 0
+        assert store.select(PASSED, "DORA")[0].status == PASSED
+
+    def test_rendering_is_derived_from_outcomes(self):
+        """Test that control text is rendered on demand."""
+        text = render_control(self.make_outcome(4, "DORA", False))
+        assert "Control #5" in text
+        assert "No resources found (required)" in text
+        assert "**Status**: FAILED" in text
+
+
+class TestIncrementalRevalidation:
+    """Test fingerprints and dependent-control detection."""
+
+    def test_fingerprint_ignores_order_and_detects_changes(self):
+        """Test that fingerprints are order-independent but change-sensitive."""
+        a = make_resource("kv1", "Microsoft.KeyVault/vaults", changedTime="2025-01-01")
+        b = make_resource("kv2", "Microsoft.KeyVault/vaults", changedTime="2025-01-02")
+        assert fingerprint_resources([a, b], FINGERPRINT_FIELDS) == fingerprint_resources([b, a], FINGERPRINT_FIELDS)
+
+        changed = dict(b, changedTime="2025-02-01")
+        assert fingerprint_resources([a, b], FINGERPRINT_FIELDS) != fingerprint_resources([a, changed], FINGERPRINT_FIELDS)
+
+    def test_changed_types_drive_dependent_controls(self):
+        """Test that only controls depending on changed types are selected."""
+        before = ResourceInventory([
+            make_resource("kv1", "Microsoft.KeyVault/vaults", changedTime="1"),
+            make_resource("law", "Microsoft.OperationalInsights/workspaces", changedTime="1"),
+        ])
+        after = before.replace_types({
+            "Microsoft.KeyVault/vaults": [make_resource("kv1", "Microsoft.KeyVault/vaults", changedTime="2")],
+        })
+        changed = changed_types(
+            fingerprint_inventory(before, FINGERPRINT_FIELDS),
+            fingerprint_inventory(after, FINGERPRINT_FIELDS),
+        )
+        assert changed == {"microsoft.keyvault/vaults"}
+
+        controls = [
+            {"azure_resources": [{"type": "Microsoft.OperationalInsights/workspaces"}]},
+            {"azure_resources": [{"type": "Microsoft.KeyVault/vaults"}]},
+            {"manual_verification": True, "azure_resources": [{"type": "Microsoft.KeyVault/vaults"}]},
+        ]
+        assert dependent_controls(controls, changed) == [1]
+
+
+class TestQueryCache:
+    """Test the persistent Azure query cache."""
+
+    def test_ttl_lru_and_invalidation(self, tmp_path):
+        """Test expiry, per-type TTL, LRU eviction and invalidation."""
+        cache = QueryCache(tmp_path / "cache.sqlite", default_ttl=60,
+                           ttl_by_type={"Microsoft.Security/pricings": -1}, max_entries=2)
+        cache.put("a", "[1]", ["Microsoft.KeyVault/vaults"])
+        cache.put("expired", "[2]", ["Microsoft.Security/pricings"])
+        assert cache.get("a") == "[1]"
+        assert cache.get("expired") is None
+
+        cache.put("b", "[3]", ["Microsoft.Sql/servers"])
+        cache.get("a")
+        cache.put("c", "[4]", [])
+        assert cache.get("b") is None  # least recently used
+        assert cache.get("a") == "[1]"
+
+        assert cache.invalidate("microsoft.keyvault/vaults") == 2  # "a" and the all-types listing "c"
+        assert cache.stats()["entries"] == 0
+
+    def test_executor_serves_cached_queries(self, tmp_path, monkeypatch):
+        """Test that repeated queries hit the cache until refreshed."""
+        inventory_file = tmp_path / "inventory.json"
+        inventory_file.write_text(json.dumps([make_resource("kv1", "Microsoft.KeyVault/vaults")]))
+        monkeypatch.setenv("FAKE_AZ_INVENTORY", str(inventory_file))
+
+        cache = QueryCache(tmp_path / "cache.sqlite")
+        executor = AzureCliExecutor(cli_path=FAKE_AZ, cache=cache)
+        args = ["resource", "list", "--resource-type", "Microsoft.KeyVault/vaults"]
+        assert len(asyncio.run(executor.run_json(args))) == 1
+
+        inventory_file.write_text(json.dumps([]))
+        assert len(asyncio.run(executor.run_json(args))) == 1
+        assert asyncio.run(executor.run_json(args, refresh=True)) == []
+        assert asyncio.run(executor.run_json(args)) == []
+
+    def test_scans_reread_the_active_account(self, tmp_path, monkeypatch):
+        """Test that a scan after `az account set` does not reuse the old subscription's entries."""
+        import agent as checker
+
+        inventory_file = tmp_path / "inventory.json"
+        inventory_file.write_text(json.dumps([make_resource("kv1", "Microsoft.KeyVault/vaults")]))
+        monkeypatch.setenv("FAKE_AZ_INVENTORY", str(inventory_file))
+        monkeypatch.setenv("FAKE_AZ_SUBSCRIPTION", "sub-a")
+        (tmp_path / "config.yaml").write_text(yaml.safe_dump({"compliance": {
+            "azure": {"cli_path": FAKE_AZ},
+            "history": {"enabled": False},
+        }}))
+        agent = checker.AzureComplianceAgent(tmp_path)
+        agent.current_checklist = {'checklist': [
+            {"reglementation": "DORA", "azure_resources": [{"type": "Microsoft.KeyVault/vaults", "required": True}]},
+        ]}
+
+        asyncio.run(agent.validate_all_controls.handler(agent, {}))
+        assert [o.status for o in agent.compliance_results] == [PASSED]
+
+        monkeypatch.setenv("FAKE_AZ_SUBSCRIPTION", "sub-b")
+        inventory_file.write_text(json.dumps([]))
+        asyncio.run(agent.validate_all_controls.handler(agent, {}))
+        assert asyncio.run(agent.az.account_context())[0] == "sub-b"
+        assert [o.status for o in agent.compliance_results] == [FAILED]
+
+    def test_streams_read_to_the_end_are_cached(self, tmp_path, monkeypatch):
+        """Test that complete streamed queries are cached and cut-short ones are not."""
+        inventory_file = tmp_path / "inventory.json"
+        inventory_file.write_text(json.dumps([make_resource(f"kv{i}", "Microsoft.KeyVault/vaults") for i in range(3)]))
+        monkeypatch.setenv("FAKE_AZ_INVENTORY", str(inventory_file))
+
+        cache = QueryCache(tmp_path / "cache.sqlite")
+        executor = AzureCliExecutor(cli_path=FAKE_AZ, cache=cache)
+        args = ["resource", "list", "--resource-type", "Microsoft.KeyVault/vaults"]
+        assert len(asyncio.run(executor.collect_json(args, limit=1))) == 1
+        assert cache.stats()["entries"] == 0
+
+        assert len(asyncio.run(executor.collect_json(args))) == 3
+        inventory_file.write_text(json.dumps([]))
+        assert len(asyncio.run(executor.collect_json(args))) == 3
+        assert len(asyncio.run(executor.run_json(args))) == 3
+        assert asyncio.run(executor.collect_json(args, limit=2, transform=lambda r: r["name"])) == ["kv0", "kv1"]
+        assert asyncio.run(executor.collect_json(args, refresh=True)) == []
+        assert asyncio.run(executor.collect_json(args)) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+
+class TestChecklistCache:
+    """Test compiled checklist caching."""
+
+    def write_checklist(self, path, regulations):
+        controls = "".join(f"  - reglementation: {r}\n    exigence: e\n" for r in regulations)
+        path.write_text(f"checklist:\n{controls}")
+
+    def test_listing_and_loading_skip_yaml_once_compiled(self, tmp_path, monkeypatch):
+        """Test that fresh compiled checklists are served without YAML parsing."""
+        checklist = tmp_path / "fsi.yaml"
+        self.write_checklist(checklist, ["ACPR", "ACPR", "DORA"])
+        ChecklistCache(tmp_path / "cache").load(checklist)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("YAML parsed for an unchanged checklist")
+
+        monkeypatch.setattr(checklists_module.yaml, "safe_load", fail)
+        cache = ChecklistCache(tmp_path / "cache")
+        header = cache.header(checklist)
+        assert header.controls == 3
+        assert header.regulations == {"ACPR": 2, "DORA": 1}
+        assert len(cache.load(checklist)['checklist']) == 3
+
+    def test_changed_file_is_recompiled(self, tmp_path):
+        """Test that a modified checklist invalidates its compiled form."""
+        checklist = tmp_path / "fsi.yaml"
+        self.write_checklist(checklist, ["ACPR"])
+        cache = ChecklistCache(tmp_path / "cache")
+        assert cache.header(checklist).controls == 1
+
+        self.write_checklist(checklist, ["ACPR", "NIS2", "NIS2"])
+        assert cache.header(checklist).regulations == {"ACPR": 1, "NIS2": 2}
+        assert len(ChecklistCache(tmp_path / "cache").load(checklist)['checklist']) == 3
+
+    def test_invalid_checklist_raises(self, tmp_path):
+        """Test that a non-mapping document is rejected."""
+        checklist = tmp_path / "bad.yaml"
+        checklist.write_text("- just\n- a list\n")
+        with pytest.raises(ValueError):
+            ChecklistCache().load(checklist)
+
+
+class TestResultStreaming:
+    """Test streaming of control outcomes."""
+
+    def test_outcomes_are_yielded_in_completion_order(self):
+        """Test that faster controls are yielded first."""
+        async def control(index, delay):
+            await asyncio.sleep(delay)
+            return index
+
+        async def collect():
+            return [i async for i in iter_completed([control(0, 0.05), control(1, 0), control(2, 0.02)])]
+
+        assert asyncio.run(collect()) == [1, 2, 0]
+
+    def test_jsonl_stream_is_readable_line_by_line(self, tmp_path):
+        """Test that each record is flushed as a standalone JSON line."""
+        path = tmp_path / "scan.jsonl"
+        with ResultStreamWriter(path) as stream:
+            stream.start("fsi.yaml", 2)
+            stream.write(ControlOutcome.manual(1, {'reglementation': 'ACPR'}))
+            # Readable before the scan finishes
+            assert len(path.read_text().splitlines()) == 2
+            stream.finish({'total': 1})
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r['type'] for r in records] == ['scan', 'control', 'summary']
+        assert records[1]['status'] == MANUAL
+
+
+class TestSubscriptionFanOut:
+    """Test multi-subscription fan-out scanning."""
+
+    def test_scoped_executor_pins_commands(self):
+        """Test that scope options are added per command family."""
+        scope = ScopedExecutor(None, subscription="sub-a")
+        assert scope.scoped_args(["resource", "list"])[-2:] == ["--subscription", "sub-a"]
+        assert scope.scoped_args(["graph", "query", "-q", "resources"])[-2:] == ["--subscriptions", "sub-a"]
+        group = ScopedExecutor(None, management_group="mg")
+        assert group.scoped_args(["graph", "query"])[-2:] == ["--management-groups", "mg"]
+        assert parse_subscriptions("sub-a, sub-b sub-a") == ["sub-a", "sub-b"]
+
+    def test_management_group_and_scoped_inventories(self, tmp_path, monkeypatch):
+        """Test subscription discovery and per-subscription queries through fake az."""
+        inventory = [
+            {"id": "/subscriptions/sub-a", "type": "Microsoft.Resources/subscriptions"},
+            {"id": "/subscriptions/sub-b", "type": "Microsoft.Resources/subscriptions"},
+            make_resource("kv-a", "Microsoft.KeyVault/vaults", id="/subscriptions/sub-a/rg/kv-a"),
+            make_resource("kv-b", "Microsoft.KeyVault/vaults", id="/subscriptions/sub-b/rg/kv-b"),
+        ]
+        path = tmp_path / "inventory.json"
+        path.write_text(json.dumps(inventory))
+        monkeypatch.setenv("FAKE_AZ_INVENTORY", str(path))
+
+        async def scan():
+            executor = AzureCliExecutor(cli_path=FAKE_AZ)
+            subscriptions = await subscriptions_in_management_group(executor, "mg-root")
+            scope = ScopedExecutor(executor, subscription="sub-b", max_parallel=1)
+            resources = await scope.run_json(["resource", "list", "--resource-type", "Microsoft.KeyVault/vaults"])
+            return subscriptions, resources
+
+        subscriptions, resources = asyncio.run(scan())
+        assert subscriptions == ["sub-a", "sub-b"]
+        assert [r["name"] for r in resources] == ["kv-b"]
+
+    def test_merge_fails_control_failing_anywhere(self):
+        """Test that merged results keep per-subscription failures."""
+        control = {'reglementation': 'DORA'}
+        passing, failing = ComplianceResultStore(), ComplianceResultStore()
+        passing.add(ControlOutcome(0, control, PASSED, [RequirementOutcome("t", satisfied=True)]))
+        failing.add(ControlOutcome(0, control, FAILED, [RequirementOutcome("t", required=True)]))
+        passing.add(ControlOutcome.manual(1, control))
+        failing.add(ControlOutcome.manual(1, control))
+
+        merged = merge_stores([passing, failing])
+        assert merged.get(0).status == FAILED
+        assert len(merged.get(0).requirements) == 2
+        assert merged.count(MANUAL) == 1
+
+
+class TestDistributedScan:
+    """Test the distributed scan coordinator."""
+
+    controls = [{'reglementation': f"REG-{i}", 'exigence': f"req-{i}"} for i in range(6)]
+
+    def worker(self, address, fail_after=None):
+        """Minimal worker answering every control as MANUAL (optionally dying mid-shard)."""
+        conn = Client(address, authkey=b"secret")
+        controls = conn.recv()['controls']
+        sent = 0
+        while True:
+            message = conn.recv()
+            if message['type'] != 'shard':
+                break
+            for index in message['indexes']:
+                if fail_after is not None and sent >= fail_after:
+                    conn.close()
+                    return
+                conn.send({'type': 'outcome', 'outcome': ControlOutcome.manual(index, controls[index])})
+                sent += 1
+            conn.send({'type': 'done'})
+        conn.close()
+
+    def test_controls_sharing_a_type_stay_together(self):
+        """Test that sharding groups controls by resource type."""
+        controls = [
+            {'azure_resources': [{'type': "Microsoft.KeyVault/vaults"}]},
+            {'azure_resources': [{'type': "Microsoft.Storage/storageAccounts"}]},
+            {'azure_resources': [{'type': "microsoft.keyvault/vaults"}]},
+            {'manual_verification': True},
+        ]
+        shards = shard_controls(controls, 8)
+        assert sorted(shards) == [[0, 2], [1], [3]]
+        assert shard_controls(controls, 1) == [[0, 1, 2, 3]]
+
+    def test_shards_of_a_lost_worker_are_reassigned(self):
+        """Test that every control is merged even when a worker dies mid-shard."""
+        shards = [Shard(i, [2 * i, 2 * i + 1]) for i in range(3)]
+        coordinator = ScanCoordinator(self.controls, shards, b"secret", connect_timeout=5)
+        workers = [
+            threading.Thread(target=self.worker, args=(coordinator.address, 1)),
+            threading.Thread(target=self.worker, args=(coordinator.address,)),
+        ]
+        for worker in workers:
+            worker.start()
+        finished = coordinator.run()
+        for worker in workers:
+            worker.join()
+
+        assert [shard.error for shard in finished] == [None, None, None]
+        indexes = sorted(o.index for shard in finished for o in shard.outcomes)
+        assert indexes == list(range(6))
+        assert finished[0].outcomes[0].control is self.controls[finished[0].outcomes[0].index]
+
+    def test_shards_are_abandoned_without_workers(self):
+        """Test that a coordinator nobody connects to gives up."""
+        coordinator = ScanCoordinator(self.controls, [Shard(0, [0, 1])], b"secret", connect_timeout=0.2)
+        finished = coordinator.run()
+        assert finished[0].error == "no worker connected"
+
+    def test_local_workers_use_the_coordinator_configuration(self, tmp_path, monkeypatch):
+        """Test that a worker applies the passed configuration and records no history."""
+        import agent as checker
+
+        (tmp_path / "config.yaml").write_text(yaml.safe_dump({"compliance": {"validation": {"parallel": True}}}))
+        workers = []
+
+        async def run_worker(agent, address, authkey):
+            workers.append(agent)
+
+        monkeypatch.setattr(checker.AzureComplianceAgent, "run_worker", run_worker)
+        config = {"compliance": {
+            "cache": {"enabled": False},
+            "validation": {"parallel": False, "sampling": {"enabled": True, "min_resources": 50}},
+        }}
+        checker.run_local_worker(str(tmp_path), ("localhost", 0), b"secret", True, config)
+
+        [worker] = workers
+        assert worker.history is None
+        assert worker.sampling.min_resources == 50
+        assert worker.az.limiter.window == 1
+        assert config["compliance"].get("history") is None
+
+
+class TestPriorityScheduler:
+    """Test priority ordering, learned costs and early termination."""
+
+    regulations = {
+        'acpr': {'name': "ACPR – Gouvernance SI", 'priority': "high"},
+        'rgpd': {'name': "RGPD / CNIL", 'priority': "critical"},
+    }
+    controls = [
+        {'reglementation': "Internal", 'azure_resources': [{'type': "A"}]},
+        {'reglementation': "ACPR", 'azure_resources': [{'type': "Slow"}]},
+        {'reglementation': "ACPR – Gouvernance SI", 'azure_resources': [{'type': "A"}]},
+        {'reglementation': "RGPD / CNIL", 'azure_resources': [{'type': "A"}]},
+        {'reglementation': "Internal", 'priority': "critical", 'manual_verification': True},
+    ]
+
+    def test_order_by_priority_then_cost(self, tmp_path):
+        """Test that critical controls come first and cheap ones lead within a priority."""
+        costs = CostModel(tmp_path / "costs.json")
+        costs.observe("slow", 10.0)
+        costs.observe("Slow", 20.0)
+        assert costs.costs["slow"] == pytest.approx(13.0)
+        costs.save()
+
+        order = schedule(self.controls, regulation_priorities(self.regulations), CostModel(tmp_path / "costs.json"))
+        assert order == [4, 3, 2, 1, 0]
+
+    def test_stops_after_critical_failures(self):
+        """Test that dispatch stops once enough critical controls failed."""
+        started = []
+
+        async def run(index):
+            started.append(index)
+            await asyncio.sleep(0)
+            return ControlOutcome(index, {}, FAILED)
+
+        async def scan():
+            stop = CriticalFailureLimit(2, critical={1, 3, 5})
+            return [o.index async for o in run_prioritized(range(8), run, lambda: 2, stop)]
+
+        assert asyncio.run(scan()) == [0, 1, 2, 3]
+        assert started == [0, 1, 2, 3]
+
+
+class TestInventorySnapshot:
+    """Test offline inventory snapshots."""
+
+    def test_roundtrip_preserves_resources_and_source(self, tmp_path):
+        """Test that a snapshot reloads into an equivalent inventory."""
+        inventory = ResourceInventory([
+            make_resource("kv1", "Microsoft.KeyVault/vaults", properties={"enableSoftDelete": True}),
+            make_resource("sa1", "Microsoft.Storage/storageAccounts"),
+        ], source="resource-graph")
+        path = tmp_path / "tenant.jsonl.gz"
+        write_snapshot(inventory, path, metadata={'subscription': 'sub'})
+
+        header, loaded = read_snapshot(path)
+        assert header.resources == 2
+        assert header.metadata == {'subscription': 'sub'}
+        assert loaded.source == "resource-graph"
+        assert list(loaded) == list(inventory)
+        assert loaded.columns("microsoft.keyvault/vaults").column(PropertyPath.parse("properties.enableSoftDelete")) == [True]
+
+    def test_projected_snapshot_reports_uncaptured_paths_as_not_evaluated(self, tmp_path, monkeypatch):
+        """Test that an exported snapshot keeps whole records and its Resource Graph projection."""
+        import agent as checker
+
+        inventory_file = tmp_path / "inventory.json"
+        inventory_file.write_text(json.dumps([
+            make_resource("kv1", "Microsoft.KeyVault/vaults", properties={"enableSoftDelete": True, "sku": "premium"}),
+        ]))
+        (tmp_path / "config.yaml").write_text(yaml.safe_dump({"compliance": {
+            "azure": {"cli_path": FAKE_AZ, "use_resource_graph": True},
+            "cache": {"enabled": False},
+            "history": {"enabled": False},
+        }}))
+        monkeypatch.setenv("FAKE_AZ_INVENTORY", str(inventory_file))
+        agent = checker.AzureComplianceAgent(tmp_path)
+        agent.current_checklist = {'checklist': [
+            {"azure_resources": [{"type": "Microsoft.KeyVault/vaults", "required": True,
+                                  "validation": [{"property": "properties.enableSoftDelete", "check": "equals", "value": True}]}]},
+        ]}
+        asyncio.run(agent.export_inventory_snapshot.handler(agent, {"filename": "kv"}))
+
+        header, loaded = read_snapshot(agent.snapshots_dir / "kv.jsonl.gz")
+        assert "properties.enableSoftDelete" in header.projection["microsoft.keyvault/vaults"]
+        other = [
+            {"azure_resources": [{"type": "Microsoft.KeyVault/vaults", "required": True,
+                                  "validation": [{"property": "properties.sku", "check": "equals", "value": "premium"}]}]},
+            {"azure_resources": [{"type": "Microsoft.Storage/storageAccounts", "required": True}]},
+            {"azure_resources": [{"type": "Microsoft.KeyVault/vaults", "required": True,
+                                  "validation": [{"property": "properties.enableSoftDelete", "check": "equals", "value": True}]}]},
+        ]
+        outcomes = [asyncio.run(agent._validate_single_control(c, i, loaded)) for i, c in enumerate(other)]
+        assert [o.status for o in outcomes] == [MANUAL, MANUAL, PASSED]
+        assert "properties.sku" in outcomes[0].requirements[0].unevaluable
+        assert "not captured" in outcomes[1].requirements[0].unevaluable
+
+    def test_rejects_non_snapshot_files(self, tmp_path):
+        """Test that arbitrary gzip files are refused."""
+        import gzip
+        path = tmp_path / "other.jsonl.gz"
+        with gzip.open(path, 'wt') as f:
+            f.write('{"id": "/x"}\n')
+        with pytest.raises(SnapshotError):
+            read_snapshot(path)
+
+
+class TestResourceListFallback:
+    """Test scans that fall back from Resource Graph to `az resource list`."""
+
+    CONTROLS = [
+        {"reglementation": "DORA", "azure_resources": [
+            {"type": "Microsoft.KeyVault/vaults", "required": True,
+             "validation": [{"property": "properties.enableSoftDelete", "check": "equals", "value": True}]}]},
+        {"reglementation": "DORA", "azure_resources": [{"type": "Microsoft.KeyVault/vaults", "required": True}]},
+    ]
+
+    def test_property_checks_are_not_evaluated_on_resource_list_payloads(self, tmp_path, monkeypatch):
+        """Test that properties missing from `az resource list` never fail a control."""
+        import agent as checker
+
+        inventory_file = tmp_path / "inventory.json"
+        inventory_file.write_text(json.dumps([
+            make_resource("kv1", "Microsoft.KeyVault/vaults", properties={"enableSoftDelete": True}),
+        ]))
+        (tmp_path / "config.yaml").write_text(yaml.safe_dump({"compliance": {
+            "azure": {"cli_path": FAKE_AZ, "use_resource_graph": True},
+            "cache": {"enabled": False},
+            "history": {"enabled": False},
+        }}))
+        monkeypatch.setenv("FAKE_AZ_INVENTORY", str(inventory_file))
+        monkeypatch.setenv("FAKE_AZ_NO_GRAPH", "1")
+        agent = checker.AzureComplianceAgent(tmp_path)
+
+        async def scan():
+            inventory = await agent._fetch_inventory(self.CONTROLS)
+            scanned = [await agent._validate_single_control(c, i, inventory) for i, c in enumerate(self.CONTROLS)]
+            live = [await agent._validate_single_control(c, i) for i, c in enumerate(self.CONTROLS)]
+            return inventory, scanned, live
+
+        inventory, scanned, live = asyncio.run(scan())
+        assert inventory.source == "resource-list" and not inventory.has_properties
+        # Streamed resources are compacted as they are parsed
+        assert all(isinstance(r, ResourceRecord) for r in inventory)
+        for outcomes in (scanned, live):
+            assert [o.status for o in outcomes] == [MANUAL, PASSED]
+            assert "use_resource_graph" in outcomes[0].requirements[0].unevaluable
+        assert "NOT EVALUATED" in render_control(scanned[0])
+
+
+class TestChecklistReports:
+    """Test multi-checklist validation and its reports."""
+
+    def test_yml_checklists_and_empty_results_are_reported(self, tmp_path):
+        """Test that `.yml` checklists are picked up and empty stores report 0%."""
+        import agent as checker
+
+        (tmp_path / "config.yaml").write_text(yaml.safe_dump({"compliance": {
+            "cache": {"enabled": False},
+            "history": {"enabled": False},
+        }}))
+        (tmp_path / "checklists").mkdir()
+        control = {"reglementation": "DORA", "azure_resources": [{"type": "Microsoft.KeyVault/vaults", "required": True}]}
+        for name in ("a.yaml", "b.yml"):
+            (tmp_path / "checklists" / name).write_text(yaml.safe_dump({"checklist": [control]}))
+        snapshot = tmp_path / "kv.jsonl.gz"
+        write_snapshot(ResourceInventory([make_resource("kv1", "Microsoft.KeyVault/vaults")], source="synthetic"), snapshot)
+        agent = checker.AzureComplianceAgent(tmp_path, snapshot=snapshot)
+
+        result = asyncio.run(agent.validate_checklists.handler(agent, {"filenames": ""}))
+        text = result["content"][0]["text"]
+        assert "a.yaml: 100.0%" in text and "b.yml: 100.0%" in text
+        assert "- **Passed**: 0 (0.0%)" in agent._generate_report_content(ComplianceResultStore(), title="empty")
+
+
+class TestJsonStreaming:
+    """Test incremental parsing of Azure CLI output."""
+
+    def test_parser_handles_any_chunk_boundary(self):
+        """Test that elements are identical whatever the chunk size."""
+        data = [
+            make_resource("kv-é", "Microsoft.KeyVault/vaults", properties={"n": 12345, "rule": 'a"]}[{\\', "acl": [[], {}]}),
+            678, -1.5e3, True, None, "s]\\", [["x"]],
+        ]
+        raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        for size in (1, 3, 64, len(raw)):
+            parser = JsonArrayParser()
+            items = []
+            for start in range(0, len(raw), size):
+                items.extend(parser.feed(raw[start:start + size]))
+            assert items + parser.close() == data
+
+    def test_projection_keeps_identity_and_checked_paths(self):
+        """Test that only referenced properties survive projection."""
+        resource = make_resource("kv1", "Microsoft.KeyVault/vaults", properties={
+            "sku": {"name": "premium", "family": "A"}, "zones": ["1"], "big": "x" * 1000,
+        })
+        paths = [PropertyPath.parse("properties.sku.name"), PropertyPath.parse("properties.zones[0]")]
+        projected = project_resource(resource, paths)
+        assert projected["properties"] == {"sku": {"name": "premium"}, "zones": ["1"]}
+        assert projected["id"] == resource["id"]
+
+    def test_stream_stops_early(self, tmp_path, monkeypatch):
+        """Test that a limit stops reading after the first elements."""
+        inventory = [make_resource(f"kv{i}", "Microsoft.KeyVault/vaults") for i in range(50)]
+        path = tmp_path / "inventory.json"
+        path.write_text(json.dumps(inventory))
+        monkeypatch.setenv("FAKE_AZ_INVENTORY", str(path))
+
+        async def collect():
+            executor = AzureCliExecutor(cli_path=FAKE_AZ)
+            first = await executor.collect_json(["resource", "list"], limit=2, transform=lambda r: r["name"])
+            count = len(await executor.collect_json(["resource", "list"]))
+            return first, count
+
+        assert asyncio.run(collect()) == (["kv0", "kv1"], 50)
+
+
+class TestCompactRecords:
+    """Test compact resource records."""
+
+    def make_inventory(self):
+        return ResourceInventory([
+            make_resource("kv1", "Microsoft.KeyVault/vaults", tags={"env": "prod"},
+                          properties={"sku": {"name": "premium"}, "enableSoftDelete": True, "blob": "x" * 500}),
+            make_resource("kv2", "Microsoft.KeyVault/vaults", location="francecentral",
+                          properties={"sku": {"name": "standard"}}),
+        ])
+
+    def test_records_keep_only_checklist_properties(self):
+        """Test that records hold identity fields and referenced paths only."""
+        controls = [{'azure_resources': [{'type': 'Microsoft.KeyVault/vaults', 'validation': [
+            {'property': 'properties.sku.name', 'check': 'equals', 'value': 'premium'},
+        ]}]}]
+        compact = self.make_inventory().compact(record_schema(controls, ["etag"]))
+        record = compact.of_type("microsoft.keyvault/vaults")[0]
+
+        assert isinstance(record, ResourceRecord)
+        assert record.get("name") == "kv1"
+        assert record.value("properties.sku.name") == "premium"
+        assert record.value("properties.blob") is None
+        assert record.to_dict()["properties"] == {"sku": {"name": "premium"}}
+        assert "tags" not in record.to_dict()
+        assert compact.in_location("francecentral")[0].name == "kv2"
+
+    def test_evaluation_matches_raw_inventory(self):
+        """Test that compacted inventories evaluate exactly like raw ones."""
+        requirement = compile_requirement({'type': 'Microsoft.KeyVault/vaults', 'validation': [
+            {'property': 'properties.sku.name', 'check': 'equals', 'value': 'premium'},
+            {'property': 'properties.enableSoftDelete', 'check': 'equals', 'value': True},
+            {'property': 'location', 'check': 'in', 'value': ['westeurope']},
+        ]})
+        raw = self.make_inventory()
+        compact = raw.compact(RecordSchema(requirement.paths))
+        for inventory in (raw, compact):
+            evaluation = requirement.evaluate(inventory.columns("Microsoft.KeyVault/vaults"))
+            assert evaluation.resource_outcomes == [True, False]
+
+
+class TestScanHistory:
+    """Test the persistent scan history."""
+
+    def make_store(self, statuses):
+        store = ComplianceResultStore()
+        for index, (regulation, status) in enumerate(statuses):
+            control = {'reglementation': regulation, 'exigence': f"req-{index}", 'controle': f"ctl-{index}"}
+            store.add(ControlOutcome(index, control, status))
+        return store
+
+    def test_trend_per_regulation(self, tmp_path):
+        """Test that trends return the last scans oldest first."""
+        history = ScanHistory(tmp_path / "history.sqlite")
+        for passed in range(5):
+            statuses = [("DORA (2025)", PASSED if i < passed else FAILED) for i in range(4)]
+            history.record(self.make_store(statuses + [("NIS2", PASSED)]))
+
+        points = history.trend("DORA (2025)", limit=3)
+        assert [p.passed for p in points] == [2, 3, 4]
+        assert points[-1].compliance_rate == 100.0
+        assert history.trend(limit=1)[0].total == 5
+
+    def test_diff_classifies_changes(self, tmp_path):
+        """Test newly failing, newly passing and removed controls."""
+        history = ScanHistory(tmp_path / "history.sqlite")
+        old = history.record(self.make_store([("ACPR", PASSED), ("ACPR", FAILED), ("DORA", PASSED), ("DORA", MANUAL)]))
+        new = history.record(self.make_store([("ACPR", FAILED), ("ACPR", PASSED), ("DORA", PASSED)]))
+
+        diff = history.diff(old, new)
+        assert [c.control_index for c in diff.newly_failing] == [0]
+        assert [c.control_index for c in diff.newly_passing] == [1]
+        assert [(c.before, c.after) for c in diff.other_changes] == [(MANUAL, None)]
+        assert diff.unchanged == 1
+        assert history.previous_id(new) == old
+        assert history.diff(old, 999) is None
+
+    def test_old_scans_are_pruned(self, tmp_path):
+        """Test that only the last keep_scans scans and their rows are retained."""
+        history = ScanHistory(tmp_path / "history.sqlite", keep_scans=2)
+        ids = [history.record(self.make_store([("DORA", PASSED)])) for _ in range(4)]
+        assert [scan.id for scan in history.scans()] == ids[:1:-1]
+        assert len(history.trend("DORA")) == 2
+        assert history.diff(ids[0], ids[3]) is None
+
+    def test_unchanged_revalidation_is_not_recorded(self, tmp_path):
+        """Test that a revalidation finding no change adds no history row."""
+        import agent as checker
+
+        snapshot = tmp_path / "kv.jsonl.gz"
+        write_snapshot(ResourceInventory([make_resource("kv1", "Microsoft.KeyVault/vaults")], source="synthetic"), snapshot)
+        (tmp_path / "config.yaml").write_text(yaml.safe_dump({"compliance": {"cache": {"enabled": False}}}))
+        agent = checker.AzureComplianceAgent(tmp_path, snapshot=snapshot)
+        agent.current_checklist = {'checklist': [
+            {"reglementation": "DORA", "azure_resources": [{"type": "Microsoft.KeyVault/vaults", "required": True}]},
+        ]}
+
+        asyncio.run(agent.validate_all_controls.handler(agent, {}))
+        result = asyncio.run(agent.revalidate_changed.handler(agent, {}))
+        assert "No resource changes" in result["content"][0]["text"]
+        assert len(agent.history.scans()) == 1
+
+
+class TestWatchOutput:
+    """Test the watch mode reports and drift detection."""
+
+    def test_reports_roll_and_status_is_replaced(self, tmp_path):
+        """Test that old reports are pruned and latest copies follow the newest."""
+        output = WatchOutput(tmp_path / "watch", keep=2)
+        start = datetime(2026, 1, 1, 12, 0, 0)
+        for cycle in range(4):
+            output.write_reports(f"# cycle {cycle}", {"cycle": cycle}, start + timedelta(minutes=cycle))
+            output.write_status({"cycle": cycle})
+
+        assert len(list(output.directory.glob("report_*.json"))) == 2
+        assert len(list(output.directory.glob("report_*.md"))) == 2
+        assert json.loads((output.directory / "latest.json").read_text()) == {"cycle": 3}
+        assert json.loads(output.status_path.read_text()) == {"cycle": 3}
+        assert not list(output.directory.glob(".*.tmp"))
+
+    def test_transitions_ignore_new_and_unchanged_controls(self):
+        """Test that only status changes since the previous cycle count as drift."""
+        store = ComplianceResultStore()
+        for index, status in enumerate([FAILED, PASSED, FAILED, MANUAL]):
+            store.add(ControlOutcome(index, {'reglementation': "DORA"}, status))
+
+        transitions = status_transitions({0: PASSED, 1: FAILED, 3: MANUAL}, store)
+        assert transitions == {'newly_failing': [0], 'newly_passing': [1]}
+
+
+class TestSampling:
+    """Test stratified sampling of per-resource checks."""
+
+    @staticmethod
+    def make_resources(count, compliant_every):
+        return ResourceColumns([
+            {
+                'id': f"/r/{i}",
+                'resourceGroup': f"rg-{i % 5}",
+                'location': "westeurope" if i % 2 else "francecentral",
+                'properties': {'enabled': i % compliant_every != 0},
+            }
+            for i in range(count)
+        ])
+
+    def test_wilson_interval_and_allocation(self):
+        """Test the interval bounds and proportional allocation across strata."""
+        low, high = wilson_interval(0.9, 400)
+        assert 0.86 < low < 0.9 < high < 0.93
+        assert wilson_interval(1.0, 50)[1] == 1.0
+        assert allocate([600, 300, 100], 100) == [60, 30, 10]
+        assert allocate([998, 1, 1], 10) == [8, 1, 1]
+
+    def test_conclusive_sample_decides(self):
+        """Test that a sample far from the threshold decides without a full evaluation."""
+        requirement = compile_requirement({
+            'type': "Microsoft.Insights/diagnosticSettings",
+            'required': True,
+            'pass_rate': 0.5,
+            'validation': [{'property': "properties.enabled", 'check': "equals", 'value': True}],
+        })
+        resources = self.make_resources(5000, compliant_every=10)
+        outcome = evaluate_sampled(requirement, resources, SamplingPolicy(min_resources=1000, sample_size=200, seed=1))
+
+        assert outcome.satisfied
+        assert outcome.found == 5000
+        assert outcome.sample.sampled == 200 and outcome.sample.strata == 10
+        assert outcome.sample.low < 0.9 < outcome.sample.high
+        assert not outcome.sample.escalated
+        assert len(outcome.resource_outcomes) == 200
+
+    def test_estimate_near_threshold_escalates(self):
+        """Test that an estimate within the margin is replaced by a full evaluation."""
+        requirement = compile_requirement({
+            'type': "Microsoft.Insights/diagnosticSettings",
+            'required': True,
+            'pass_rate': 0.9,
+            'validation': [{'property': "properties.enabled", 'check': "equals", 'value': True}],
+        })
+        resources = self.make_resources(5000, compliant_every=10)
+        outcome = evaluate_sampled(requirement, resources, SamplingPolicy(min_resources=1000, sample_size=200, seed=1))
+
+        assert outcome.sample.escalated
+        assert len(outcome.resource_outcomes) == 5000
+        assert outcome.satisfied
+        assert "evaluated every resource" in render_control(
+            ControlOutcome.from_requirements(0, {'reglementation': "DORA"}, [outcome])
+        )
+
+
+class TestCustomControlBatch:
+    """Test reading and rendering batches of custom controls."""
+
+    def test_directory_batch_keeps_invalid_entries(self, tmp_path):
+        """Test that lists, checklist documents and broken files become entries."""
+        (tmp_path / "a.yaml").write_text(
+            "- controle: NSG\n  azure_resources: [{type: Microsoft.Network/networkSecurityGroups}]\n"
+            "- controle: Broken\n"
+        )
+        (tmp_path / "b.yml").write_text(
+            "checklist:\n  - controle: Review\n    manual_verification: true\n"
+        )
+        (tmp_path / "c.yaml").write_text("controle: [unclosed\n")
+        (tmp_path / "notes.txt").write_text("ignored")
+
+        entries = load_batch(path=tmp_path)
+        assert [e.source for e in entries] == ["a.yaml#1", "a.yaml#2", "b.yml", "c.yaml"]
+        assert [e.control is not None for e in entries] == [True, False, True, False]
+        assert entries[1].error == "no azure_resources to check"
+        with pytest.raises(ValueError):
+            load_batch("- controle: [unclosed")
+
+    def test_table_lists_each_entry(self):
+        """Test one row per entry with the blocking requirement as detail."""
+        entries = load_batch(
+            "- controle: Soft delete\n  azure_resources: [{type: Microsoft.KeyVault/vaults, required: true}]\n"
+            "- 42\n"
+        )
+        requirement = compile_requirement({
+            'type': "Microsoft.KeyVault/vaults",
+            'required': True,
+            'validation': [{'property': "properties.enableSoftDelete", 'check': "equals", 'value': True}],
+        })
+        failed = RequirementOutcome.from_evaluation(
+            requirement, ResourceColumns([{'id': "kv1", 'properties': {'enableSoftDelete': False}}])
+        )
+        table = render_batch_table(entries, {0: ControlOutcome.from_requirements(0, entries[0].control, [failed])})
+
+        rows = table.strip().splitlines()[2:]
+        assert rows[0] == "| 1 | inline#1 | Soft delete | ❌ FAILED | vaults: 0/1 compliant |"
+        assert rows[1] == "| 2 | inline#2 | | ⛔ INVALID | control must be a mapping |"
+
+
+class TestChecklistSet:
+    """Test validating several checklists in one pass."""
+
+    def test_shared_controls_are_evaluated_once_and_fanned_out(self):
+        """Test that identical requirements merge and results split per checklist."""
+        vaults = [{'type': "Microsoft.KeyVault/vaults", 'required': True}]
+        fsi = {'checklist': [
+            {'reglementation': "DORA", 'exigence': "Keys", 'azure_resources': vaults},
+            {'reglementation': "ACPR", 'exigence': "Review", 'manual_verification': True},
+        ]}
+        dora = {'checklist': [{'reglementation': "DORA (2025)", 'exigence': "Key vaults", 'azure_resources': vaults}]}
+        checklist_set = ChecklistSet.merge({"fsi.yaml": fsi, "dora.yaml": dora})
+
+        assert checklist_set.total == 3
+        assert len(checklist_set.controls) == 2
+        assert checklist_set.members[0] == [("fsi.yaml", 0), ("dora.yaml", 0)]
+
+        store = checklist_set.fan_out([
+            ControlOutcome(0, checklist_set.controls[0], FAILED),
+            ControlOutcome(1, checklist_set.controls[1], MANUAL),
+        ])
+        assert [(o.index, o.status) for o in store] == [(0, FAILED), (1, MANUAL), (2, FAILED)]
+        assert store.get(2).regulation == "DORA (2025)"
+
+        stores = checklist_set.split(store)
+        assert len(stores["fsi.yaml"]) == 2
+        assert [(o.index, o.requirement) for o in stores["dora.yaml"]] == [(0, "Key vaults")]
@@ -2,6 +2,7 @@
 Tests for the Claude agents repository structure and shared utilities.
 """
 
+import asyncio
 import pytest
 import sys
 from pathlib import Path
@@ -12,6 +13,10 @@ repo_root = Path(__file__).parent.parent
 sys.path.append(str(repo_root / "shared"))
 
 from utils import load_config, validate_config, get_logger, setup_logging
+from utils.bicep_linter import (
+    LINT_CACHE_FILE, RULES, LintRule, lint_bicep_targets, lint_bicep_targets_async, parse_bicep, register_rule,
+    run_rules,
+)
 
 
 class TestSharedUtils:
@@ -50,6 +55,181 @@ class TestSharedUtils:
         assert len(errors) > 0
 
 
+class TestBicepLinter:
+    """Test the Bicep parser and auto-fixes."""
+
+    TEMPLATE = """// location is only mentioned in this comment
+@description('Deployment location')
+param location string = resourceGroup().location
+param prefix string
+param label string = 'prefix'
+
+var name = '${prefix}-pip'
+
+resource pip 'Microsoft.Network/publicIPAddresses@2023-05-01' = {
+  name: name
+}
+
+resource extra 'Microsoft.Network/publicIPAddresses@2023-05-01' existing = {
+  name: 'extra'
+}
+
+resource host 'Microsoft.Network/bastionHosts@2023-05-01' = {
+  name: 'bastion'
+  properties: {
+    publicIPAddress: { id: pip.id }
+  }
+  dependsOn: [
+    pip
+    extra
+  ]
+}
+"""
+
+    def test_model_ignores_comments_strings_and_member_names(self):
+        """Test the symbol table and reference map."""
+        model = parse_bicep(self.TEMPLATE)
+
+        assert [(d.kind, d.name) for d in model.declarations] == [
+            ("param", "location"), ("param", "prefix"), ("param", "label"),
+            ("var", "name"), ("resource", "pip"), ("resource", "extra"), ("resource", "host"),
+        ]
+        assert model.symbols["pip"].type_name == "Microsoft.Network/publicIPAddresses@2023-05-01"
+        assert [d.name for d in model.symbols["location"].decorators] == ["description"]
+        assert not model.value_references("location")
+        assert not model.value_references("label")
+        assert [r.owner for r in model.value_references("prefix")] == ["name"]
+        assert [p.path for p in model.properties if p.owner == "host"][:3] == [
+            ("name",), ("properties",), ("properties", "publicIPAddress"),
+        ]
+
+    def test_fixes_unused_params_and_inferred_dependencies(self, tmp_path):
+        """Test that only unreferenced params and inferable dependsOn entries go."""
+        template = tmp_path / "main.bicep"
+        template.write_text(self.TEMPLATE)
+
+        [result] = lint_bicep_targets([tmp_path])
+        assert result.removed_parameters == ["location", "label"]
+        assert result.removed_dependson == ["pip"]
+
+        fixed = template.read_text()
+        assert "@description" not in fixed
+        assert "param prefix string" in fixed
+        assert "dependsOn: [\n    extra\n  ]" in fixed
+        assert lint_bicep_targets([template])[0].changed is False
+
+    def test_parallel_lint_matches_serial_order(self, tmp_path):
+        """Test that a process pool gives the serial results in path order."""
+        serial_dir, parallel_dir = tmp_path / "serial", tmp_path / "parallel"
+        for root in (serial_dir, parallel_dir):
+            for index in range(12):
+                ring = root / f"ring{index % 3}"
+                ring.mkdir(parents=True, exist_ok=True)
+                (ring / f"component{index:02d}.bicep").write_text(self.TEMPLATE)
+
+        serial = lint_bicep_targets([serial_dir], workers=1)
+        parallel = asyncio.run(lint_bicep_targets_async([parallel_dir], workers=3))
+
+        assert [r.file.relative_to(parallel_dir) for r in parallel] == [r.file.relative_to(serial_dir) for r in serial]
+        assert [r.removed_parameters for r in parallel] == [["location", "label"]] * 12
+        assert [r.diagnostics for r in parallel] == [r.diagnostics for r in serial]
+        assert all(r.file.read_text() == serial[0].file.read_text() for r in parallel)
+
+    def test_cache_skips_unchanged_files(self, tmp_path):
+        """Test that cached content is not parsed again and still gets its fixes."""
+        template = tmp_path / "main.bicep"
+        template.write_text(self.TEMPLATE)
+        cache = tmp_path / LINT_CACHE_FILE
+
+        [first] = lint_bicep_targets([tmp_path], cache=cache)
+        fixed = template.read_text()
+        template.write_text(self.TEMPLATE)  # regenerated with the same content
+
+        with patch("utils.bicep_linter.parse_bicep", side_effect=AssertionError("parsed")):
+            [second] = lint_bicep_targets([tmp_path], cache=cache)
+        assert template.read_text() == fixed
+        assert second.removed_parameters == first.removed_parameters == ["location", "label"]
+        assert second.diagnostics == first.diagnostics
+
+        # Another rule set is a different cache key
+        [only_params] = lint_bicep_targets([template], rules=["no-unused-params"], cache=cache)
+        assert only_params.removed_parameters == [] and only_params.removed_dependson == []
+
+    RULES_TEMPLATE = """param location string = resourceGroup().location
+param adminPassword string
+@secure()
+param apiToken string
+param secretName string
+var region = 'westeurope'
+var tags = {
+  Environment: 'prod'
+  Compliance: 'DORA'
+}
+
+resource vault 'Microsoft.KeyVault/vaults@2023-07-01' = {
+  name: '${secretName}-${adminPassword}-${apiToken}'
+  location: region
+  tags: tags
+}
+
+resource vaultLogs 'Microsoft.Insights/diagnosticSettings@2021-05-01-preview' = {
+  name: 'logs'
+  scope: vault
+}
+
+resource sa 'Microsoft.Storage/storageAccounts@2023-01-01' = {
+  name: 'sa'
+  location: 'global'
+  tags: {
+    environment: 'prod'
+  }
+}
+
+module net 'br/public:avm/res/network/virtual-network:0.7.1' = {
+  name: 'net'
+  params: {
+    location: location
+    diagnosticSettings: []
+    tags: tags
+  }
+}
+"""
+
+    def test_rules_report_findings_in_one_pass(self):
+        """Test the registered rules' diagnostics and the one-traversal dispatch."""
+        context = run_rules(parse_bicep(self.RULES_TEMPLATE))
+        findings = [(d.rule, d.line, d.column) for d in context.diagnostics]
+        assert findings == [
+            ("secure-secrets-in-params", 2, 1),
+            ("prefer-avm-module", 12, 1),
+            ("no-hardcoded-location", 14, 3),
+            ("fsi-required-tags", 23, 1),
+            ("missing-diagnostic-settings", 23, 1),
+            ("prefer-avm-module", 23, 1),
+        ]
+        assert "Compliance" in context.diagnostics[3].message
+        assert "Environment" not in context.diagnostics[3].message
+
+        visited = []
+
+        class CountNodes(LintRule):
+            id = "count-nodes"
+            node_kinds = ("declaration",)
+
+            def visit(self, kind, node, context):
+                visited.append(node.name)
+
+        register_rule(CountNodes)
+        try:
+            assert not run_rules(parse_bicep(self.RULES_TEMPLATE), ["count-nodes"]).diagnostics
+            assert visited == ["location", "adminPassword", "apiToken", "secretName", "region", "tags",
+                               "vault", "vaultLogs", "sa", "net"]
+            with pytest.raises(ValueError):
+                register_rule(CountNodes)
+        finally:
+            del RULES["count-nodes"]
+
+
 class TestDirectoryStructure:
     """Test that the directory structure is correct."""
     